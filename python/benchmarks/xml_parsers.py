@@ -0,0 +1,66 @@
+#! /usr/bin/env python
+
+# measures how many issues per second every available XML parser backend turns into youtrack.Issue objects
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import youtrack
+from youtrack import xmlparser
+
+
+def generate_issues_xml(count, comments=3):
+    xml = ['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+           '<issues xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">']
+    for i in range(1, count + 1):
+        xml.append('<issue id="BM-%d">' % i)
+        xml.append('<field name="projectShortName"><value>BM</value></field>')
+        xml.append('<field name="numberInProject"><value>%d</value></field>' % i)
+        xml.append('<field name="summary"><value>Issue number %d with a summary</value></field>' % i)
+        xml.append('<field name="description"><value>%s</value></field>' % ('Some description &amp; text. ' * 20))
+        xml.append('<field name="created"><value>1262300400000</value></field>')
+        xml.append('<field name="reporterName"><value>user%d</value></field>' % (i % 50))
+        xml.append('<field xsi:type="CustomFieldValue" name="Priority"><value>Normal</value></field>')
+        xml.append('<field xsi:type="CustomFieldValue" name="Fix versions"><value>1.0</value><value>2.0</value></field>')
+        xml.append('<field xsi:type="MultiUserField" name="Assignee"><value fullName="User">user%d</value></field>'
+                   % (i % 50))
+        xml.append('<field name="links"><value type="Relates" role="relates to">BM-%d</value></field>' % (i + 1))
+        for c in range(comments):
+            xml.append('<comment id="%d-%d" author="user%d" text="Comment %d" created="1262300400000"/>'
+                       % (i, c, c, c))
+        xml.append('<tag>tag%d</tag>' % (i % 10))
+        xml.append('</issue>')
+    xml.append('</issues>')
+    return ''.join(xml)
+
+
+def measure(backend, content, count, repeat):
+    xmlparser.set_backend(backend)
+    best = None
+    for _ in range(repeat):
+        started = time.time()
+        xml = xmlparser.parseString(content)
+        issues = [youtrack.Issue(e, None) for e in xml.documentElement.childNodes if e.nodeType == 1]
+        elapsed = time.time() - started
+        assert len(issues) == count
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeat = 3
+    content = generate_issues_xml(count)
+    print 'Parsing %d issues (%d KB), best of %d runs' % (count, len(content) / 1024, repeat)
+    default = xmlparser.get_backend().name
+    for backend in xmlparser.available_backends():
+        elapsed = measure(backend, content, count, repeat)
+        print '%-14s %8.0f issues/s' % (backend, count / elapsed)
+    xmlparser.set_backend(default)
+
+
+if __name__ == '__main__':
+    main()
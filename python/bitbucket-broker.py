@@ -7,6 +7,7 @@ import getopt
 import socket
 from youtrack.connection import Connection
 from youtrack import YouTrackException
+from youtrack.ratelimit import set_rate_limit
 try:
     from flask import Flask, request, abort, json
 except ImportError as e:
@@ -71,6 +72,10 @@ Options:
     -g, --gen-secret
             Generate and print secret that can be used as part of context.
 
+    -r, --rate-limit <reads:writes>
+            Maximum number of YouTrack requests per second made by all
+            hook handlers together, e.g. 10:2.
+
 Examples:
     $ %s --gen-secret
     508ac3baab155906b38df70e7c1cb06d
@@ -89,11 +94,12 @@ def main():
     port = 5000
     context = '/'
     context_secret = None
+    rate_limit = None
 
     opts, args = getopt.getopt(
         sys.argv[1:],
-        'hdgs:p:c:',
-        ['help', 'debug', 'context=', 'gen-secret', 'secret=', 'port='])
+        'hdgs:p:c:r:',
+        ['help', 'debug', 'context=', 'gen-secret', 'secret=', 'port=', 'rate-limit='])
     for o, v in opts:
         if o in ('-h', '--help'):
             usage()
@@ -109,6 +115,9 @@ def main():
             port = int(v)
         elif o in ('-c', '--context'):
             context += v.strip('/')
+        elif o in ('-r', '--rate-limit'):
+            reads, _, writes = v.partition(':')
+            rate_limit = (float(reads or 0) or None, float(writes or 0) or None)
 
     my_url = 'http://%s:%d%s' % (get_my_ip(), port, context.rstrip('/'))
     if context_secret:
@@ -120,6 +129,9 @@ def main():
         sys.exit(1)
 
     yt_url, yt_login, yt_password = args[0:3]
+    if rate_limit:
+        # connections created for every hook request share the limit
+        set_rate_limit(yt_url, *rate_limit)
 
     app = Flask(__name__)
     
@@ -156,10 +156,19 @@ class CsvYouTrackImporter(YouTrackImporter):
             self._import_user(yt_user)
             author = yt_user.login
             created = self._import_config._to_unix_date(attach[1])
+            #group = attach[3]
+            self._attachment_pipeline.put(issue_id, attach, self._attachment_uploader(author, created),
+                                          size=os.path.getsize(attach[2]))
+
+    def _attachment_uploader(self, author, created):
+        def upload(issue_id, attach):
             name = os.path.basename(attach[2])
             content = open(attach[2], 'rb')
-            #group = attach[3]
-            self._target.importAttachment(issue_id, name, content, author, None, None, created, '')
+            try:
+                return self._target.importAttachment(issue_id, name, content, author, None, None, created, '')
+            finally:
+                content.close()
+        return upload
 
     def _get_custom_field_names(self, project_ids):
         project_name_key = self._import_config.get_key_for_field_name(self._import_config.get_project_name_key())
@@ -22,6 +22,7 @@ from jira.client import JiraClient
 from youtrack import YouTrackException, Link, WorkItem
 import youtrack
 from youtrack.connection import Connection
+from youtrack.attachments import AttachmentPipeline
 from youtrack.importHelper import create_bundle_safe
 
 jt_fields = []
@@ -314,7 +315,7 @@ def get_value_presentation(field_name, field_type, value):
 
 
 @ignore_youtrack_exceptions
-def process_attachments(source, target, issue, replace):
+def process_attachments(source, target, issue, replace, pipeline):
     def get_attachment_hash(attach):
         return attach.name + '\n' + attach.created
 
@@ -331,22 +332,22 @@ def process_attachments(source, target, issue, replace):
             continue
         if 'author' in jira_attachment:
             create_user(target, jira_attachment['author'])
+        old_attachment = None
+        if replace:
+            old_attachment = existing_attachments.get(attachment_hash)
+        pipeline.put(issue_id, attachment, attachment_uploader(target, old_attachment))
+
+
+def attachment_uploader(target, old_attachment):
+    def upload(issue_id, attachment):
         attachment_name = attachment.name
         if isinstance(attachment_name, unicode):
             attachment_name = attachment_name.encode('utf-8')
-        try:
-            print 'Creating attachment %s for issue %s' % \
-                  (attachment_name, issue_id)
-            target.createAttachmentFromAttachment(issue_id, attachment)
-        except BaseException, e:
-            print 'Cannot create attachment %s' % attachment_name
-            print e
-            continue
-        if not replace:
-            continue
-        old_attachment = existing_attachments.get(attachment_hash)
+        print 'Creating attachment %s for issue %s' % \
+              (attachment_name, issue_id)
+        target.createAttachmentFromAttachment(issue_id, attachment)
         if not old_attachment:
-            continue
+            return
         try:
             print 'Deleting old version of attachment %s for issue %s' % \
                   (attachment_name, issue_id)
@@ -354,6 +355,16 @@ def process_attachments(source, target, issue, replace):
         except BaseException, e:
             print 'Cannot delete old version of attachment %s' % attachment_name
             print e
+    return upload
+
+
+def print_attachment_failure(pipeline, issue_id, attachment, error):
+    if error is not None:
+        attachment_name = attachment.name
+        if isinstance(attachment_name, unicode):
+            attachment_name = attachment_name.encode('utf-8')
+        print 'Cannot create attachment %s' % attachment_name
+        print error
 
 
 @ignore_youtrack_exceptions
@@ -387,6 +398,7 @@ def jira2youtrack(source_url, source_login, source_password,
     target = Target(target_url, target_login, target_password)
 
     issue_links = []
+    attachment_pipeline = AttachmentPipeline(target, progress=print_attachment_failure)
 
     for (project_id, start, end) in projects:
         try:
@@ -428,10 +440,14 @@ def jira2youtrack(source_url, source_login, source_password,
                 if flags & FI_LABELS:
                     process_labels(target, issue)
                 if flags & FI_ATTACHMENTS:
-                    process_attachments(source, target, issue, flags & FI_REPLACE_ATTACHMENTS > 0)
+                    process_attachments(source, target, issue, flags & FI_REPLACE_ATTACHMENTS > 0,
+                                        attachment_pipeline)
                 if flags & FI_WORK_LOG:
                     process_worklog(source, target, issue)
 
+    attachment_pipeline.close()
+    print attachment_pipeline.report()
+
     if flags & FI_LINKS:
         for link in issue_links:
             target.importLinks([link])
@@ -443,14 +459,15 @@ class JiraAttachment(object):
             self.authorLogin = attach['author']['name'].replace(' ', '_')
         else:
             self.authorLogin = 'root'
-        self._url = attach['content']
+        self.url = attach['content']
+        self.size = attach.get('size')
         self.name = attach['filename']
         self.created = to_unix_date(attach['created'])
         self._source = source
 
     def getContent(self):
         return urllib2.urlopen(
-            urllib2.Request(self._url, headers=self._source._headers))
+            urllib2.Request(self.url, headers=self._source._headers))
 
 
 class Target(Connection):
@@ -2,6 +2,7 @@
 
 import urllib2
 from youtrack.connection import Connection
+from youtrack.attachments import AttachmentPipeline
 from mantis.mantisClient import MantisClient
 from youtrack import *
 import sys
@@ -262,15 +263,20 @@ def add_values_to_fields(connection, project_id, mantis_field_name, values, mant
         add_values_to_bundle_safe(connection, bundle, yt_values)
 
 
-def import_attachments(issue_attachments, issue_id, target):
+def import_attachments(issue_attachments, issue_id, target, pipeline):
     for attachment in issue_attachments:
-        print "Processing issue attachment [ %s ]" % str(attachment.id)
-        content = StringIO(attachment.content)
         author_login = "guest"
         if attachment.author is not None:
             author = to_yt_user(attachment.author)
             target.importUsers([author])
             author_login = author.login
+        pipeline.put(issue_id, attachment, attachment_uploader(target, author_login), size=len(attachment.content))
+
+
+def attachment_uploader(target, author_login):
+    def upload(issue_id, attachment):
+        print "Processing issue attachment [ %s ]" % str(attachment.id)
+        content = StringIO(attachment.content)
         try:
             target.importAttachment(
                 issue_id,
@@ -278,7 +284,7 @@ def import_attachments(issue_attachments, issue_id, target):
                 content,
                 author_login,
                 attachment.file_type,
-                None,
+                len(attachment.content),
                 attachment.date_added)
         except YouTrackException:
             print "Failed to import attachment"
@@ -287,6 +293,7 @@ def import_attachments(issue_attachments, issue_id, target):
             if isinstance(msg, unicode):
                 msg = msg.encode('utf-8')
             print msg
+    return upload
 
 
 def is_prefix_of_any_other_tag(tag, other_tags):
@@ -340,6 +347,8 @@ def mantis2youtrack(target_url, target_login, target_pass, mantis_db_name, manti
 
     #connacting to yt
     target = Connection(target_url, target_login, target_pass)
+    # attachments are read from the database, so the per host limit only applies to uploads
+    attachment_pipeline = AttachmentPipeline(target, max_per_host=4)
     #connacting to mantis
     client = MantisClient(mantis_db_host, int(mantis_db_port), mantis_db_login,
         mantis_db_pass, mantis_db_name, mantis.CHARSET, mantis.BATCH_SUBPROJECTS)
@@ -437,11 +446,14 @@ def mantis2youtrack(target_url, target_login, target_pass, mantis_db_name, manti
                 for issue in mantis_issues:
                     issue_attachments = client.get_attachments(issue['id'])
                     issue_id = "%s-%s" % (project_id, issue['id'])
-                    import_attachments(issue_attachments, issue_id, target)
+                    import_attachments(issue_attachments, issue_id, target, attachment_pipeline)
                     issue_tags |= set(client.get_issue_tags_by_id(issue['id']))
 
+        attachment_pipeline.join()
+        print attachment_pipeline.report()
         print "Importing issues to project [ %s ] finished" % project_id
 
+    attachment_pipeline.close()
     import_tags(client, target, project_ids, issue_tags)
 
     print "Importing issue links"
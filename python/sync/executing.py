@@ -1,27 +1,40 @@
 from youtrack import YouTrackException
+from youtrack.commands import CommandExecutor
 
 LOGGED_COMMENT_LENGTH = 10
 
 class SafeCommandExecutor(object):
-    def __init__(self, yt, logger):
+    def __init__(self, yt, logger, workers=0, retries=0):
+        """ With workers > 0 commands for different issues are applied in parallel and executeCommand
+            returns before the command is applied; join waits for all of them
+        """
         self.yt = yt
         self.logger = logger
         self.debug_mode = False
+        self.commands = CommandExecutor(yt, workers, retries)
 
     def setDebugMode(self, on):
         self.debug_mode = on
 
     def executeCommand(self, issue_id, command, comment=None, run_as=None):
         if command != '':
-            try:
-                if not self.debug_mode:
-                    self.yt.executeCommand(issue_id, command, comment=comment, run_as=run_as)
-                if comment:
-                    self.logger.logAction(issue_id, self.yt, 'added comment: \"' + comment[0:LOGGED_COMMENT_LENGTH] + '...\"', run_as)
-                else:
-                    self.logger.logAction(issue_id, self.yt, 'applied command: \"' + command + '\"', run_as)
-            except Exception, e:
-                self.logger.logError(e, issue_id, self.yt, 'failed to apply command: \"' + command + '\"', run_as)
+            if self.debug_mode:
+                self._logCommand(issue_id, command, comment, run_as, None)
+                return
+            future = self.commands.submit(issue_id, command, comment=comment, run_as=run_as)
+            future.add_done_callback(
+                lambda f: self._logCommand(issue_id, command, comment, run_as, f.exception()))
+
+    def join(self):
+        return self.commands.join()
+
+    def _logCommand(self, issue_id, command, comment, run_as, error):
+        if error is not None:
+            self.logger.logError(error, issue_id, self.yt, 'failed to apply command: \"' + command + '\"', run_as)
+        elif comment:
+            self.logger.logAction(issue_id, self.yt, 'added comment: \"' + comment[0:LOGGED_COMMENT_LENGTH] + '...\"', run_as)
+        else:
+            self.logger.logAction(issue_id, self.yt, 'applied command: \"' + command + '\"', run_as)
 
     def executeUserImport(self, user):
         if user:
@@ -46,7 +59,6 @@ class SafeCommandExecutor(object):
             return None
 
     def importLinks(self, links, permitted_issue_ids):
-        maxLinks = 100
         links_to_import = []
         for link in links:
             if link.target not in permitted_issue_ids:
@@ -57,10 +69,8 @@ class SafeCommandExecutor(object):
                 self.logger.logError(None, 'Links', self.yt, message)
             else:
                 links_to_import.append(link)
-                if len(links_to_import) == maxLinks:
-                    self._import_links_batch(links_to_import)
-                    links_to_import = []
         if len(links_to_import):
+            # importLinks splits links into batches sized to the server
             self._import_links_batch(links_to_import)
 
     def _import_links_batch(self, links_to_import):
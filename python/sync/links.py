@@ -1,4 +1,5 @@
 import copy
+from youtrack.paging import AdaptivePageSize
 
 class LinkImporter(object):
     def __init__(self, target, project_id=None, query=None):
@@ -23,15 +24,9 @@ class LinkImporter(object):
 
     def _get_all_issue_ids_set(self, yt, project_id, query):
         if not query: query = ''
-        start = 0
-        batch = 50
         result = set([])
-        while True:
-            issues = yt.getIssues(project_id, query, start, batch)
-            if not len(issues): break
-            for issue in issues:
-                result.add(issue.id)
-            start += batch
+        for issue in yt.iterIssues(project_id, query, AdaptivePageSize(initial=50)):
+            result.add(issue.id)
         return result
 
     def resetAvailableIssues(self):
@@ -50,7 +45,6 @@ class LinkImporter(object):
         self.links += links
 
     def importLinks(self, links):
-        maxLinks = 100
         links_to_import = []
         for link in links:
             if link.target not in self.created_issue_ids:
@@ -59,10 +53,8 @@ class LinkImporter(object):
                 print self.header + 'failed to import link ' + self._getPrettyLink(link) + ' to ' + self.target_name + ' because ' + link.source + ' was not imported'
             else:
                 links_to_import.append(link)
-                if len(links_to_import) == maxLinks:
-                    self._import_links_batch(links_to_import)
-                    links_to_import = []
         if len(links_to_import):
+            # importLinks splits links into batches sized to the server
             self._import_links_batch(links_to_import)
 
     def _import_links_batch(self, links_to_import):
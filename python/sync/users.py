@@ -1,3 +1,5 @@
+from __future__ import with_statement
+import threading
 import youtrack
 
 PROHIBITED = '/'
@@ -8,6 +10,14 @@ def utf8encode(source):
     return source
 
 
+def _notify_all(condition):
+    # threading.Condition of Jython 2.5 has only notifyAll, proxies of multiprocessing only notify_all
+    if hasattr(condition, 'notify_all'):
+        condition.notify_all()
+    else:
+        condition.notifyAll()
+
+
 class UserImporter(object):
     def __init__(self, source, target, caching_users=True, import_groups=True):
         self.source = source
@@ -19,6 +29,11 @@ class UserImporter(object):
         self.created_group_names = set([group.name for group in target.getGroups()])
         self.created_role_names = set([role.name for role in target.getRoles()])
         self.created_project_ids = set(target.getProjectIds())
+        # logins being imported right now, other importers wait for them instead of importing them again
+        self.pending_user_logins = set([])
+        # guards the created_* and pending sets, which may be shared by importers of several threads or
+        # processes; notified when pending imports finish
+        self.lock = threading.Condition()
 
     def addCreatedProjects(self, project_ids):
         self.created_project_ids |= set(project_ids)
@@ -33,42 +48,78 @@ class UserImporter(object):
             self.target.importUsers([filtered_user])
 
     def importUsersRecursively(self, users):
-        total_users = len(users)
-        if not total_users: return
-        user_list = list(users)
-        max_users = 100
-        start = 0
-        imported_size = 0
-        while start < total_users:
-            user_batch = user_list[start:start + max_users]
-            imported_size += self._import_user_batch_recursively(user_batch)
-            start += max_users
-        return imported_size
+        """ users are youtrack.User objects or logins of source users
+        """
+        if not len(users): return
+        # target.importUsers splits users into batches sized to the server
+        return self._import_user_batch_recursively(self._resolve_users(users))
+
+    def _resolve_users(self, users):
+        # users imported before are not requested from the source again
+        resolved = []
+        logins = []
+        for user in users:
+            if isinstance(user, basestring):
+                if not self.caching_users or user not in self.created_user_logins:
+                    logins.append(user)
+            else:
+                resolved.append(user)
+        directory = getattr(self.source, 'user_directory', None)
+        if directory is not None and len(logins) > 1:
+            directory.prefetch(self.source, logins)
+        for login in logins:
+            resolved.append(self.source.getUser(login))
+        return resolved
 
     def _import_groups_of(self, yt_user):
         user_groups = self.source.getUserGroups(yt_user.login)
         for group in user_groups:
-            if group.name not in self.created_group_names:
-                try:
-                    self.createGroup(group)
-                except Exception, ex:
-                    print utf8encode(repr(ex))
+            with self.lock:
+                if group.name not in self.created_group_names:
+                    try:
+                        self.createGroup(group)
+                    except Exception, ex:
+                        print utf8encode(repr(ex))
             print "Set " + utf8encode(yt_user.login) + " to " + utf8encode(group.name)
             self.target.setUserGroup(yt_user.login, group.name)
 
     def _import_user_batch_recursively(self, users):
-        if not len(users): return 0
-        users_to_import = []
-        for user in users:
-            filtered_user = self._filter_user(user)
-            if filtered_user: users_to_import.append(filtered_user)
-        self.target.importUsers(users_to_import)
+        users_to_import = self._claim_users(users)
+        if not len(users_to_import): return 0
+        imported = False
+        try:
+            self.target.importUsers(users_to_import)
+            imported = True
+        finally:
+            self._finish_users(users_to_import, imported)
         for yt_user in users_to_import:
             if self.import_groups:
                 self._import_groups_of(yt_user)
-            if self.caching_users: self.created_user_logins.add(yt_user.login)
         return len(users_to_import)
 
+    def _claim_users(self, users):
+        # users are created only once, an importer needing users another one is importing waits for it
+        claimed = []
+        with self.lock:
+            if self.caching_users:
+                while [user for user in users if user.login in self.pending_user_logins]:
+                    # the timeout keeps waiting safe if a notification from another process is lost
+                    self.lock.wait(1.0)
+            for user in users:
+                filtered_user = self._filter_user(user)
+                if filtered_user and filtered_user.login not in self.pending_user_logins:
+                    claimed.append(filtered_user)
+                    if self.caching_users: self.pending_user_logins.add(filtered_user.login)
+        return claimed
+
+    def _finish_users(self, users, imported):
+        if not self.caching_users: return
+        with self.lock:
+            for user in users:
+                self.pending_user_logins.discard(user.login)
+                if imported: self.created_user_logins.add(user.login)
+            _notify_all(self.lock)
+
     def _filter_user(self, user):
         if (not self.caching_users or user.login not in self.created_user_logins) and self._check_login(user.login):
             if not hasattr(user, "email"):
@@ -1,6 +1,7 @@
 from sync.executing import SafeCommandExecutor
 from sync.issues import AsymmetricIssueMerger
 from sync.links import LinkSynchronizer
+from youtrack.paging import AdaptivePageSize
 
 query_time_format = '%m-%dT%H:%M:%S'
 batch = 100
@@ -15,13 +16,15 @@ def get_advanced_query(query, _last_run, _current_run):
     return query + ' updated: ' + get_formatted_for_query(_last_run) + " .. " + get_formatted_for_query(_current_run)
 
 class YouTrackSynchronizer(object):
-    def __init__(self, master, slave, logger, issue_binder, project_id, fields_to_sync, query, last_run=None, current_run=None):
+    def __init__(self, master, slave, logger, issue_binder, project_id, fields_to_sync, query, last_run=None, current_run=None,
+                 command_workers=0):
         self.slave = None
         self.master = master
         self.slave = slave
         self.logger = logger
-        self.master_executor = SafeCommandExecutor(master, logger)
-        self.slave_executor = SafeCommandExecutor(slave, logger)
+        # command_workers > 0 applies commands to different issues in parallel, each step waits for its commands
+        self.master_executor = SafeCommandExecutor(master, logger, command_workers)
+        self.slave_executor = SafeCommandExecutor(slave, logger, command_workers)
         self.issue_binder = issue_binder
         self.query = query
         self.last_run = last_run
@@ -65,18 +68,19 @@ class YouTrackSynchronizer(object):
 
         #5. synchronize links
         self.link_synchronizer.syncCollectedLinks()
+        self._join_executors()
 
     def syncAfterImport(self):
         self._create_and_attach_sync_field(self.slave, self.project_id, master_sync_field_name)
-        start = 0
-        issues = self.slave.getIssues(self.project_id, '', start, batch)
-        while len(issues):
-            for issue in issues:
-                issue_id = issue.id
-                issue_number = issue_id.rpartition('-')[2]
-                self._mark_issues_as_sync(issue_number, issue_id, issue_id)
-            start += batch
-            issues = self.slave.getIssues(self.project_id, '', start, batch)
+        for issue in self.slave.iterIssues(self.project_id, '', AdaptivePageSize(initial=batch)):
+            issue_id = issue.id
+            issue_number = issue_id.rpartition('-')[2]
+            self._mark_issues_as_sync(issue_number, issue_id, issue_id)
+        self._join_executors()
+
+    def _join_executors(self):
+        self.master_executor.join()
+        self.slave_executor.join()
 
     def _slave_ids_set_to_sync_ids_set(self, ids):
         return set([self.issue_binder.slaveIssueIdToMasterIssueId(id) for id in ids])
@@ -99,37 +103,45 @@ class YouTrackSynchronizer(object):
 
     def _apply_to_issues(self, issues_getter, action, excluded_ids=None, log_header=''):
         if not issues_getter or not action: return
-        start = 0
+        processed = 0
         print log_header + ' started...'
-        issues = issues_getter(start, batch)
         processed_issue_ids_set = set([])
-        while len(issues):
+        page_size = AdaptivePageSize(initial=batch)
+        # actions change which issues match the queries, so every page is requested only after the actions
+        # on the previous one were applied, see _issue_pages
+        for issues in issues_getter(page_size):
             for issue in issues:
                 sync_id = str(issue.id)
                 if not (excluded_ids and sync_id in excluded_ids):
                     action(issue)
                     processed_issue_ids_set.add(sync_id)
-            print log_header + ' processed ' + str(start + len(issues)) + ' issues'
-            start += batch
-            issues = issues_getter(start, batch)
+            self._join_executors()
+            processed += len(issues)
+            print log_header + ' processed ' + str(processed) + ' issues'
+        print log_header + ' ' + page_size.report()
         print log_header + ' action applied to ' + str(len(processed_issue_ids_set)) + ' issues'
         return processed_issue_ids_set
 
-    def _get_tagged_only_in_slave(self, start, batch):
+    def _get_tagged_only_in_slave(self, page_size):
         rq = self.query + ' ' + master_sync_field_name + ':  {' + empty_field_text + '}'
-        return self.slave.getIssues(self.project_id, rq, start, batch)
+        return self._issue_pages(self.slave, rq, page_size)
 
-    def _get_tagged_in_master(self, start, batch):
+    def _get_tagged_in_master(self, page_size):
         rq = self.query
-        return self.master.getIssues(self.project_id, rq, start, batch)
+        return self._issue_pages(self.master, rq, page_size)
 
-    def _get_updated_in_slave_from_last_run(self, start, batch):
+    def _get_updated_in_slave_from_last_run(self, page_size):
         rq = get_advanced_query(self.query, self.last_run, self.current_run)
-        return self.slave.getIssues(self.project_id, rq, start, batch)
+        return self._issue_pages(self.slave, rq, page_size)
 
-    def _get_updated_in_master_from_last_run(self, start, batch):
+    def _get_updated_in_master_from_last_run(self, page_size):
         rq = get_advanced_query(self.query, self.last_run, self.current_run)
-        return self.master.getIssues(self.project_id, rq, start, batch)
+        return self._issue_pages(self.master, rq, page_size)
+
+    def _issue_pages(self, yt, rq, page_size):
+        # pages are not prefetched: a page fetched ahead would be counted from offsets the actions are
+        # still changing
+        return yt.iterIssuePages(self.project_id, rq, page_size, prefetch=0)
 
     def _mark_issues_as_sync(self, master_issue_number, master_issue_id, slave_issue_id):
         self.master_executor.executeCommand(master_issue_id, "tag " + tag)
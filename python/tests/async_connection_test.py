@@ -0,0 +1,123 @@
+import shutil
+import tempfile
+import threading
+import time
+import types
+import unittest
+from youtrack import YouTrackException
+from youtrack.async_connection import AsyncConnection, gather, set_host_limit
+from youtrack.attachment_cache import AttachmentCache
+from youtrack.commands import CommandBuffer
+from youtrack.pool import CancelledError
+
+
+class FakeResponse(dict):
+    reason = 'OK'
+
+    def __init__(self, status=200):
+        dict.__init__(self, {'content-type': 'application/xml'})
+        self.status = status
+
+
+class BlockingHttp(object):
+    # requests wait for release, issues named MISSING-* are not found
+    def __init__(self, state):
+        self.state = state
+
+    def request(self, url, method, headers=None, body=None):
+        state = self.state
+        with state.lock:
+            state.active += 1
+            state.max_active = max(state.max_active, state.active)
+        state.release.wait()
+        time.sleep(0.01)
+        with state.lock:
+            state.active -= 1
+            state.requests += 1
+        issue_id = url.rpartition('/')[2]
+        if issue_id.startswith('MISSING'):
+            return FakeResponse(404), '<error>Issue not found</error>'
+        return FakeResponse(), '<issue id="%s"/>' % issue_id
+
+
+class HttpState(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        self.active = 0
+        self.max_active = 0
+        self.requests = 0
+
+
+def fake_connection(state, url, **kwargs):
+    return AsyncConnection(url, api_key='key', transport=lambda: BlockingHttp(state), **kwargs)
+
+
+class AsyncConnectionTest(unittest.TestCase):
+
+    def test_results_reach_futures(self):
+        state = HttpState()
+        state.release.set()
+        yt = fake_connection(state, 'http://results')
+        futures = [yt.getIssue('SB-%d' % i) for i in range(5)]
+        self.assertEqual([issue.id for issue in gather(futures)], ['SB-%d' % i for i in range(5)])
+        yt.close()
+
+    def test_exceptions_reach_futures(self):
+        state = HttpState()
+        state.release.set()
+        yt = fake_connection(state, 'http://errors')
+        future = yt.getIssue('MISSING-1')
+        self.assertRaises(YouTrackException, future.result)
+        self.assertTrue(isinstance(future.exception(), YouTrackException))
+        self.assertEqual(yt.getIssue('SB-1').result().id, 'SB-1')
+        yt.close()
+
+    def test_per_host_limit(self):
+        state = HttpState()
+        state.release.set()
+        set_host_limit('http://limited', 2)
+        first = fake_connection(state, 'http://limited', max_concurrency=4)
+        second = fake_connection(state, 'http://limited', max_concurrency=4)
+        futures = []
+        for i in range(8):
+            futures.append(first.getIssue('SB-%d' % i))
+            futures.append(second.getIssue('SB-%d' % i))
+        gather(futures)
+        first.close()
+        second.close()
+        self.assertEqual(state.max_active, 2)
+        self.assertEqual(state.requests, 16)
+
+    def test_cancel_all(self):
+        state = HttpState()
+        yt = fake_connection(state, 'http://cancelled', max_concurrency=1)
+        started = yt.getIssue('SB-1')
+        while not state.active:
+            time.sleep(0.01)
+        waiting = [yt.getIssue('SB-%d' % i) for i in range(2, 6)]
+        self.assertEqual(yt.cancel_all(), 4)
+        state.release.set()
+        self.assertEqual(started.result().id, 'SB-1')
+        for future in waiting:
+            self.assertRaises(CancelledError, future.result)
+        yt.close()
+        self.assertEqual(state.requests, 1)
+
+    def test_helpers_are_not_wrapped(self):
+        state = HttpState()
+        state.release.set()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = AttachmentCache(directory)
+        yt = fake_connection(state, 'http://helpers', attachment_cache=cache)
+        self.assertTrue(yt.connection.attachment_cache is cache)
+        self.assertTrue(isinstance(yt.commandBuffer(), CommandBuffer))
+        self.assertTrue(isinstance(yt.iterIssues('SB'), types.GeneratorType))
+        self.assertTrue(isinstance(yt.stats(), dict))
+        self.assertEqual(state.requests, 0)
+        yt.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+from youtrack.attachment_cache import AttachmentCache, cache_key
+
+
+class FakeAttachment(object):
+    def __init__(self, url, created='1'):
+        self.url = url
+        self.created = created
+
+
+class AttachmentCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_put_and_get(self):
+        cache = AttachmentCache(self.directory)
+        self.assertEqual(cache.get('key'), None)
+        f, length, content_type = cache.put('key', StringIO('hello'), 'text/plain')
+        self.assertEqual((f.read(), length, content_type), ('hello', 5, 'text/plain'))
+        f, length, content_type = cache.get('key')
+        self.assertEqual((f.read(), length, content_type), ('hello', 5, 'text/plain'))
+        self.assertEqual(cache.size_of('key'), 5)
+
+    def test_same_content_is_stored_once(self):
+        cache = AttachmentCache(self.directory)
+        cache.put('a', StringIO('same'))
+        cache.put('b', StringIO('same'))
+        self.assertEqual(len(cache._blobs()), 1)
+        self.assertEqual(cache.get('b')[0].read(), 'same')
+
+    def test_least_recently_used_is_evicted(self):
+        cache = AttachmentCache(self.directory, max_bytes=10)
+        cache.put('a', StringIO('aaaa'))
+        cache.put('b', StringIO('bbbb'))
+        cache.get('a')
+        cache.put('c', StringIO('cccc'))
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a')[0].read(), 'aaaa')
+        self.assertEqual(cache.get('c')[0].read(), 'cccc')
+        self.assertEqual(AttachmentCache(self.directory)._size, 8)
+
+    def test_malformed_keys_are_misses(self):
+        cache = AttachmentCache(self.directory)
+        cache.put('key', StringIO('hello'))
+        for content in ['', 'truncated', 'a' * 64 + '\n', 'not a digest\ntext/plain']:
+            f = open(cache._key_path('key'), 'wb')
+            f.write(content)
+            f.close()
+            if content == 'a' * 64 + '\n':
+                # well formed key of a removed blob
+                self.assertEqual(cache.get('key'), None)
+            else:
+                self.assertEqual(cache._read_key('key'), None)
+                self.assertEqual(cache.get('key'), None)
+        self.assertEqual(cache.misses, 4)
+
+    def test_nothing_is_left_in_tmp(self):
+        cache = AttachmentCache(self.directory)
+        cache.put('a', StringIO('aaaa'))
+        cache.put('a', StringIO('bbbb'))
+        self.assertEqual(os.listdir(os.path.join(self.directory, 'tmp')), [])
+        self.assertEqual(cache.get('a')[0].read(), 'bbbb')
+
+    def test_larger_than_cache_is_not_stored(self):
+        cache = AttachmentCache(self.directory, max_bytes=4)
+        stream = StringIO('too large')
+        self.assertTrue(cache.put('a', stream, 'text/plain', 9)[0] is stream)
+        f, length, content_type = cache.put('b', StringIO('too large'))
+        self.assertEqual((f.read(), length), ('too large', 9))
+        self.assertEqual(cache._blobs(), [])
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache._size, 0)
+
+    def test_key_includes_created(self):
+        self.assertNotEqual(cache_key(FakeAttachment('http://a/1', '1')), cache_key(FakeAttachment('http://a/1', '2')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import threading
+import time
+import unittest
+from youtrack.attachments import AttachmentPipeline, ByteBudget
+
+
+class FakeAttachment(object):
+    def __init__(self, name, size, url='http://source/_persistent/a'):
+        self.name = name
+        self.size = size
+        self.url = url
+
+
+class Recorder(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.uploaded = []
+
+    def upload(self, issue_id, attachment):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+            self.uploaded.append((issue_id, attachment.name))
+        if attachment.name == 'broken':
+            raise IOError('broken')
+
+
+class AttachmentPipelineTest(unittest.TestCase):
+
+    def test_all_attachments_are_transferred(self):
+        recorder = Recorder()
+        pipeline = AttachmentPipeline(None, workers=4, max_per_host=4)
+        for i in range(12):
+            pipeline.put('SB-%d' % i, FakeAttachment('a%d' % i, 10), recorder.upload)
+        pipeline.close()
+        self.assertEqual(sorted(recorder.uploaded), sorted(('SB-%d' % i, 'a%d' % i) for i in range(12)))
+        self.assertEqual(recorder.max_active, 4)
+        self.assertEqual(pipeline.transferred_bytes, 120)
+
+    def test_byte_budget(self):
+        recorder = Recorder()
+        pipeline = AttachmentPipeline(None, workers=4, max_bytes=25, max_per_host=4)
+        for i in range(8):
+            pipeline.put('SB-1', FakeAttachment('a%d' % i, 10), recorder.upload)
+        pipeline.close()
+        self.assertEqual(recorder.max_active, 2)
+
+    def test_put_blocks_when_budget_is_used(self):
+        release = threading.Event()
+        queued = []
+
+        def upload(issue_id, attachment):
+            release.wait()
+
+        pipeline = AttachmentPipeline(None, workers=1, max_bytes=25)
+
+        def produce():
+            for i in range(6):
+                pipeline.put('SB-1', FakeAttachment('a%d' % i, 10), upload)
+                queued.append(i)
+        producer = threading.Thread(target=produce)
+        producer.setDaemon(True)
+        producer.start()
+        time.sleep(0.2)
+        # one attachment is uploaded, one waits for the worker
+        self.assertEqual(len(queued), 2)
+        self.assertTrue(pipeline.report().endswith('2 pending'))
+        release.set()
+        producer.join()
+        pipeline.close()
+        self.assertEqual(pipeline.report(), 'Attachments: 6 transferred (60 bytes), 0 failed, 0 pending')
+
+    def test_per_host_limit(self):
+        recorder = Recorder()
+        pipeline = AttachmentPipeline(None, workers=4, max_per_host=1)
+        for i in range(4):
+            pipeline.put('SB-1', FakeAttachment('a%d' % i, 10), recorder.upload)
+        pipeline.close()
+        self.assertEqual(recorder.max_active, 1)
+
+    def test_failures_are_reported(self):
+        recorder = Recorder()
+        reported = []
+        pipeline = AttachmentPipeline(None, progress=lambda p, issue_id, a, error: reported.append(error))
+        pipeline.put('SB-1', FakeAttachment('broken', 1), recorder.upload)
+        pipeline.put('SB-1', FakeAttachment('good', 1), recorder.upload)
+        failures = pipeline.join()
+        pipeline.close()
+        self.assertEqual([(issue_id, a.name) for issue_id, a, e in failures], [('SB-1', 'broken')])
+        self.assertEqual(pipeline.done, 1)
+        self.assertEqual(len(reported), 2)
+
+    def test_cancelled_transfers_are_skipped(self):
+        recorder = Recorder()
+        release = threading.Event()
+        pipeline = AttachmentPipeline(None, workers=1)
+        pipeline.put('SB-1', FakeAttachment('first', 1), lambda issue_id, a: release.wait())
+        cancelled = pipeline.put('SB-1', FakeAttachment('second', 1), recorder.upload)
+        self.assertTrue(cancelled.cancel())
+        release.set()
+        self.assertEqual(pipeline.join(), [])
+        pipeline.close()
+        self.assertEqual(recorder.uploaded, [])
+        self.assertEqual((pipeline.pending, pipeline._budget.used), (0, 0))
+
+    def test_oversized_attachment_does_not_block(self):
+        budget = ByteBudget(10)
+        budget.acquire(100)
+        budget.release(100)
+        self.assertEqual(budget.used, 0)
+        budget.acquire(5)
+        budget.adjust(5, 50)
+        self.assertEqual(budget.used, 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from youtrack.cache import ResponseCache, invalidated_prefixes
+from youtrack.connection import Connection
+
+
+class FakeResponse(dict):
+    status = 200
+    reason = 'OK'
+
+    def __init__(self):
+        dict.__init__(self, {'content-type': 'application/xml'})
+
+
+class CountingHttp(object):
+    def __init__(self, requests):
+        self.requests = requests
+
+    def request(self, url, method, headers=None, body=None):
+        self.requests.append((method, url.partition('/rest')[2]))
+        if '/admin/customfield/field/' in url:
+            return FakeResponse(), '<customField name="Priority" type="enum[1]" isPrivate="false"/>'
+        return FakeResponse(), '<empty/>'
+
+
+class CountingConnection(Connection):
+    def __init__(self, *args, **kwargs):
+        self.requests = []
+        Connection.__init__(self, *args, **kwargs)
+
+    def _create_http(self):
+        return CountingHttp(self.requests)
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=10)
+        for i in range(10):
+            cache.put(i, i)
+        cache.get(0)
+        cache.put(10, 10)
+        self.assertEqual(cache.get(0), 0)
+        self.assertEqual(cache.get(1), None)
+        self.assertEqual(len(cache), 10)
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl=-1)
+        cache.put('key', 'value')
+        self.assertEqual(cache.get('key'), None)
+
+    def test_invalidated_prefixes(self):
+        self.assertEqual(invalidated_prefixes('/admin/customfield/bundle/Priorities/Major'), ['/admin/customfield'])
+        self.assertEqual(invalidated_prefixes('/import/users'), ['/admin/user', '/admin/customfield'])
+        self.assertEqual(invalidated_prefixes('/issue/SB-1/execute?command=fixed'), [])
+
+    def test_connection_caches_and_invalidates(self):
+        yt = CountingConnection('http://localhost', api_key='key', cache=ResponseCache())
+        yt.getCustomField('Priority')
+        yt.getCustomField('Priority')
+        self.assertEqual(len(yt.requests), 1)
+        yt.getIssue('SB-1')
+        yt.getIssue('SB-1')
+        self.assertEqual(len(yt.requests), 3)
+        yt.addValueToEnumBundle('Priorities', 'Critical')
+        yt.getCustomField('Priority')
+        self.assertEqual(yt.requests[-1], ('GET', '/admin/customfield/field/Priority'))
+
+
+if __name__ == '__main__':
+    unittest.main()
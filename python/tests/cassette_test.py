@@ -0,0 +1,53 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import httplib2
+from youtrack.connection import Connection
+from youtrack.cassette import Cassette, CassetteMiss
+
+
+class FakeHttp(object):
+    requests = 0
+
+    def request(self, url, method, headers=None, body=None):
+        FakeHttp.requests += 1
+        if url.endswith('/user/login?login=root&password=secret'):
+            return httplib2.Response({'status': '200', 'set-cookie': 'session=1'}), '<login>ok</login>'
+        response = httplib2.Response({'status': '200', 'content-type': 'application/xml'})
+        return response, '<issue id="SB-1"><field name="summary"><value>\xc3\xbc %d</value></field></issue>' % \
+                         FakeHttp.requests
+
+
+class CassetteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test.cassette.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self):
+        cassette = Cassette(self.path)
+        yt = Connection('http://localhost', 'root', 'secret', transport=cassette.recorder(FakeHttp))
+        summaries = [yt.getIssue('SB-1').summary, yt.getIssue('SB-1').summary]
+        cassette.close()
+        return summaries
+
+    def test_replay(self):
+        recorded = self.record()
+        requests = FakeHttp.requests
+        yt = Connection('http://localhost', 'root', 'secret', transport=Cassette(self.path).player())
+        self.assertEqual([yt.getIssue('SB-1').summary, yt.getIssue('SB-1').summary], recorded)
+        self.assertEqual(FakeHttp.requests, requests)
+        self.assertRaises(CassetteMiss, yt.getIssue, 'SB-2')
+
+    def test_password_is_not_stored(self):
+        self.record()
+        self.assertEqual(gzip.open(self.path).read().find('secret'), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+from __future__ import with_statement
+import threading
+import time
+import unittest
+from youtrack import YouTrackException
+from youtrack.commands import CommandBuffer, CommandExecutor, braced
+
+
+class FakeResponse(dict):
+    status = 400
+    reason = 'Bad Request'
+
+
+class UnavailableResponse(dict):
+    status = 503
+    reason = 'Service Unavailable'
+
+
+class FakeConnection(object):
+    def __init__(self, bad=()):
+        self.bad = bad
+        self.executed = []
+
+    def executeCommand(self, issueId, command, comment=None, group=None, run_as=None, disable_notifications=False):
+        if [b for b in self.bad if b in command]:
+            raise YouTrackException('/issue/%s/execute' % issueId, FakeResponse(), '')
+        self.executed.append((issueId, command, comment, run_as))
+
+
+class CommandBufferTest(unittest.TestCase):
+
+    def test_commands_for_same_issue_are_merged(self):
+        yt = FakeConnection()
+        commands = CommandBuffer(yt)
+        commands.execute('SB-1', 'tag a')
+        commands.execute('SB-1', 'tag b', comment='text')
+        commands.execute('SB-2', 'tag c')
+        commands.execute('SB-2', 'tag d', run_as='user')
+        commands.flush()
+        self.assertEqual(yt.executed, [('SB-1', 'tag a tag b', 'text', None),
+                                       ('SB-2', 'tag c', None, None),
+                                       ('SB-2', 'tag d', None, 'user')])
+        self.assertEqual((commands.commands, commands.requests), (4, 3))
+
+    def test_one_comment_per_request(self):
+        yt = FakeConnection()
+        commands = CommandBuffer(yt)
+        commands.execute('SB-1', 'comment', comment='first')
+        commands.execute('SB-1', 'comment', comment='second')
+        commands.flush()
+        self.assertEqual([e[2] for e in yt.executed], ['first', 'second'])
+
+    def test_max_length(self):
+        yt = FakeConnection()
+        commands = CommandBuffer(yt, max_length=11)
+        for tag in 'abc':
+            commands.execute('SB-1', 'tag ' + tag)
+        commands.flush()
+        self.assertEqual([e[1] for e in yt.executed], ['tag a tag b', 'tag c'])
+
+    def test_failed_merge_is_executed_separately(self):
+        yt = FakeConnection(bad=['tag b'])
+        commands = CommandBuffer(yt)
+        for tag in 'abc':
+            commands.execute('SB-1', 'tag ' + tag)
+        self.assertRaises(YouTrackException, commands.flush)
+        self.assertEqual([e[1] for e in yt.executed], ['tag a', 'tag c'])
+        self.assertEqual([(issue_id, command) for issue_id, command, e in commands.failures], [('SB-1', 'tag b')])
+
+    def test_braced_values_are_merged(self):
+        yt = FakeConnection()
+        commands = CommandBuffer(yt)
+        commands.execute('SB-1', u'tag ' + braced(u'to do'))
+        commands.execute('SB-1', u'add Fix versions ' + braced(u'1.0 \u03b2'))
+        commands.flush()
+        self.assertEqual(yt.executed[0][1], u'tag {to do} add Fix versions {1.0 \u03b2}'.encode('utf-8'))
+        self.assertEqual(commands.failures, [])
+
+    def test_closing_brace_is_rejected(self):
+        self.assertEqual(braced(u'{draft'), u'{{draft}')
+        self.assertRaises(ValueError, braced, u'a}b')
+        self.assertEqual(braced(2), u'{2}')
+
+    def test_context_manager_flushes(self):
+        yt = FakeConnection()
+        commands = CommandBuffer(yt)
+        commands.__enter__()
+        commands.execute('SB-1', 'tag a')
+        commands.__exit__(None, None, None)
+        self.assertEqual(len(yt.executed), 1)
+
+
+class SlowConnection(object):
+    def __init__(self, unavailable=0):
+        self.unavailable = unavailable
+        self.executed = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def executeCommand(self, issueId, command, comment=None, group=None, run_as=None, disable_notifications=False):
+        with self._lock:
+            if self.unavailable:
+                self.unavailable -= 1
+                raise YouTrackException('/issue/%s/execute' % issueId, UnavailableResponse(), '')
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        with self._lock:
+            self.running -= 1
+            self.executed.append((issueId, command))
+        return 'Command executed'
+
+
+class CommandExecutorTest(unittest.TestCase):
+
+    def test_order_per_issue(self):
+        yt = SlowConnection()
+        executor = CommandExecutor(yt, workers=4)
+        for n in range(5):
+            for issue_id in ('SB-1', 'SB-2', 'SB-3'):
+                executor.submit(issue_id, 'command %d' % n)
+        self.assertEqual(executor.join(), [])
+        executor.close()
+        for issue_id in ('SB-1', 'SB-2', 'SB-3'):
+            self.assertEqual([c for i, c in yt.executed if i == issue_id], ['command %d' % n for n in range(5)])
+        self.assertTrue(1 < yt.max_running <= 3)
+        self.assertEqual(executor.done, 15)
+
+    def test_inline_execution(self):
+        yt = SlowConnection()
+        executor = CommandExecutor(yt, workers=0)
+        future = executor.submit('SB-1', 'tag a')
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), 'Command executed')
+
+    def test_retry(self):
+        yt = SlowConnection(unavailable=2)
+        executor = CommandExecutor(yt, workers=0, retries=2, retry_delay=0.001)
+        executor.submit('SB-1', 'tag a').result()
+        self.assertEqual(executor.retried, 2)
+
+    def test_commented_commands_are_not_retried(self):
+        yt = SlowConnection(unavailable=1)
+        executor = CommandExecutor(yt, workers=0, retries=2, retry_delay=0.001)
+        future = executor.submit('SB-1', 'tag a', comment='text')
+        self.assertTrue(isinstance(future.exception(), YouTrackException))
+        yt.unavailable = 1
+        executor.submit('SB-1', 'tag b', comment='text', retry=True).result()
+        yt.unavailable = 1
+        self.assertTrue(isinstance(executor.submit('SB-1', 'tag c', retry=False).exception(), YouTrackException))
+        self.assertEqual(executor.retried, 1)
+        self.assertEqual(yt.executed, [('SB-1', 'tag b')])
+
+    def test_cancelled_commands_are_skipped(self):
+        yt = SlowConnection()
+        release = threading.Event()
+        execute = yt.executeCommand
+
+        def blocked(*args):
+            release.wait()
+            return execute(*args)
+        yt.executeCommand = blocked
+        executor = CommandExecutor(yt, workers=1)
+        executor.submit('SB-1', 'tag a')
+        cancelled = executor.submit('SB-1', 'tag b')
+        self.assertTrue(cancelled.cancel())
+        release.set()
+        self.assertEqual(executor.join(), [])
+        executor.close()
+        self.assertEqual(yt.executed, [('SB-1', 'tag a')])
+
+    def test_failures_are_collected(self):
+        yt = SlowConnection(unavailable=1)
+        executor = CommandExecutor(yt, workers=2)
+        future = executor.submit('SB-1', 'tag a')
+        executor.join()
+        self.assertTrue(isinstance(future.exception(), YouTrackException))
+        self.assertEqual([(f[0], f[1]) for f in executor.failures], [('SB-1', 'tag a')])
+
+
+if __name__ == '__main__':
+    unittest.main()
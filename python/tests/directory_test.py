@@ -0,0 +1,181 @@
+import threading
+import time
+import unittest
+import urllib
+import youtrack
+from youtrack.connection import Connection
+from youtrack.directory import UserDirectory
+from sync.users import UserImporter
+
+
+class FakeResponse(dict):
+    reason = 'OK'
+
+    def __init__(self, status=200):
+        dict.__init__(self, {'content-type': 'application/xml'})
+        self.status = status
+
+
+class UsersHttp(object):
+    logins = ['root', 'alice', 'bob']
+
+    def __init__(self, requests, lock):
+        self.requests = requests
+        self.lock = lock
+
+    def request(self, url, method, headers=None, body=None):
+        path = url.partition('/rest')[2]
+        with self.lock:
+            self.requests.append((method, path))
+        if path.startswith('/admin/user/?start='):
+            start = int(path.partition('=')[2].partition('&')[0])
+            users = ''.join(['<user login="%s" url="http://localhost/rest/admin/user/%s"/>' % (login, login)
+                             for login in self.logins[start:start + 10]])
+            return FakeResponse(), '<userRefs>%s</userRefs>' % users
+        if path.startswith('/admin/user/'):
+            login = urllib.unquote(path[len('/admin/user/'):])
+            if login not in self.logins + ['guest']:
+                return FakeResponse(404), '<error>User not found</error>'
+            return FakeResponse(), '<user login="%s" fullName="%s" email="%s@localhost"/>' % (
+                login, login.capitalize(), login)
+        return FakeResponse(), '<list/>'
+
+
+class UsersConnection(Connection):
+    def __init__(self, *args, **kwargs):
+        self.requests = []
+        self.lock = threading.Lock()
+        Connection.__init__(self, *args, **kwargs)
+
+    def _create_http(self):
+        return UsersHttp(self.requests, self.lock)
+
+    def user_requests(self):
+        return [path for method, path in self.requests if path.startswith('/admin/user/')]
+
+
+class BlockingUsersConnection(UsersConnection):
+    # requests to the blocked path, by default details of alice, are sent after release is set
+    def __init__(self, *args, **kwargs):
+        self.release = threading.Event()
+        self.blocked = kwargs.pop('blocked', '/admin/user/alice')
+        UsersConnection.__init__(self, *args, **kwargs)
+
+    def _create_http(self):
+        http = UsersConnection._create_http(self)
+        request = http.request
+
+        def blocking_request(url, method, headers=None, body=None):
+            if url.endswith(self.blocked):
+                self.release.wait()
+            return request(url, method, headers, body)
+        http.request = blocking_request
+        return http
+
+
+class UserDirectoryTest(unittest.TestCase):
+
+    def test_get_user_is_requested_once(self):
+        users = UserDirectory()
+        yt = UsersConnection('http://localhost', api_key='key', user_directory=users)
+        again = UsersConnection('http://localhost', api_key='key', user_directory=users)
+        self.assertEqual(yt.getUser('alice').fullName, 'Alice')
+        self.assertTrue(again.getUser('alice') is yt.getUser('alice'))
+        self.assertEqual(yt.getUser('system_user@1').login, 'guest')
+        self.assertEqual(yt.user_requests(), ['/admin/user/alice', '/admin/user/guest'])
+        self.assertEqual(again.user_requests(), [])
+        self.assertEqual(users.hits, 2)
+
+    def test_issue_accessors_use_directory(self):
+        users = UserDirectory()
+        yt = UsersConnection('http://localhost', api_key='key', user_directory=users)
+        issue = youtrack.Issue(None, yt)
+        issue.reporterName = 'alice'
+        issue.updaterName = 'alice'
+        issue.Assignee = ['alice', 'bob']
+        issue.voterName = ['bob']
+        self.assertEqual(issue.getReporter().login, 'alice')
+        self.assertEqual(issue.getUpdater().login, 'alice')
+        self.assertEqual([u.login for u in issue.getAssignee()], ['alice', 'bob'])
+        self.assertEqual([u.login for u in issue.getVoters()], ['bob'])
+        self.assertEqual(yt.user_requests(), ['/admin/user/alice', '/admin/user/bob'])
+
+    def test_prefetch(self):
+        users = UserDirectory()
+        yt = UsersConnection('http://localhost', api_key='key', pool_size=4, user_directory=users)
+        self.assertEqual(users.prefetch(yt, ['alice', 'bob', 'alice', 'nobody']), 2)
+        self.assertEqual(users.prefetch(yt, ['alice']), 0)
+        self.assertEqual(users.prefetch(yt), 1)
+        del yt.requests[:]
+        for login in UsersHttp.logins:
+            yt.getUser(login)
+        self.assertEqual(yt.requests, [])
+        self.assertRaises(youtrack.YouTrackException, yt.getUser, 'nobody')
+        yt.close()
+
+    def test_changed_users_are_dropped(self):
+        users = UserDirectory()
+        yt = UsersConnection('http://localhost', api_key='key', user_directory=users)
+        yt.getUser('alice')
+        yt.getUser('bob')
+        yt.importUsers([{'login': 'alice', 'fullName': 'Alice', 'email': 'alice@localhost'}])
+        yt.deleteUser('bob')
+        self.assertFalse('alice' in users)
+        self.assertFalse('bob' in users)
+
+    def test_user_importer_resolves_only_new_logins(self):
+        source = UsersConnection('http://source', api_key='key', user_directory=UserDirectory())
+        target = UsersConnection('http://target', api_key='key')
+        importer = UserImporter(source, target, import_groups=False)
+        importer.importUsersRecursively(set(['alice', 'bob']))
+        importer.importUsersRecursively(set(['alice', 'bob', 'root']))
+        self.assertEqual(sorted(source.user_requests()), ['/admin/user/alice', '/admin/user/bob', '/admin/user/root'])
+        self.assertEqual(len([path for method, path in target.requests if path == '/import/users']), 2)
+
+    def test_user_importers_fetch_users_concurrently(self):
+        source = BlockingUsersConnection('http://source', api_key='key', pool_size=2, user_directory=UserDirectory())
+        target = UsersConnection('http://target', api_key='key')
+        importer = UserImporter(source, target, import_groups=False)
+        blocked = threading.Thread(target=importer.importUsersRecursively, args=(set(['alice']),))
+        blocked.setDaemon(True)
+        blocked.start()
+        # bob is imported while details of alice are still requested
+        importer.importUsersRecursively(set(['bob']))
+        self.assertTrue(blocked.isAlive())
+        source.release.set()
+        blocked.join()
+        importer.importUsersRecursively(set(['alice', 'bob']))
+        self.assertEqual(len([path for method, path in target.requests if path == '/import/users']), 2)
+        self.assertEqual(sorted(importer.created_user_logins), ['alice', 'bob'])
+
+    def test_importer_waits_for_users_imported_by_another(self):
+        source = UsersConnection('http://source', api_key='key', user_directory=UserDirectory())
+        target = BlockingUsersConnection('http://target', api_key='key', blocked='/import/users')
+        importer = UserImporter(source, target, import_groups=False)
+        first = threading.Thread(target=importer.importUsersRecursively, args=(set(['alice']),))
+        first.setDaemon(True)
+        first.start()
+        while 'alice' not in importer.pending_user_logins:
+            time.sleep(0.01)
+        self.assertFalse('alice' in importer.created_user_logins)
+        done = []
+
+        def import_again():
+            importer.importUsersRecursively(set(['alice']))
+            done.append(True)
+        second = threading.Thread(target=import_again)
+        second.setDaemon(True)
+        second.start()
+        time.sleep(0.2)
+        # alice is not on the target yet, so the second importer may not go on
+        self.assertEqual(done, [])
+        target.release.set()
+        first.join()
+        second.join()
+        self.assertEqual(done, [True])
+        self.assertEqual(sorted(importer.created_user_logins), ['alice'])
+        self.assertEqual(len([path for method, path in target.requests if path == '/import/users']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
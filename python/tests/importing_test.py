@@ -0,0 +1,146 @@
+import re
+import unittest
+import youtrack
+from youtrack import YouTrackException
+from youtrack.connection import Connection
+from youtrack.importing import import_bisecting, import_batched, BatchFailed, ImportBatchSize, \
+    FixedBatchSize
+
+
+class FakeResponse(dict):
+    status = 200
+    reason = 'OK'
+
+    def __init__(self):
+        dict.__init__(self, {'content-type': 'application/xml'})
+
+
+class ImportHttp(object):
+    """ Fails the whole batch with an empty response when it contains one of bad issues
+    """
+
+    def __init__(self, bad, requests):
+        self.bad = bad
+        self.requests = requests
+
+    def request(self, url, method, headers=None, body=None):
+        if 'timetracking' in url:
+            return FakeResponse(), '<settings enabled="false"/>'
+        numbers = re.findall(r'<field name="numberInProject">\s*<value>(\d+)</value>', body)
+        self.requests.append(numbers)
+        if [n for n in numbers if n in self.bad]:
+            return FakeResponse(), ''
+        items = ''.join(['<item id="%s" imported="%s"/>' % (n, n != '7' and 'true' or 'false') for n in numbers])
+        return FakeResponse(), '<importResult>%s</importResult>' % items
+
+
+class ImportConnection(Connection):
+    def __init__(self, bad):
+        self.bad = bad
+        self.requests = []
+        Connection.__init__(self, 'http://localhost', api_key='key')
+
+    def _create_http(self):
+        return ImportHttp(self.bad, self.requests)
+
+
+def issues(count):
+    result = []
+    for n in range(1, count + 1):
+        issue = youtrack.Issue()
+        issue.numberInProject = str(n)
+        issue.summary = 'issue %d' % n
+        issue.comments = []
+        result.append(issue)
+    return result
+
+
+class ImportIssuesTest(unittest.TestCase):
+
+    def test_whole_batch(self):
+        yt = ImportConnection(bad=[])
+        result = yt.importIssuesResult('SB', 'assignees', issues(8))
+        self.assertEqual(result.imported, ['1', '2', '3', '4', '5', '6', '8'])
+        self.assertEqual([f.id for f in result.failed], ['7'])
+        self.assertTrue('imported="false"' in result.failed[0].reason)
+        self.assertTrue('<value>7</value>' in result.failed[0].request)
+        self.assertEqual(result.requests, 1)
+
+    def test_bad_issue_is_isolated(self):
+        yt = ImportConnection(bad=['5'])
+        result = yt.importIssuesResult('SB', 'assignees', issues(16))
+        self.assertEqual(result.imported, [str(n) for n in range(1, 17) if n not in (5, 7)])
+        self.assertEqual(sorted([f.id for f in result.failed]), ['5', '7'])
+        # 1 + 2 per level of bisection
+        self.assertEqual(result.requests, 9)
+
+    def test_without_bisect(self):
+        yt = ImportConnection(bad=['3'])
+        result = yt.importIssuesResult('SB', 'assignees', issues(4), bisect=False)
+        self.assertEqual(result.imported, [])
+        self.assertEqual(len(result.failed), 4)
+        self.assertEqual(result.requests, 1)
+
+
+class ImportBisectingTest(unittest.TestCase):
+
+    def test_order_is_kept(self):
+        sent = []
+        failed = []
+
+        def send(batch):
+            if 3 in batch:
+                raise BatchFailed('bad')
+            sent.extend(batch)
+
+        import_bisecting(range(6), send, lambda record, reason: failed.append((record, reason)))
+        self.assertEqual(sent, [0, 1, 2, 4, 5])
+        self.assertEqual(failed, [(3, 'bad')])
+
+
+class ImportBatchedTest(unittest.TestCase):
+
+    def test_records_are_packed_by_count_and_bytes(self):
+        batches = []
+        import_batched([1, 1, 1, 5, 1, 1, 1, 1], lambda size: size, batches.append,
+                       FixedBatchSize(max_count=3, max_bytes=4))
+        self.assertEqual(batches, [[1, 1, 1], [5], [1, 1, 1], [1]])
+
+    def test_too_large_batch_is_split(self):
+        imported = []
+        failed = []
+
+        def send(batch):
+            if len(batch) > 2:
+                failed.append(batch)
+                raise YouTrackException('/import/users', FakeStatus(413), '')
+            imported.extend(batch)
+
+        import_batched(range(8), lambda record: 10, send, ImportBatchSize(max_count=8))
+        self.assertEqual(imported, range(8))
+        self.assertEqual(failed[:2], [range(8), range(4)])
+
+    def test_fixed_batch_size_does_not_retry(self):
+        def send(batch):
+            raise YouTrackException('/import/users', FakeStatus(503), '')
+
+        self.assertRaises(YouTrackException, import_batched, range(8), lambda record: 10, send, FixedBatchSize())
+
+    def test_slow_batches_shrink(self):
+        batch_size = ImportBatchSize(max_count=100, max_bytes=1000, target_time=5.0)
+        batch_size.succeeded(100, 1000, 20.0)
+        self.assertEqual((batch_size.max_count, batch_size.max_bytes), (50, 500))
+        batch_size.succeeded(50, 500, 1.0, full=False)
+        self.assertEqual(batch_size.max_count, 50)
+        batch_size.succeeded(50, 500, 1.0)
+        self.assertEqual(batch_size.max_count, 100)
+
+
+class FakeStatus(FakeResponse):
+    def __init__(self, status):
+        FakeResponse.__init__(self)
+        self.status = status
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from youtrack.journal import Journal, NullJournal
+
+
+def write_project(path, project):
+    # records larger than the write buffer, opening the journal again truncates nothing written by others
+    for number in range(20):
+        journal = Journal(path)
+        journal.add(project, 'links', [{'source': '%s-%d' % (project, number), 'text': 'x' * 20000}])
+        journal.mark(project, 'issues', number)
+        journal.close()
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'migration.journal')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_steps_and_values_survive_restart(self):
+        journal = Journal(self.path)
+        journal.mark('SB', 'issues', 0)
+        journal.mark('SB', 'tags', 'SB-1')
+        journal.mark('SB', 'tags', 'SB-1')
+        journal.set('SB', 'offset', 20)
+        journal.set('SB', 'offset', 40)
+        journal.add('SB', 'links', [{'typeName': 'Duplicate', 'source': 'SB-1', 'target': 'SB-2'}])
+        journal.add('SB', 'links', [{'typeName': 'Relates', 'source': 'SB-3', 'target': 'SB-1'}])
+        journal.close()
+
+        journal = Journal(self.path)
+        self.assertTrue(journal.done('SB', 'issues', 0))
+        self.assertTrue(journal.done('SB', 'issues', '0'))
+        self.assertTrue(journal.done('SB', 'tags', 'SB-1'))
+        self.assertFalse(journal.done('SB', 'tags', 'SB-2'))
+        self.assertFalse(journal.done('JT', 'tags', 'SB-1'))
+        self.assertEqual(journal.get('SB', 'offset'), 40)
+        self.assertEqual(journal.get('JT', 'offset', 0), 0)
+        self.assertEqual([l['source'] for l in journal.get('SB', 'links')], ['SB-1', 'SB-3'])
+        journal.close()
+        self.assertEqual(len(open(self.path).readlines()), 6)
+
+    def test_mark_all(self):
+        journal = Journal(self.path)
+        journal.mark('SB', 'issues', 'SB-1')
+        journal.mark_all('SB', 'issues', ['SB-1', 'SB-2', 'SB-3'])
+        journal.mark_all('SB', 'issues', [])
+        journal.close()
+
+        journal = Journal(self.path)
+        self.assertTrue(journal.done('SB', 'issues', 'SB-2'))
+        self.assertTrue(journal.done('SB', 'issues', 'SB-3'))
+        journal.close()
+        self.assertEqual(len(open(self.path).readlines()), 3)
+
+    def test_incomplete_last_line_is_ignored(self):
+        journal = Journal(self.path)
+        journal.mark('SB', 'comments', 'SB-1')
+        journal.close()
+        f = open(self.path, 'a')
+        f.write('{"p":"SB","s":"comm')
+        f.close()
+
+        journal = Journal(self.path)
+        self.assertTrue(journal.done('SB', 'comments', 'SB-1'))
+        journal.mark('SB', 'comments', 'SB-2')
+        journal.close()
+
+        journal = Journal(self.path)
+        self.assertTrue(journal.done('SB', 'comments', 'SB-2'))
+        journal.close()
+
+    def test_processes_share_journal(self):
+        projects = ['A', 'B', 'C', 'D']
+        processes = [multiprocessing.Process(target=write_project, args=(self.path, project))
+                     for project in projects]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        journal = Journal(self.path)
+        for project in projects:
+            self.assertEqual([link['source'] for link in journal.get(project, 'links')],
+                             ['%s-%d' % (project, number) for number in range(20)])
+            self.assertTrue(journal.done(project, 'issues', 19))
+        journal.close()
+
+    def test_null_journal(self):
+        journal = NullJournal()
+        journal.mark('SB', 'project')
+        journal.set('SB', 'offset', 20)
+        self.assertFalse(journal.done('SB', 'project'))
+        self.assertEqual(journal.get('SB', 'offset', 0), 0)
+        journal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import unittest
+import youtrack
+from youtrack.connection import Connection
+
+ISSUE_XML = '''<issue id="SB-1"><field name="summary"><value>hello</value></field>
+<field name="Fix versions"><value>1.0</value><value>2.0</value></field>
+<comment id="1" author="root" text="first" created="1"/><tag cssClass="c">one</tag></issue>'''
+
+ISSUE_JSON = {"id": "SB-1",
+              "field": [{"name": "summary", "value": "hello"}, {"name": "Fix versions", "value": ["1.0", "2.0"]}],
+              "comment": [{"id": "1", "author": "root", "text": "first", "created": 1}],
+              "tag": [{"value": "one", "cssClass": "c"}]}
+
+
+class FakeResponse(dict):
+    status = 200
+    reason = 'OK'
+
+
+class FakeHttp(object):
+    def request(self, url, method, headers=None, body=None):
+        response = FakeResponse()
+        if headers.get('Accept') == 'application/json':
+            response['content-type'] = 'application/json'
+            if url.endswith('/comment'):
+                return response, json.dumps(ISSUE_JSON['comment'])
+            return response, json.dumps(ISSUE_JSON)
+        response['content-type'] = 'application/xml'
+        return response, ISSUE_XML
+
+
+class FakeConnection(Connection):
+    def _create_http(self):
+        return FakeHttp()
+
+
+def dump(obj):
+    return sorted((k, v) for k, v in obj.__dict__.items() if k not in ('youtrack', 'comments'))
+
+
+class JsonFormatTest(unittest.TestCase):
+
+    def test_issue_same_as_xml(self):
+        xml_issue = FakeConnection('http://localhost', api_key='key').getIssue('SB-1')
+        json_issue = FakeConnection('http://localhost', api_key='key', use_json=True).getIssue('SB-1')
+        self.assertEqual(dump(json_issue), dump(xml_issue))
+        self.assertEqual(json_issue['Fix versions'], [u'1.0', u'2.0'])
+
+    def test_comments(self):
+        comments = FakeConnection('http://localhost', api_key='key', use_json=True).getComments('SB-1')
+        self.assertEqual([(c.id, c.author, c.text) for c in comments], [(u'1', u'root', u'first')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import BaseHTTPServer
+import threading
+import unittest
+import urllib2
+from StringIO import StringIO
+from youtrack.connection import Connection
+
+
+class UploadHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        if 'content-length' in self.headers:
+            body = self.rfile.read(int(self.headers['content-length']))
+        elif server.reject_chunked:
+            self.send_response(411)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        else:
+            body = ''
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                chunk = self.rfile.read(size)
+                self.rfile.readline()
+                if not size:
+                    break
+                body += chunk
+        server.uploads.append((self.path, self.headers.get('transfer-encoding'), body))
+        self.send_response(201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class Stream(object):
+    """ Stream of unknown length which can be read only once, like a response of the source server
+    """
+
+    def __init__(self, data):
+        self.data = StringIO(data)
+
+    def read(self, size=-1):
+        return self.data.read(size)
+
+
+class FakeContent(Stream):
+    class headers(object):
+        dict = {}
+
+    def info(self):
+        return self
+
+    type = 'text/plain'
+
+
+class FakeAttachment(object):
+    name = 'a.txt'
+    authorLogin = 'root'
+    created = '1'
+
+    def __init__(self, data):
+        self.data = data
+        self.opened = 0
+
+    def getContent(self):
+        self.opened += 1
+        return FakeContent(self.data)
+
+
+class MultipartUploadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), UploadHandler)
+        self.server.uploads = []
+        self.server.reject_chunked = False
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+        self.yt = Connection('http://127.0.0.1:%d' % self.server.server_port, api_key='key')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def upload(self, content, length=None):
+        return self.yt.importAttachment('SB-1', 'a.txt', content, 'root', 'text/plain', length, created='1')
+
+    def test_unknown_length_is_chunked(self):
+        data = 'x' * 200000
+        self.assertEqual(self.upload(StringIO(data)), 'Created a.txt')
+        path, encoding, body = self.server.uploads[0]
+        self.assertEqual(encoding, 'chunked')
+        self.assertTrue(path.startswith('/rest/import/SB-1/attachment?'))
+        self.assertTrue('filename="a.txt"' in body)
+        self.assertTrue(data in body)
+
+    def test_known_length_is_not_chunked(self):
+        self.upload(StringIO('hello'), 5)
+        path, encoding, body = self.server.uploads[0]
+        self.assertEqual(encoding, None)
+        self.assertTrue('\r\n\r\nhello\r\n' in body)
+
+    def test_spools_when_server_requires_length(self):
+        self.server.reject_chunked = True
+        self.upload(StringIO('hello'))
+        self.assertFalse(self.yt.chunked_uploads)
+        self.assertEqual(self.server.uploads[0][1], None)
+
+    def test_stream_is_chunked(self):
+        self.upload(Stream('hello'))
+        self.assertTrue(self.yt.chunked_uploads)
+        self.assertEqual(self.server.uploads[0][1], 'chunked')
+
+    def test_rejected_stream_is_requested_again(self):
+        self.server.reject_chunked = True
+        attachment = FakeAttachment('hello')
+        self.assertEqual(self.yt.createAttachmentFromAttachment('SB-1', attachment), 'Created a.txt')
+        self.assertEqual(attachment.opened, 2)
+        self.assertFalse(self.yt.chunked_uploads)
+        self.assertEqual(self.server.uploads[0][1], None)
+        self.assertTrue('\r\n\r\nhello\r\n' in self.server.uploads[0][2])
+
+    def test_rejected_stream_fails_without_reopen(self):
+        self.server.reject_chunked = True
+        self.assertRaises(urllib2.HTTPError, self.upload, Stream('hello'))
+        self.assertFalse(self.yt.chunked_uploads)
+        self.upload(Stream('again'))
+        self.assertEqual([encoding for path, encoding, body in self.server.uploads], [None])
+
+    def test_chunked_uploads_can_be_turned_off(self):
+        self.yt = Connection('http://127.0.0.1:%d' % self.server.server_port, api_key='key', chunked_uploads=False)
+        self.upload(Stream('hello'))
+        self.assertEqual(self.server.uploads[0][1], None)
+
+if __name__ == '__main__':
+    unittest.main()
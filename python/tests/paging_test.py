@@ -0,0 +1,93 @@
+import unittest
+from youtrack.connection import Connection
+from youtrack.paging import AdaptivePageSize
+from youtrack.retry import CircuitBreaker, RetryPolicy
+
+
+class FakeResponse(dict):
+    reason = 'Gateway Timeout'
+
+    def __init__(self, status):
+        dict.__init__(self, {'content-type': 'application/xml'})
+        self.status = status
+
+
+class SlowHttp(object):
+    # the server fails with 504 for pages larger than 8 issues and with the statuses in failures
+    def __init__(self, requests, failures):
+        self.requests = requests
+        self.failures = failures
+
+    def request(self, url, method, headers=None, body=None):
+        query = dict(pair.split('=') for pair in url.partition('?')[2].split('&'))
+        after, max = int(query['after']), int(query['max'])
+        self.requests.append((after, max))
+        if self.failures:
+            return FakeResponse(self.failures.pop(0)), ''
+        if max > 8:
+            return FakeResponse(504), ''
+        ids = range(after, min(after + max, 30))
+        return FakeResponse(200), '<issues>%s</issues>' % ''.join('<issue id="SB-%d"/>' % i for i in ids)
+
+
+class SlowConnection(Connection):
+    def __init__(self, *args, **kwargs):
+        self.requests = []
+        self.failures = kwargs.pop('failures', [])
+        kwargs['retry_policy'] = RetryPolicy(backoff=0, jitter=0, breaker=CircuitBreaker(reset_timeout=0))
+        Connection.__init__(self, *args, **kwargs)
+
+    def _create_http(self):
+        return SlowHttp(self.requests, self.failures)
+
+
+class AdaptivePageSizeTest(unittest.TestCase):
+
+    def test_grows_towards_target_time(self):
+        pages = AdaptivePageSize(initial=10, target_time=1.0)
+        pages.succeeded(10, 10, 0.1, 1000)
+        self.assertEqual(pages.size, 20)
+        pages.succeeded(20, 20, 0.5, 1000)
+        self.assertEqual(pages.size, 40)
+
+    def test_shrinks_towards_target_bytes(self):
+        pages = AdaptivePageSize(initial=100, target_time=10.0, target_bytes=1000)
+        pages.succeeded(100, 100, 0.1, 1500)
+        self.assertEqual(pages.size, 66)
+
+    def test_short_page_keeps_size(self):
+        pages = AdaptivePageSize(initial=10, target_time=1.0)
+        pages.succeeded(10, 3, 0.01, 10)
+        self.assertEqual(pages.size, 10)
+
+    def test_backs_off_on_server_errors(self):
+        pages = AdaptivePageSize(initial=32, minimum=4, target_time=100.0)
+        yt = SlowConnection('http://localhost', api_key='key')
+        issues = list(yt.iterIssues('SB', '', pages, prefetch=0))
+        self.assertEqual([issue.id for issue in issues], ['SB-%d' % i for i in range(30)])
+        self.assertTrue(pages.size <= 16)
+        self.assertTrue('pages failed' in pages.report())
+
+    def test_gives_up_at_minimum(self):
+        pages = AdaptivePageSize(initial=16, minimum=16)
+        yt = SlowConnection('http://localhost', api_key='key')
+        self.assertRaises(Exception, list, yt.iterIssues('SB', '', pages, prefetch=0))
+        self.assertEqual(yt.requests, [(0, 16)] * (1 + yt.retry_policy.max_attempts))
+
+    def test_retries_at_minimum(self):
+        pages = AdaptivePageSize(initial=8, minimum=8)
+        yt = SlowConnection('http://localhost', api_key='key', failures=[503, 503, 503])
+        issues = list(yt.iterIssues('SB', '', pages, prefetch=0))
+        self.assertEqual(len(issues), 30)
+        self.assertEqual(yt.requests[:4], [(0, 8)] * 4)
+
+    def test_retries_rate_limited_pages(self):
+        pages = AdaptivePageSize(initial=8, minimum=4)
+        yt = SlowConnection('http://localhost', api_key='key', failures=[429, 429])
+        issues = list(yt.iterIssues('SB', '', pages, prefetch=0))
+        self.assertEqual(len(issues), 30)
+        self.assertEqual(pages.size, 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
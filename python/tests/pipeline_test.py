@@ -0,0 +1,109 @@
+import threading
+import time
+import unittest
+from youtrack.pipeline import Pipeline, Stage
+
+
+class PipelineTest(unittest.TestCase):
+
+    def test_items_pass_all_stages(self):
+        results = []
+        lock = threading.Lock()
+
+        def split(page):
+            return page
+
+        def double(n):
+            return [n * 2]
+
+        def collect(n):
+            with lock:
+                results.append(n)
+
+        pipeline = Pipeline([Stage('split', split), Stage('double', double, workers=3),
+                             Stage('collect', collect, workers=2)])
+        try:
+            for page in [[1, 2, 3], [4, 5], [], [6]]:
+                pipeline.put(page)
+            pipeline.join()
+        finally:
+            pipeline.close()
+        self.assertEqual(sorted(results), [2, 4, 6, 8, 10, 12])
+        self.assertEqual([stage.processed for stage in pipeline.stages], [4, 6, 6])
+
+    def test_stages_overlap(self):
+        active = set([])
+        overlapped = []
+        lock = threading.Lock()
+
+        def stage(name):
+            def run(item):
+                with lock:
+                    active.add(name)
+                    if len(active) > 1:
+                        overlapped.append(item)
+                time.sleep(0.02)
+                with lock:
+                    active.discard(name)
+                return [item]
+            return run
+
+        pipeline = Pipeline([Stage('read', stage('read')), Stage('write', stage('write'))])
+        for item in range(10):
+            pipeline.put(item)
+        pipeline.join()
+        pipeline.close()
+        self.assertTrue(overlapped)
+
+    def test_queue_is_bounded(self):
+        release = threading.Event()
+        queued = []
+
+        def slow(item):
+            release.wait()
+
+        pipeline = Pipeline([Stage('slow', slow, queue_size=2)])
+
+        def produce():
+            for item in range(10):
+                pipeline.put(item)
+                queued.append(item)
+        producer = threading.Thread(target=produce)
+        producer.setDaemon(True)
+        producer.start()
+        time.sleep(0.2)
+        # one item is processed, two are waiting in the queue
+        self.assertEqual(len(queued), 3)
+        release.set()
+        producer.join()
+        pipeline.join()
+        pipeline.close()
+        self.assertEqual(pipeline.stages[0].processed, 10)
+
+    def test_failure_is_raised(self):
+        processed = []
+
+        def fail(item):
+            if item == 3:
+                raise ValueError('bad item')
+            return [item]
+
+        pipeline = Pipeline([Stage('fail', fail), Stage('collect', processed.append)])
+        try:
+            try:
+                for item in range(5):
+                    pipeline.put(item)
+                pipeline.join()
+            except ValueError:
+                pass
+            else:
+                self.fail('Failure of a stage should be raised')
+            self.assertRaises(ValueError, pipeline.put, 5)
+        finally:
+            pipeline.close()
+        # items queued after the failure are dropped
+        self.assertFalse([item for item in processed if item >= 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
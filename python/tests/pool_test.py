@@ -0,0 +1,113 @@
+import threading
+import time
+import unittest
+from youtrack.pool import WorkerPool, ObjectPool, Future, CancelledError, prefetch
+from youtrack.connection import Connection
+
+
+class FakeHttp(object):
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def request(self, url, method, headers=None, body=None):
+        with FakeHttp.lock:
+            FakeHttp.active += 1
+            FakeHttp.max_active = max(FakeHttp.max_active, FakeHttp.active)
+        time.sleep(0.05)
+        with FakeHttp.lock:
+            FakeHttp.active -= 1
+        return FakeResponse(), '<issue id="%s"/>' % url.rpartition('/')[2]
+
+
+class FakeResponse(dict):
+    status = 200
+    reason = 'OK'
+
+    def __init__(self):
+        dict.__init__(self, {'content-type': 'application/xml'})
+
+
+class FakeConnection(Connection):
+    def _create_http(self):
+        return FakeHttp()
+
+
+class WorkerPoolTest(unittest.TestCase):
+
+    def test_map_keeps_order(self):
+        pool = WorkerPool(4)
+        self.assertEqual(list(pool.map(lambda x: x * x, range(20))), [x * x for x in range(20)])
+        pool.shutdown()
+
+    def test_exception_is_propagated(self):
+        pool = WorkerPool(1)
+        future = pool.submit(int, 'not a number')
+        self.assertRaises(ValueError, future.result)
+        pool.shutdown()
+
+    def test_cancel_pending(self):
+        future = Future()
+        self.assertTrue(future.cancel())
+        self.assertRaises(CancelledError, future.result)
+        self.assertFalse(future.set_running())
+
+    def test_object_pool_is_bounded(self):
+        created = []
+        pool = ObjectPool(2, lambda: created.append(1) or object())
+        a = pool.acquire()
+        b = pool.acquire()
+        pool.release(a)
+        self.assertTrue(pool.acquire() is a)
+        self.assertEqual(len(created), 2)
+        pool.release(b)
+
+    def test_prefetch(self):
+        self.assertEqual(list(prefetch(iter(range(10)), 3)), range(10))
+
+    def test_prefetch_propagates_exception(self):
+        def items():
+            yield 1
+            raise ValueError()
+        pages = prefetch(items())
+        self.assertEqual(pages.next(), 1)
+        self.assertRaises(ValueError, pages.next)
+
+
+class PooledConnectionTest(unittest.TestCase):
+
+    def test_requests_run_concurrently(self):
+        FakeHttp.max_active = 0
+        yt = FakeConnection('http://localhost', api_key='key', pool_size=4)
+        ids = ['SB-%d' % i for i in range(12)]
+        issues = list(yt.map(yt.getIssue, ids))
+        yt.close()
+        self.assertEqual([issue.id for issue in issues], ids)
+        self.assertEqual(FakeHttp.max_active, 4)
+
+
+class PagesHttp(object):
+    def request(self, url, method, headers=None, body=None):
+        query = dict(pair.split('=') for pair in url.partition('?')[2].split('&'))
+        after, max = int(query['after']), int(query['max'])
+        ids = range(after, min(after + max, 25))
+        return FakeResponse(), '<issues>%s</issues>' % ''.join('<issue id="SB-%d"/>' % i for i in ids)
+
+
+class PagesConnection(Connection):
+    def _create_http(self):
+        return PagesHttp()
+
+
+class IterIssuesTest(unittest.TestCase):
+
+    def test_all_pages_are_fetched(self):
+        yt = PagesConnection('http://localhost', api_key='key')
+        for prefetch_pages in (0, 1, 3):
+            issues = list(yt.iterIssues('SB', '', 10, prefetch=prefetch_pages))
+            self.assertEqual([issue.id for issue in issues], ['SB-%d' % i for i in range(25)])
+        self.assertEqual([len(page) for page in yt.iterIssuePages('SB', '', 10)], [10, 10, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
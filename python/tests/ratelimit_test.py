@@ -0,0 +1,55 @@
+import time
+import unittest
+from youtrack.ratelimit import TokenBucket, RateLimiter, set_rate_limit, remove_rate_limit, get_rate_limiter
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_burst_is_free(self):
+        bucket = TokenBucket(10, burst=5)
+        self.assertEqual(sum(bucket.acquire() for _ in range(5)), 0)
+
+    def test_rate_is_kept(self):
+        bucket = TokenBucket(100, burst=1)
+        started = time.time()
+        for _ in range(11):
+            bucket.acquire()
+        self.assertTrue(time.time() - started >= 0.09)
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def test_reads_and_writes_have_separate_budgets(self):
+        limiter = RateLimiter(reads_per_second=1000, writes_per_second=1, write_burst=1)
+        limiter.acquire('POST')
+        for _ in range(10):
+            limiter.acquire('GET')
+        self.assertEqual(limiter.waited, 0)
+        self.assertTrue(limiter.writes is not None and limiter.reads is not None)
+
+    def test_limiter_is_shared_per_server(self):
+        limiter = set_rate_limit('http://localhost:8081/youtrack', 10, 2)
+        try:
+            self.assertTrue(get_rate_limiter('http://LOCALHOST:8081/youtrack/rest/issue/SB-1') is limiter)
+            self.assertEqual(get_rate_limiter('http://localhost:8082/youtrack/rest/issue/SB-1'), None)
+            self.assertEqual(get_rate_limiter('https://localhost:8081/youtrack/rest/issue/SB-1'), None)
+            self.assertEqual(get_rate_limiter('http://localhost:8081/youtrack2/rest/issue/SB-1'), None)
+        finally:
+            remove_rate_limit('http://localhost:8081/youtrack/')
+        self.assertEqual(get_rate_limiter('http://localhost:8081/youtrack/rest/issue/SB-1'), None)
+
+    def test_servers_on_one_host_are_told_apart(self):
+        root = set_rate_limit('https://yt.example.com', 10)
+        tracker = set_rate_limit('https://yt.example.com:443/tracker', 5)
+        try:
+            self.assertTrue(get_rate_limiter('https://yt.example.com/rest/issue/SB-1') is root)
+            self.assertTrue(get_rate_limiter('https://yt.example.com/tracker/rest/issue/SB-1') is tracker)
+            self.assertTrue(get_rate_limiter('https://user@yt.example.com/tracker/_persistent/a') is tracker)
+            self.assertEqual(get_rate_limiter('http://yt.example.com/rest/issue/SB-1'), None)
+        finally:
+            remove_rate_limit('https://yt.example.com')
+            remove_rate_limit('https://yt.example.com/tracker')
+
+
+if __name__ == '__main__':
+    unittest.main()
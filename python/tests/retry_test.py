@@ -0,0 +1,135 @@
+import errno
+import socket
+import time
+import unittest
+from youtrack import YouTrackException
+from youtrack.connection import Connection
+from youtrack.retry import RetryPolicy, CircuitBreaker, set_circuit_breaker, remove_circuit_breaker
+
+
+class FakeResponse(dict):
+    reason = 'Error'
+
+    def __init__(self, status, headers=None):
+        dict.__init__(self, {'content-type': 'application/xml'})
+        if headers:
+            self.update(headers)
+        self.status = status
+
+
+class ScriptedHttp(object):
+    def __init__(self, responses, requests):
+        self.responses = responses
+        self.requests = requests
+
+    def request(self, url, method, headers=None, body=None):
+        self.requests.append(method)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response, '<issue id="SB-1"/>'
+
+
+class ScriptedConnection(Connection):
+    def __init__(self, responses, url='http://localhost', **kwargs):
+        self.responses = responses
+        self.requests = []
+        Connection.__init__(self, url, api_key='key', **kwargs)
+
+    def _create_http(self):
+        return ScriptedHttp(self.responses, self.requests)
+
+
+def fast_policy(**kwargs):
+    return RetryPolicy(backoff=0.001, breaker=CircuitBreaker(failure_threshold=100), **kwargs)
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def test_backoff_grows(self):
+        policy = RetryPolicy(backoff=1.0, max_backoff=5.0, jitter=0)
+        self.assertEqual([policy.delay(a) for a in range(1, 6)], [1.0, 2.0, 4.0, 5.0, 5.0])
+
+    def test_retry_after(self):
+        policy = RetryPolicy()
+        self.assertEqual(policy.delay(1, FakeResponse(503, {'retry-after': '7'})), 7)
+
+    def test_server_errors_are_retried_for_get(self):
+        yt = ScriptedConnection([FakeResponse(503), FakeResponse(504), FakeResponse(200)], retry_policy=fast_policy())
+        self.assertEqual(yt.getIssue('SB-1').id, 'SB-1')
+        self.assertEqual(len(yt.requests), 3)
+
+    def test_post_is_not_retried(self):
+        yt = ScriptedConnection([FakeResponse(503), FakeResponse(200)], retry_policy=fast_policy())
+        self.assertRaises(YouTrackException, yt._req, 'POST', '/issue/SB-1/execute', '')
+        self.assertEqual(len(yt.requests), 1)
+
+    def test_create_issue_is_not_retried(self):
+        yt = ScriptedConnection([FakeResponse(503), FakeResponse(201)], retry_policy=fast_policy())
+        self.assertRaises(YouTrackException, yt.createIssue, 'SB', None, 'summary', 'description')
+        self.assertEqual(len(yt.requests), 1)
+        self.assertTrue(yt.retry_policy.is_idempotent('PUT', '/issue/SB-1/attachment'))
+        self.assertFalse(yt.retry_policy.is_idempotent('PUT', '/issue?project=SB'))
+
+    def test_connect_errors_are_retried_for_any_method(self):
+        yt = ScriptedConnection([socket.error(errno.ECONNREFUSED, 'Connection refused'), FakeResponse(200)],
+                                retry_policy=fast_policy())
+        yt._req('POST', '/issue/SB-1/execute', '')
+        self.assertEqual(len(yt.requests), 2)
+
+    def test_throttling_does_not_open_breaker(self):
+        policy = RetryPolicy(backoff=0.001, breaker=CircuitBreaker(failure_threshold=2))
+        yt = ScriptedConnection([FakeResponse(429)] * 4 + [FakeResponse(200)], retry_policy=policy)
+        self.assertEqual(yt.getIssue('SB-1').id, 'SB-1')
+        self.assertEqual(policy.breaker.state, 'closed')
+
+    def test_gives_up_after_max_attempts(self):
+        yt = ScriptedConnection([FakeResponse(500)] * 5, retry_policy=fast_policy(max_attempts=3))
+        self.assertRaises(YouTrackException, yt.getIssue, 'SB-1')
+        self.assertEqual(len(yt.requests), 3)
+
+    def test_auth_failure_with_api_key_is_not_retried(self):
+        yt = ScriptedConnection([FakeResponse(401), FakeResponse(200)], retry_policy=fast_policy())
+        self.assertRaises(YouTrackException, yt.getIssue, 'SB-1')
+        self.assertEqual(len(yt.requests), 1)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def test_opens_and_lets_probe_through(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'closed')
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        started = time.time()
+        breaker.before_request()
+        self.assertTrue(time.time() - started >= 0.09)
+        self.assertEqual(breaker.state, 'half-open')
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_breaker_is_shared_per_server(self):
+        first = ScriptedConnection([], 'http://breaker/youtrack')
+        second = ScriptedConnection([], 'http://breaker/youtrack/')
+        other = ScriptedConnection([], 'http://breaker/other')
+        self.assertTrue(first.circuit_breaker is second.circuit_breaker)
+        self.assertFalse(first.circuit_breaker is other.circuit_breaker)
+        own = CircuitBreaker()
+        self.assertTrue(ScriptedConnection([], 'http://breaker/youtrack',
+                                           retry_policy=RetryPolicy(breaker=own)).circuit_breaker is own)
+
+    def test_registered_breaker_is_used(self):
+        breaker = set_circuit_breaker('http://registered', CircuitBreaker(failure_threshold=1, reset_timeout=60))
+        try:
+            yt = ScriptedConnection([FakeResponse(500), FakeResponse(200)], 'http://registered',
+                                    retry_policy=RetryPolicy(max_attempts=1))
+            self.assertRaises(YouTrackException, yt.getIssue, 'SB-1')
+            self.assertEqual(breaker.state, 'open')
+            self.assertTrue(ScriptedConnection([], 'http://registered').circuit_breaker is breaker)
+        finally:
+            remove_circuit_breaker('http://registered')
+
+
+if __name__ == '__main__':
+    unittest.main()
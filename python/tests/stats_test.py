@@ -0,0 +1,68 @@
+import unittest
+from youtrack.connection import Connection
+from youtrack.stats import endpoint_template, RequestStats, LATENCY_BUCKETS
+
+
+class FakeResponse(dict):
+    reason = 'OK'
+
+    def __init__(self, status):
+        dict.__init__(self, {'content-type': 'application/xml'})
+        self.status = status
+
+
+class FakeHttp(object):
+    def request(self, url, method, headers=None, body=None):
+        if 'SB-2' in url:
+            return FakeResponse(404), '<error>Issue not found</error>'
+        return FakeResponse(200), '<issue id="SB-1"/>'
+
+
+class FakeConnection(Connection):
+    def __init__(self):
+        Connection.__init__(self, 'http://localhost', api_key='key')
+
+    def _create_http(self):
+        return FakeHttp()
+
+
+class EndpointTemplateTest(unittest.TestCase):
+
+    def test_templates(self):
+        self.assertEqual(endpoint_template('/issue/SB-1/comment'), '/issue/{id}/comment')
+        self.assertEqual(endpoint_template('/issue?filter=a'), '/issue')
+        self.assertEqual(endpoint_template('/import/SB/issues?assigneeGroup=a'), '/import/{project}/issues')
+        self.assertEqual(endpoint_template('/import/issue/SB-1/workitems'), '/import/issue/{id}/workitems')
+        self.assertEqual(endpoint_template('/admin/project/SB/customfield/Fix%20versions'),
+                         '/admin/project/{project}/customfield/{field}')
+        self.assertEqual(endpoint_template('http://localhost/rest/admin/user/root', 'http://localhost/rest'),
+                         '/admin/user/{login}')
+
+
+class RequestStatsTest(unittest.TestCase):
+
+    def test_histogram(self):
+        stats = RequestStats()
+        for elapsed in (0.001, 0.02, 0.02, 100):
+            stats.record('GET', '/issue/{id}', 200, 0, 10, elapsed)
+        s = stats.snapshot()[('GET', '/issue/{id}')]
+        self.assertEqual((s['calls'], s['bytes_in'], s['max_time']), (4, 40, 100))
+        self.assertEqual(s['histogram'], [1, 2] + [0] * (len(LATENCY_BUCKETS) - 2) + [1])
+
+    def test_connection_stats_and_hooks(self):
+        yt = FakeConnection()
+        calls = []
+        hook = yt.addRequestHook(before=lambda method, url, headers, body: calls.append(('before', method)),
+                                 after=lambda method, url, status, bytes_in, elapsed: calls.append(('after', status)))
+        yt.getIssue('SB-1')
+        self.assertRaises(Exception, yt.getIssue, 'SB-2')
+        yt.removeRequestHook(hook)
+        yt.getIssue('SB-1')
+        self.assertEqual(calls, [('before', 'GET'), ('after', 200), ('before', 'GET'), ('after', 404)])
+        s = yt.stats(reset=True)[('GET', '/issue/{id}')]
+        self.assertEqual((s['calls'], s['errors'], s['statuses']), (3, 1, {200: 2, 404: 1}))
+        self.assertEqual(yt.stats(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import gc
+import unittest
+import weakref
+import youtrack
+from youtrack import xmlparser
+from youtrack.connection import Connection
+
+
+
+def issues_xml(count):
+    return '<issues>%s</issues>' % ''.join(
+        ['<issue id="SB-%d"><field name="summary"><value>issue %d</value></field>'
+         '<field name="Fix versions"><value>1.0</value><value>2.0</value></field>'
+         '<comment id="%d" author="root" text="text" created="1"/><tag cssClass="c">tag</tag></issue>' % (i, i, i)
+         for i in range(1, count + 1)])
+
+ISSUES = issues_xml(50)
+# several times larger than the chunks the parsers read at once
+MANY_ISSUES = issues_xml(2000)
+
+LINKS = '<list>%s</list>' % ''.join(
+    ['<link typeName="Depend" source="SB-%d" target="SB-%d"/>' % (i, i + 1) for i in range(1, 51)])
+
+
+class FakeResponse(dict):
+    status = 200
+    reason = 'OK'
+
+    def __init__(self):
+        dict.__init__(self, {'content-type': 'application/xml'})
+
+
+class ListHttp(object):
+    def __init__(self, requests):
+        self.requests = requests
+
+    def request(self, url, method, headers=None, body=None):
+        path = url.partition('/rest')[2]
+        self.requests.append(path)
+        if path.startswith('/export/links'):
+            return FakeResponse(), LINKS
+        if path.startswith('/issue/byproject/MANY'):
+            return FakeResponse(), MANY_ISSUES
+        return FakeResponse(), ISSUES
+
+
+class ListConnection(Connection):
+    def __init__(self, *args, **kwargs):
+        self.requests = []
+        Connection.__init__(self, *args, **kwargs)
+
+    def _create_http(self):
+        return ListHttp(self.requests)
+
+
+def dump(obj):
+    return sorted((k, v) for k, v in obj.__dict__.items() if k != 'youtrack')
+
+
+class StreamingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.yt = ListConnection('http://localhost', api_key='key')
+
+    def tearDown(self):
+        xmlparser.set_backend('cElementTree')
+
+    def assertSameItems(self, streamed, listed):
+        streamed = [dump(item) for item in streamed]
+        self.assertEqual(streamed, [dump(item) for item in listed])
+        self.assertEqual(len(streamed), 50)
+
+    def test_stream_issues(self):
+        for backend in xmlparser.available_backends():
+            xmlparser.set_backend(backend)
+            self.assertSameItems(self.yt.streamIssues('SB', '', 0, 50), self.yt.getIssues('SB', '', 0, 50))
+        self.assertEqual(self.yt.requests[0], self.yt.requests[1])
+
+    def test_stream_all_issues(self):
+        self.assertSameItems(self.yt.streamAllIssues('project: SB', 0, 50), self.yt.getAllIssues('project: SB', 0, 50))
+        self.assertEqual(self.yt.requests[0], self.yt.requests[1])
+
+    def test_stream_issue_links(self):
+        self.assertSameItems(self.yt.streamIssueLinks(), self.yt.exportIssueLinks())
+        self.assertEqual(set(self.yt.streamIssueLinks()), set(self.yt.exportIssueLinks()))
+
+    def test_nothing_is_requested_before_iteration(self):
+        issues = self.yt.streamIssues('SB', '', 0, 50)
+        self.assertEqual(self.yt.requests, [])
+        self.assertEqual(issues.next().id, 'SB-1')
+        self.assertEqual(len(self.yt.requests), 1)
+
+    def test_elements_are_released_incrementally(self):
+        # elements of cElementTree can not be referenced weakly
+        for backend in [b for b in xmlparser.available_backends() if b != 'cElementTree']:
+            xmlparser.set_backend(backend)
+            alive = []
+            elements = []
+            for e in self.yt._streamList('/issue/byproject/MANY'):
+                elements.append(weakref.ref(getattr(e, '_el', e)))
+                youtrack.Issue(e, self.yt)
+                del e
+                if len(elements) % 100 == 0:
+                    gc.collect()
+                    alive.append(len([ref for ref in elements if ref() is not None]))
+            self.assertEqual(len(elements), 2000)
+            self.assertTrue(max(alive) < 500, backend)
+
+
+if __name__ == '__main__':
+    unittest.main()
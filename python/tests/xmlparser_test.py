@@ -0,0 +1,76 @@
+import unittest
+import youtrack
+from youtrack import xmlparser
+
+ISSUES = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<issues xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"><issue id="SB-1">
+<field name="summary"><value>\xd0\x9f\xd1\x80\xd0\xb8\xd0\xb2\xd0\xb5\xd1\x82 &amp; hello</value></field>
+<field xsi:type="CustomFieldValue" name="Fix versions"><value>1.0</value><value>2.0</value></field>
+<field xsi:type="MultiUserField" name="Assignee"><value fullName="Root">root</value></field>
+<comment id="1" author="root" text="first" created="1"/>
+<tag cssClass="c">one</tag><tag cssClass="c">two</tag>
+<field name="attachments"><value url="/_persistent/a.txt?file=1" id="1">a.txt</value></field>
+</issue><issue id="SB-2"><field name="summary"><value>second</value></field></issue></issues>'''
+
+BUNDLE = '''<enumeration name="Priorities"><value colorIndex="1" description="d">Minor</value><value>Major</value></enumeration>'''
+
+IMPORT_RESULT = '''<importResult><item id="1" imported="true"/><item id="2" imported="false"><error>bad</error></item></importResult>'''
+
+
+def dump(obj):
+    return sorted((k, v) for k, v in obj.__dict__.items() if k not in ('youtrack', 'links', 'attachments'))
+
+
+class XmlParserBackendsTest(unittest.TestCase):
+
+    def tearDown(self):
+        xmlparser.set_backend('cElementTree')
+
+    def parse_with_all_backends(self, parse):
+        results = {}
+        for backend in xmlparser.available_backends():
+            xmlparser.set_backend(backend)
+            results[backend] = parse()
+        return results
+
+    def assertSameForAllBackends(self, parse):
+        results = self.parse_with_all_backends(parse)
+        expected = results.pop('minidom')
+        for backend, result in results.items():
+            self.assertEqual(result, expected, backend)
+        return expected
+
+    def test_issues(self):
+        def parse():
+            xml = xmlparser.parseString(ISSUES)
+            return [dump(youtrack.Issue(e, None)) for e in xml.documentElement.childNodes if e.nodeType == 1]
+        issues = self.assertSameForAllBackends(parse)
+        self.assertEqual(dict(issues[0])['tags'], [u'one', u'two'])
+        self.assertEqual(dict(issues[0])['_attribute_types']['Assignee'], u'MultiUserField')
+
+    def test_stream_matches_document(self):
+        def parse():
+            return [dump(youtrack.Issue(e, None)) for e in xmlparser.iterChildElements(ISSUES)]
+        self.assertEqual(len(self.assertSameForAllBackends(parse)), 2)
+
+    def test_bundle(self):
+        def parse():
+            bundle = youtrack.EnumBundle(xmlparser.parseString(BUNDLE), None)
+            return [dump(v) for v in bundle.values]
+        self.assertSameForAllBackends(parse)
+
+    def test_import_result(self):
+        def parse():
+            items = xmlparser.parseString(IMPORT_RESULT).getElementsByTagName('item')
+            return [(i.attributes['id'].value, i.getAttribute('imported')) for i in items]
+        self.assertSameForAllBackends(parse)
+
+    def test_toxml(self):
+        def serialize():
+            return xmlparser.parseString(IMPORT_RESULT).getElementsByTagName('item')[1].toxml()
+        for backend, xml in self.parse_with_all_backends(serialize).items():
+            self.assertEqual(xml, u'<item id="2" imported="false"><error>bad</error></item>', backend)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import unittest
+from youtrack.connection import Connection
+from youtrack.xmlwriter import XmlWriter
+
+
+class FakeResponse(dict):
+    status = 200
+    reason = 'OK'
+
+    def __init__(self):
+        dict.__init__(self, {'content-type': 'application/xml'})
+
+
+class RecordingHttp(object):
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def request(self, url, method, headers=None, body=None):
+        if method == 'PUT':
+            self.bodies.append(body)
+        return FakeResponse(), '<list/>'
+
+
+class RecordingConnection(Connection):
+    def __init__(self):
+        self.bodies = []
+        Connection.__init__(self, 'http://localhost', api_key='key')
+
+    def _create_http(self):
+        return RecordingHttp(self.bodies)
+
+
+class WorkItem(object):
+    date = 1
+    duration = 5
+    description = u'<ü>'
+    worktype = None
+    authorLogin = 'root'
+
+
+class XmlWriterTest(unittest.TestCase):
+
+    def test_escaping(self):
+        writer = XmlWriter()
+        writer.write('<a')
+        writer.attribute('title', u'"ü"')
+        writer.write('>')
+        writer.text('a & b')
+        writer.element('b', 1)
+        writer.write('</a>')
+        self.assertEqual(writer.getvalue(), '<a title=\'"\xc3\xbc"\'>a &amp; b<b>1</b></a>')
+        self.assertEqual(len(writer), len(writer.getvalue()))
+
+    def test_part_between_positions(self):
+        writer = XmlWriter()
+        writer.write('<list>')
+        start = writer.tell()
+        writer.element('item', 'x')
+        end = writer.tell()
+        writer.write('</list>')
+        self.assertEqual(writer.getvalue(start, end), '<item>x</item>')
+
+    def test_import_users(self):
+        yt = RecordingConnection()
+        yt.importUsers([{'login': u'vä', 'unknown': 'x'}])
+        self.assertEqual(yt.bodies, ['<list>\n  <user login="v\xc3\xa4" />\n</list>'])
+
+    def test_import_work_items(self):
+        yt = RecordingConnection()
+        yt.importWorkItems('SB-1', [WorkItem()])
+        self.assertEqual(yt.bodies, ['<workItems><workItem><date>1</date><duration>5</duration>'
+                                     '<description>&lt;\xc3\xbc&gt;</description><author login="root"></author>'
+                                     '</workItem></workItems>'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,6 @@ YouTrack 2.0 REST API
 
 import re
 from xml.dom import Node
-from xml.dom.minidom import Document
 from xml.dom import minidom
 from xml.sax.saxutils import escape, quoteattr
 
@@ -24,6 +23,30 @@ EXISTING_FIELD_TYPES = {
 
 EXISTING_FIELDS = ['numberInProject', 'projectShortName'] + EXISTING_FIELD_TYPES.keys()
 
+def _json_text(value):
+    # XML attributes and text are always strings, keep JSON values the same
+    if isinstance(value, bool):
+        return u'true' if value else u'false'
+    if isinstance(value, str):
+        return value.decode('utf-8')
+    if not isinstance(value, unicode):
+        return unicode(value)
+    return value
+
+
+class JsonElement(object):
+    """ Gives objects decoded from JSON the getAttribute method of DOM elements
+    """
+    def __init__(self, json):
+        self.json = json
+
+    def getAttribute(self, name):
+        value = self.json.get(name)
+        if value is None:
+            return u''
+        return _json_text(value)
+
+
 class YouTrackException(Exception):
     def __init__(self, url, response, content):
         self.response = response
@@ -62,12 +85,42 @@ class YouTrackObject(object):
     def _update(self, xml):
         if xml is None:
             return
-        if isinstance(xml, Document):
+        if isinstance(xml, dict):
+            self._updateFromJson(xml)
+            return
+        if xml.nodeType == Node.DOCUMENT_NODE:
             xml = xml.documentElement
 
         self._updateFromAttrs(xml)
         self._updateFromChildren(xml)
 
+    def _updateFromJson(self, json):
+        """ Maps object decoded from JSON response: scalar members become attributes (as XML attributes do),
+            members of 'field' list become attributes as <field> elements do
+        """
+        for name, value in json.items():
+            if name == 'field' and isinstance(value, list):
+                for field in value:
+                    self._updateFromJsonField(field)
+            elif value is not None and not isinstance(value, (list, dict)):
+                setattr(self, name, _json_text(value))
+
+    def _updateFromJsonField(self, field):
+        name = field.get('name')
+        value = field.get('value')
+        if not name or value is None:
+            return
+        if isinstance(name, unicode):
+            name = name.encode('utf-8')
+        if isinstance(value, list):
+            values = [_json_text(v.get('value') if isinstance(v, dict) else v) for v in value]
+            if not len(values):
+                return
+            value = values[0] if len(values) == 1 else values
+        else:
+            value = _json_text(value)
+        setattr(self, name, value)
+
     def _updateFromAttrs(self, el):
         if el.attributes is not None:
             for i in range(el.attributes.length):
@@ -142,7 +195,17 @@ class YouTrackError(YouTrackObject):
 class Issue(YouTrackObject):
     def __init__(self, xml=None, youtrack=None):
         YouTrackObject.__init__(self, xml, youtrack)
-        if xml is not None:
+        if isinstance(xml, dict):
+            # links and attachments are requested separately, as for XML without <links> and <attachments>
+            self.links = None
+            self.attachments = None
+            self.tags = [_json_text(t['value'] if isinstance(t, dict) else t) for t in xml.get('tag', [])] or None
+            if 'comment' in xml:
+                self.comments = [Comment(c, youtrack) for c in xml['comment']]
+            for m in ['fixedVersion', 'affectsVersion']: self._normilizeMultiple(m)
+            if hasattr(self, 'fixedInBuild') and (self.fixedInBuild == 'Next build'):
+                self.fixedInBuild = None
+        elif xml is not None:
             if len(xml.getElementsByTagName('links')) > 0:
                 self.links = [Link(e, youtrack) for e in xml.getElementsByTagName('issueLink')]
             else:
@@ -251,7 +314,7 @@ class IssueChange(YouTrackObject):
     def _update(self, xml):
         if xml is None:
             return
-        if isinstance(xml, Document):
+        if xml.nodeType == Node.DOCUMENT_NODE:
             xml = xml.documentElement
 
         for field in xml.getElementsByTagName('field'):
@@ -346,7 +409,7 @@ class UserRole(YouTrackObject):
     def _update(self, xml):
         if xml is None:
             return
-        if isinstance(xml, Document):
+        if xml.nodeType == Node.DOCUMENT_NODE:
             xml = xml.documentElement
 
         self.name = xml.getAttribute("name")
@@ -408,7 +471,7 @@ class WorkItem(YouTrackObject):
     def _update(self, xml):
         if xml is None:
             return
-        if isinstance(xml, Document):
+        if xml.nodeType == Node.DOCUMENT_NODE:
             xml = xml.documentElement
 
         self.url = xml.getAttribute('url')
@@ -438,6 +501,15 @@ class ProjectCustomField(YouTrackObject):
             self[name] = value
             self.params[name] = value
 
+    def _updateFromJson(self, json):
+        YouTrackObject._updateFromJson(self, json)
+        self.params = {}
+        for param in json.get('param', []):
+            name = param.get('name')
+            value = _json_text(param.get('value'))
+            self[name] = value
+            self.params[name] = value
+
 
 class UserBundle(YouTrackObject):
     def __init__(self, xml=None, youtrack=None):
@@ -448,7 +520,12 @@ class UserBundle(YouTrackObject):
     def _update(self, xml):
         if xml is None:
             return
-        if isinstance(xml, Document):
+        if isinstance(xml, dict):
+            self.name = _json_text(xml.get('name'))
+            self.users = [_json_text(u['login']) for u in xml.get('user', [])]
+            self.groups = [_json_text(g['name']) for g in xml.get('userGroup', [])]
+            return
+        if xml.nodeType == Node.DOCUMENT_NODE:
             xml = xml.documentElement
 
         self.name = xml.getAttribute("name")
@@ -501,7 +578,11 @@ class Bundle(YouTrackObject):
     def _update(self, xml):
         if xml is None:
             return
-        if isinstance(xml, Document):
+        if isinstance(xml, dict):
+            self.name = _json_text(xml.get('name'))
+            self.values = [self._createElement(value) for value in xml.get(self._element_tag_name, [])]
+            return
+        if xml.nodeType == Node.DOCUMENT_NODE:
             xml = xml.documentElement
 
         self.name = xml.getAttribute("name")
@@ -553,10 +634,13 @@ class BundleElement(YouTrackObject):
     def _update(self, xml):
         if xml is None:
             return
-        if isinstance(xml, Document):
-            xml = xml.documentElement
-
-        self.name = [e.data for e in xml.childNodes if e.nodeType == Node.TEXT_NODE][0]
+        if isinstance(xml, dict):
+            self.name = _json_text(xml.get('value', xml.get('name')))
+            xml = JsonElement(xml)
+        else:
+            if xml.nodeType == Node.DOCUMENT_NODE:
+                xml = xml.documentElement
+            self.name = [e.data for e in xml.childNodes if e.nodeType == Node.TEXT_NODE][0]
         self.description = xml.getAttribute('description')
         self.colorIndex = xml.getAttribute('colorIndex')
         self._update_specific_attributes(xml)
@@ -661,7 +745,7 @@ class IntelliSense(YouTrackObject):
     def _update(self, xml):
         if not xml:
             return
-        if isinstance(xml, Document):
+        if xml.nodeType == Node.DOCUMENT_NODE:
             xml = xml.documentElement
         for c in xml.childNodes:
             if c.tagName in ('suggest', 'recent'):
@@ -698,7 +782,7 @@ class GlobalTimeTrackingSettings(YouTrackObject):
     def _update(self, xml):
         if not xml:
             return
-        if isinstance(xml, Document):
+        if xml.nodeType == Node.DOCUMENT_NODE:
             xml = xml.documentElement
         for e in xml.childNodes:
             self[e.tagName] = self._text(e)
@@ -708,7 +792,7 @@ class ProjectTimeTrackingSettings(YouTrackObject):
     def _update(self, xml):
         if not xml:
             return
-        if isinstance(xml, Document):
+        if xml.nodeType == Node.DOCUMENT_NODE:
             xml = xml.documentElement
         self['Enabled'] = xml.getAttribute('enabled').lower() == 'true'
         self['EstimateField'] = None
@@ -0,0 +1,106 @@
+"""
+Asynchronous YouTrack client. Mirrors youtrack.connection.Connection, but every public method sending
+requests returns youtrack.pool.Future instead of blocking. Helpers which send no requests themselves,
+like iterIssues, commandBuffer or stats, are those of the underlying connection.
+
+Example:
+    yt = AsyncConnection('http://localhost:8081', 'root', 'root', max_concurrency=16)
+    futures = [yt.getIssue(id) for id in ids]
+    issues = gather(futures)
+"""
+
+from __future__ import with_statement
+import threading
+import urlparse
+from youtrack.connection import Connection
+
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+
+def _get_host_limit(url, limit):
+    host = urlparse.urlparse(url).netloc.lower()
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(limit)
+        return _host_limits[host]
+
+
+def set_host_limit(url, limit):
+    """ Sets the maximum number of requests all AsyncConnections of this process may run
+        against url's host at once. Should be called before connections to the host are created.
+    """
+    host = urlparse.urlparse(url).netloc.lower()
+    with _host_limits_lock:
+        _host_limits[host] = threading.BoundedSemaphore(limit)
+
+
+def gather(futures):
+    """ Waits for all futures and returns their results in the same order
+    """
+    return [f.result() for f in futures]
+
+
+class AsyncConnection(object):
+    _not_mirrored = ('submit', 'map', 'close')
+    # methods of Connection returned as they are: lazy iterators, local helpers and request hooks
+    _helpers = ('iterIssues', 'iterIssuePages', 'streamIssues', 'streamAllIssues', 'streamIssueLinks',
+                'commandBuffer', 'commandExecutor', 'stats', 'addRequestHook', 'removeRequestHook', 'get_field_type')
+
+    def __init__(self, url, login=None, password=None, proxy_info=None, api_key=None, max_concurrency=8,
+                 max_per_host=None, use_json=False, cache=None, retry_policy=None, rate_limiter=None,
+                 attachment_cache=None, transport=None, user_directory=None, chunked_uploads=True):
+        """ max_concurrency is the size of the HTTP session and worker pool of this client,
+            max_per_host limits requests to the same host across all clients of the process
+        """
+        self.connection = Connection(url, login, password, proxy_info, api_key, pool_size=max_concurrency,
+                                     use_json=use_json, cache=cache, retry_policy=retry_policy,
+                                     rate_limiter=rate_limiter, attachment_cache=attachment_cache,
+                                     transport=transport, user_directory=user_directory,
+                                     chunked_uploads=chunked_uploads)
+        self._host_limit = _get_host_limit(url, max_per_host or max_concurrency)
+        self._pending = set([])
+        self._pending_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name in self._not_mirrored:
+            raise AttributeError(name)
+        method = getattr(self.connection, name)
+        if not callable(method) or name in self._helpers:
+            return method
+
+        def call_async(*args, **kwargs):
+            return self.submit(method, *args, **kwargs)
+
+        call_async.__name__ = name
+        call_async.__doc__ = method.__doc__
+        return call_async
+
+    def submit(self, fn, *args, **kwargs):
+        """ Schedules fn(*args, **kwargs) under the per-host limit and returns youtrack.pool.Future
+        """
+        future = self.connection.submit(self._call_limited, fn, args, kwargs)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def cancel_all(self):
+        """ Cancels all calls that have not started yet. Returns number of cancelled calls
+        """
+        with self._pending_lock:
+            pending = list(self._pending)
+        return len([f for f in pending if f.cancel()])
+
+    def close(self, cancel_pending=False):
+        if cancel_pending:
+            self.cancel_all()
+        self.connection.close()
+
+    def _call_limited(self, fn, args, kwargs):
+        with self._host_limit:
+            return fn(*args, **kwargs)
+
+    def _forget(self, future):
+        with self._pending_lock:
+            self._pending.discard(future)
@@ -0,0 +1,253 @@
+"""
+On-disk cache of downloaded attachments.
+
+Attachments are identified by source URL, size and creation time and stored once per content,
+under the SHA-256 of their bytes, so re-runs and attachments duplicated across issues are downloaded once.
+The least recently used contents are removed when the cache grows over max_bytes. Sizes and use order of
+the contents are kept in memory, built from the directory when the cache is opened; contents added by other
+processes sharing the directory are counted once they are used. Blobs and keys are written to temporary files
+and renamed into place, so an interrupted run never leaves a partial entry behind.
+
+Example:
+    cache = AttachmentCache('/var/cache/youtrack-attachments', max_bytes=20 * 1024 ** 3)
+    target = Connection('http://localhost:8081', 'root', 'root', attachment_cache=cache)
+"""
+
+from __future__ import with_statement
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+CHUNK_SIZE = 65536
+STALE_SECONDS = 3600
+
+
+def cache_key(attachment):
+    """ Returns key of attachment: its absolute source URL, size and created time
+    """
+    url = getattr(attachment, 'url', '') or ''
+    youtrack = getattr(attachment, 'youtrack', None)
+    if url.startswith('/') and getattr(youtrack, 'url', None):
+        url = youtrack.url + url
+    if isinstance(url, unicode):
+        url = url.encode('utf-8')
+    return '%s\n%s\n%s' % (url, getattr(attachment, 'size', ''), getattr(attachment, 'created', ''))
+
+
+class AttachmentCache(object):
+    def __init__(self, directory, max_bytes=10 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        for name in ('blobs', 'keys', 'tmp'):
+            path = os.path.join(directory, name)
+            if not os.path.isdir(path):
+                os.makedirs(path)
+        self._remove_stale_files()
+        # path of every blob -> [size, last use], the last use being a tick of _clock
+        self._index = {}
+        self._clock = 0
+        self._size = 0
+        for path, mtime in sorted(self._blobs(), key=lambda blob: blob[1]):
+            self._used(path, os.path.getsize(path))
+
+    def get(self, key):
+        """ Returns (file, length, content_type) of cached attachment or None
+        """
+        entry = self._read_key(key)
+        if entry is not None:
+            digest, content_type = entry
+            path = self._blob_path(digest)
+            try:
+                f = open(path, 'rb')
+            except (IOError, OSError):
+                pass
+            else:
+                length = os.fstat(f.fileno()).st_size
+                with self._lock:
+                    self._used(path, length)
+                self._touch(path)
+                self.hits += 1
+                return f, length, content_type
+        self.misses += 1
+        return None
+
+    def size_of(self, key):
+        entry = self._read_key(key)
+        if entry is None:
+            return None
+        try:
+            return os.path.getsize(self._blob_path(entry[0]))
+        except OSError:
+            return None
+
+    def put(self, key, stream, content_type=None, length=None):
+        """ Copies stream into the cache and returns (file, length, content_type) of the stored copy.
+            Contents larger than max_bytes are not cached: stream is returned as is if its length is known,
+            otherwise the copy is returned and removed from the cache
+        """
+        if length is not None and length > self.max_bytes:
+            return stream, length, content_type
+        fd, tmp_path = self._mkstemp()
+        digest = hashlib.sha256()
+        length = 0
+        try:
+            tmp = os.fdopen(fd, 'wb')
+            try:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    length += len(chunk)
+            finally:
+                tmp.close()
+            if length > self.max_bytes:
+                return self._open_removed(tmp_path), length, content_type
+            digest = digest.hexdigest()
+            path = self._blob_path(digest)
+            with self._lock:
+                if os.path.exists(path):
+                    # same content was already downloaded for another attachment
+                    os.remove(tmp_path)
+                    self._touch(path)
+                else:
+                    if not os.path.isdir(os.path.dirname(path)):
+                        os.makedirs(os.path.dirname(path))
+                    _replace(tmp_path, path)
+                self._used(path, length)
+                self._write_key(key, digest, content_type)
+                self._evict(path)
+        except:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return open(path, 'rb'), length, content_type
+
+    def _used(self, path, size):
+        # called with _lock held, registers blobs written by other processes too
+        entry = self._index.get(path)
+        if entry is None:
+            self._index[path] = entry = [size, 0]
+            self._size += size
+        self._clock += 1
+        entry[1] = self._clock
+
+    def _touch(self, path):
+        # the modification time of a blob orders it when the cache is opened again
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _mkstemp(self):
+        return tempfile.mkstemp(dir=os.path.join(self.directory, 'tmp'))
+
+    def _open_removed(self, path):
+        f = open(path, 'rb')
+        try:
+            os.remove(path)
+        except OSError:
+            # open files can not be removed on Windows, the file is removed when the cache is opened again
+            pass
+        return f
+
+    def _remove_stale_files(self):
+        # left by runs interrupted while writing, files other processes are writing right now are recent
+        tmp = os.path.join(self.directory, 'tmp')
+        for name in os.listdir(tmp):
+            path = os.path.join(tmp, name)
+            try:
+                if os.path.getmtime(path) < time.time() - STALE_SECONDS:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _key_path(self, key):
+        if isinstance(key, unicode):
+            key = key.encode('utf-8')
+        return os.path.join(self.directory, 'keys', hashlib.sha256(key).hexdigest())
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, 'blobs', digest[:2], digest)
+
+    def _read_key(self, key):
+        # unreadable and malformed keys are misses
+        try:
+            f = open(self._key_path(key), 'rb')
+            try:
+                lines = f.read().split('\n')
+            finally:
+                f.close()
+        except (IOError, OSError):
+            return None
+        if len(lines) != 2 or not _is_digest(lines[0]):
+            return None
+        return lines[0], lines[1] or None
+
+    def _write_key(self, key, digest, content_type):
+        fd, tmp_path = self._mkstemp()
+        try:
+            f = os.fdopen(fd, 'wb')
+            try:
+                f.write('%s\n%s' % (digest, content_type or ''))
+            finally:
+                f.close()
+            _replace(tmp_path, self._key_path(key))
+        except:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _blobs(self):
+        result = []
+        blobs = os.path.join(self.directory, 'blobs')
+        for prefix in os.listdir(blobs):
+            for name in os.listdir(os.path.join(blobs, prefix)):
+                path = os.path.join(blobs, prefix, name)
+                result.append((path, os.path.getmtime(path)))
+        return result
+
+    def _evict(self, keep):
+        # keys of removed blobs are left behind and treated as misses
+        if self._size <= self.max_bytes:
+            return
+        blobs = sorted(self._index.items(), key=lambda blob: blob[1][1])
+        for path, (size, used) in blobs:
+            if self._size <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                if os.path.exists(path):
+                    continue
+            del self._index[path]
+            self._size -= size
+
+
+def _is_digest(digest):
+    if len(digest) != 64:
+        return False
+    try:
+        int(digest, 16)
+    except ValueError:
+        return False
+    return True
+
+
+def _replace(source, destination):
+    # os.rename does not replace existing files on Windows
+    try:
+        os.rename(source, destination)
+    except OSError:
+        if not os.path.exists(destination):
+            raise
+        os.remove(destination)
+        os.rename(source, destination)
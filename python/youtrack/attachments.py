@@ -0,0 +1,201 @@
+"""
+Pipeline transferring attachments from a source tracker to YouTrack on a pool of worker threads.
+
+Example:
+    pipeline = AttachmentPipeline(target, workers=8, max_bytes=512 * 1024 * 1024, max_per_host=4)
+    for a in issue.getAttachments():
+        pipeline.put(issue.id, a)
+    pipeline.join()
+    print pipeline.report()
+"""
+
+from __future__ import with_statement
+import threading
+import urlparse
+from youtrack.pool import WorkerPool, CancelledError
+from youtrack.attachment_cache import cache_key
+
+
+class ByteBudget(object):
+    """ Limits the total size of attachments in flight. An attachment larger than the whole budget
+        is let through alone, so that it cannot block the pipeline.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size):
+        with self._condition:
+            while self.used and self.used + size > self.limit:
+                self._condition.wait()
+            self.used += size
+
+    def release(self, size):
+        with self._condition:
+            self.used -= size
+            self._condition.notifyAll()
+
+    def adjust(self, acquired, size):
+        """ Replaces acquired bytes with size without waiting, used when the real size becomes known
+        """
+        with self._condition:
+            self.used += size - acquired
+            if size < acquired:
+                self._condition.notifyAll()
+
+
+class _OpenedAttachment(object):
+    # attachment which content was already requested to learn its size
+    def __init__(self, attachment, content):
+        self._attachment = attachment
+        self._content = content
+
+    def getContent(self):
+        return self._content
+
+    def __getattr__(self, name):
+        return getattr(self._attachment, name)
+
+
+class AttachmentPipeline(object):
+    """ Downloads and uploads attachments concurrently.
+
+        put enqueues (issue_id, attachment) pairs; upload(issue_id, attachment) is called for each of them on
+        a worker thread, by default target.createAttachmentFromAttachment. At most max_bytes of attachments
+        are queued or in flight, put blocks while the budget is used up, and at most max_per_host transfers
+        read from the same source host at once. Sizes are taken from size argument of put, from attachment
+        size attribute or from Content-Length of attachment.getContent(); default_size is reserved until
+        the size is known and assumed when none of them is known.
+    """
+
+    def __init__(self, target, workers=4, max_bytes=256 * 1024 * 1024, max_per_host=2, default_size=1024 * 1024,
+                 progress=None):
+        self.target = target
+        self.default_size = default_size
+        self.max_per_host = max_per_host
+        self.progress = progress
+        self.done = 0
+        self.failed = 0
+        self.pending = 0
+        self.transferred_bytes = 0
+        self.failures = []
+        self._budget = ByteBudget(max_bytes)
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._futures = []
+        self._workers = WorkerPool(workers, name='youtrack-attachments')
+
+    def put(self, issue_id, attachment, upload=None, size=None):
+        """ Schedules transfer of attachment to issue_id and returns youtrack.pool.Future of upload result
+        """
+        if upload is None:
+            upload = self.target.createAttachmentFromAttachment
+        size = self._size(attachment, size)
+        reserved = size
+        if reserved is None:
+            reserved = self.default_size
+        self._budget.acquire(reserved)
+        with self._lock:
+            self.pending += 1
+        try:
+            future = self._workers.submit(self._transfer, issue_id, attachment, upload, size, reserved)
+        except Exception:
+            self._finished(reserved)
+            raise
+
+        def release_cancelled(f):
+            # a cancelled transfer never runs, so its reservation is returned here
+            if f.cancelled():
+                self._finished(reserved)
+        future.add_done_callback(release_cancelled)
+        with self._lock:
+            self._futures.append(future)
+        return future
+
+    def join(self):
+        """ Waits until all scheduled attachments are transferred. Returns list of failures,
+            (issue_id, attachment, exception) tuples
+        """
+        while True:
+            with self._lock:
+                futures, self._futures = self._futures, []
+            if not futures:
+                return self.failures
+            for f in futures:
+                try:
+                    f.exception()
+                except CancelledError:
+                    # cancelled attachments were not transferred
+                    pass
+
+    def close(self):
+        self.join()
+        self._workers.shutdown()
+
+    def report(self):
+        return 'Attachments: %d transferred (%d bytes), %d failed, %d pending' % (
+            self.done, self.transferred_bytes, self.failed, self.pending)
+
+    def _host_limit(self, attachment):
+        youtrack = getattr(attachment, 'youtrack', None)
+        url = getattr(youtrack, 'url', None) or getattr(attachment, 'url', None) or ''
+        host = urlparse.urlparse(url)[1].lower()
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._hosts[host]
+
+    def _size(self, attachment, size):
+        if size is None:
+            size = getattr(attachment, 'size', None)
+        cache = getattr(self.target, 'attachment_cache', None)
+        if size is None and cache is not None:
+            # a cached attachment is not downloaded again, so its content should not be requested here
+            size = cache.size_of(cache_key(attachment))
+        try:
+            return int(size)
+        except (TypeError, ValueError):
+            return None
+
+    def _transfer(self, issue_id, attachment, upload, size, reserved):
+        try:
+            with self._host_limit(attachment):
+                try:
+                    if size is None and hasattr(attachment, 'getContent'):
+                        content = attachment.getContent()
+                        info = getattr(content, 'info', None)
+                        if info is not None and info().getheader('content-length'):
+                            size = int(info().getheader('content-length'))
+                        attachment = _OpenedAttachment(attachment, content)
+                    if size is None:
+                        size = self.default_size
+                    self._budget.adjust(reserved, size)
+                    reserved = size
+                    result = upload(issue_id, attachment)
+                except Exception, e:
+                    with self._lock:
+                        self.failed += 1
+                        self.failures.append((issue_id, attachment, e))
+                    self._notify(issue_id, attachment, e)
+                    raise
+            with self._lock:
+                self.done += 1
+                self.transferred_bytes += size
+        finally:
+            self._finished(reserved)
+        self._notify(issue_id, attachment, None)
+        return result
+
+    def _finished(self, reserved):
+        self._budget.release(reserved)
+        with self._lock:
+            self.pending -= 1
+
+    def _notify(self, issue_id, attachment, error):
+        if self.progress is not None:
+            try:
+                self.progress(self, issue_id, attachment, error)
+            except Exception:
+                pass
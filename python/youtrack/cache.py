@@ -0,0 +1,106 @@
+"""
+Cache of admin and metadata GET responses (custom fields, bundles, users, projects, time tracking settings).
+
+Connection stores raw responses, so every call still returns fresh objects. Entries are dropped when
+the same Connection changes the corresponding resources, see invalidated_prefixes.
+
+Example:
+    yt = Connection('http://localhost:8081', 'root', 'root', cache=ResponseCache(max_entries=5000, ttl=600))
+"""
+
+from __future__ import with_statement
+import threading
+import time
+import urlparse
+
+# only responses of these resources are cached
+cached_prefixes = ('/admin/', '/project/all')
+
+
+def is_cacheable(url):
+    path = urlparse.urlparse(url)[2]
+    for prefix in cached_prefixes:
+        if path.startswith(prefix):
+            return True
+    return False
+
+
+def invalidated_prefixes(url):
+    """ Returns prefixes of cached urls that may be stale after a modifying request to url
+    """
+    segments = urlparse.urlparse(url)[2].split('/')
+    if len(segments) > 2 and segments[1] == 'admin':
+        prefixes = ['/admin/' + segments[2]]
+        if segments[2] == 'project':
+            prefixes.append('/project/all')
+        return prefixes
+    if len(segments) > 1 and segments[1] == 'import':
+        # imports create missing users and add values to auto attached bundles
+        return ['/admin/user', '/admin/customfield']
+    return []
+
+
+class ResponseCache(object):
+    """ Thread safe size bounded LRU cache, entries expire ttl seconds after they were stored
+    """
+
+    def __init__(self, max_entries=1000, ttl=300):
+        if max_entries < 1:
+            raise ValueError('Cache should hold at least one entry')
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._tick += 1
+            entry[2] = self._tick
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._evict()
+            self._tick += 1
+            self._entries[key] = [value, time.time() + self.ttl, self._tick]
+
+    def invalidate(self, base_url, prefixes):
+        """ Removes entries of base_url which paths start with one of prefixes
+        """
+        with self._lock:
+            for key in self._entries.keys():
+                url = key[0]
+                for prefix in prefixes:
+                    if url.startswith(base_url + prefix):
+                        del self._entries[key]
+                        break
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        # drops least recently used tenth of the entries, so that eviction does not run on every put
+        now = time.time()
+        for key, entry in self._entries.items():
+            if entry[1] < now:
+                del self._entries[key]
+        excess = len(self._entries) - self.max_entries + max(1, self.max_entries // 10)
+        if excess > 0:
+            entries = sorted(self._entries.items(), key=lambda item: item[1][2])
+            for key, entry in entries[:excess]:
+                del self._entries[key]
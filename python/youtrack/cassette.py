@@ -0,0 +1,194 @@
+"""
+Record and replay of HTTP traffic of Connections, for offline benchmarks and tests.
+
+In record mode request/response pairs pass through to the server and are appended to a gzipped cassette file,
+one JSON line per request. In replay mode responses are served from the cassette, optionally after a delay,
+without network access. Requests are matched by method, URL and SHA-1 of the body; repeated requests are
+answered in the recorded order. Passwords in login URLs are not stored.
+
+Attachment uploads and downloads do not go through the transport and are neither recorded nor replayed.
+
+Example:
+    use_cassette('migration.cassette.gz', 'record')
+    youtrack2youtrack(...)
+    use_cassette('migration.cassette.gz', 'replay', latency=0.005)
+    youtrack2youtrack(...)
+
+A single Connection can be given a transport too:
+    yt = Connection('http://localhost:8081', 'root', 'root', transport=Cassette(path).player())
+"""
+
+from __future__ import with_statement
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+import httplib2
+
+_transport = None
+_transport_lock = threading.Lock()
+
+_PASSWORD = re.compile(r'(password=)[^&]*')
+
+
+class CassetteMiss(Exception):
+    """ Raised in replay mode for a request that was not recorded
+    """
+
+
+def _key(method, url, body):
+    if isinstance(url, unicode):
+        url = url.encode('utf-8')
+    if isinstance(body, unicode):
+        body = body.encode('utf-8')
+    return method, _PASSWORD.sub(r'\1***', url), hashlib.sha1(body or '').hexdigest()
+
+
+def default_http():
+    return httplib2.Http(disable_ssl_certificate_validation=True)
+
+
+class Cassette(object):
+    def __init__(self, path):
+        self.path = path
+        self._interactions = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._file = None
+
+    def recorder(self, http_factory=default_http):
+        """ Returns transport factory sending requests with http_factory() objects and appending them to the file
+        """
+        cassette = self
+
+        def create():
+            return _RecordingHttp(cassette, http_factory())
+        return create
+
+    def player(self, latency=0.0, recorded_latency=False):
+        """ Returns transport factory answering requests from the file. Every response is delayed by latency
+            seconds, plus the recorded response time if recorded_latency is True
+        """
+        self.load()
+        cassette = self
+
+        def create():
+            return _ReplayingHttp(cassette, latency, recorded_latency)
+        return create
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.path):
+                return
+            f = gzip.open(self.path, 'rb')
+            try:
+                try:
+                    for line in f:
+                        if line.endswith('\n'):
+                            record = json.loads(line)
+                            key = (record['m'], record['u'].encode('utf-8'), record['b'])
+                            self._interactions.setdefault(key, []).append(record)
+                except (IOError, EOFError, struct.error):
+                    # recording was interrupted before the cassette was closed, the complete lines are used
+                    pass
+            finally:
+                f.close()
+
+    def append(self, key, response, content, elapsed):
+        method, url, body_hash = key
+        headers = dict([(k, v) for k, v in response.items() if k != 'status'])
+        record = {'m': method, 'u': url, 'b': body_hash, 's': response.status, 'r': response.reason,
+                  'h': headers, 'c': content.decode('latin-1'), 't': round(elapsed, 4)}
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is None:
+                # appending starts a new gzip member, earlier recordings are kept
+                self._file = gzip.open(self.path, 'ab')
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def take(self, key):
+        with self._lock:
+            records = self._interactions.get(key)
+            if not records:
+                raise CassetteMiss('%s %s is not in %s' % (key[0], key[1], self.path))
+            if len(records) > 1:
+                return records.pop(0)
+            # the last recorded response answers all further repetitions
+            return records[0]
+
+
+class _RecordingHttp(object):
+    def __init__(self, cassette, http):
+        self._cassette = cassette
+        self._http = http
+
+    def request(self, url, method, headers=None, body=None):
+        started = time.time()
+        response, content = self._http.request(url, method, headers=headers, body=body)
+        self._cassette.append(_key(method, url, body), response, content, time.time() - started)
+        return response, content
+
+
+class _ReplayingHttp(object):
+    def __init__(self, cassette, latency, recorded_latency):
+        self._cassette = cassette
+        self._latency = latency
+        self._recorded_latency = recorded_latency
+
+    def request(self, url, method, headers=None, body=None):
+        record = self._cassette.take(_key(method, url, body))
+        delay = self._latency
+        if self._recorded_latency:
+            delay += record['t']
+        if delay > 0:
+            time.sleep(delay)
+        info = dict([(k.encode('utf-8'), v.encode('utf-8')) for k, v in record['h'].items()])
+        info['status'] = str(record['s'])
+        response = httplib2.Response(info)
+        response.reason = record['r']
+        return response, record['c'].encode('latin-1')
+
+
+def use_cassette(path, mode, latency=0.0, recorded_latency=False):
+    """ Makes Connections created afterwards without their own transport record to or replay from path.
+        mode is 'record' or 'replay'. Returns the Cassette
+    """
+    global _transport
+    cassette = Cassette(path)
+    if mode == 'record':
+        transport = cassette.recorder()
+        atexit.register(cassette.close)
+    elif mode == 'replay':
+        transport = cassette.player(latency, recorded_latency)
+    else:
+        raise ValueError('Cassette mode should be record or replay')
+    with _transport_lock:
+        _transport = transport
+    return cassette
+
+
+def eject_cassette():
+    global _transport
+    with _transport_lock:
+        _transport = None
+
+
+def get_transport():
+    """ Returns transport factory installed by use_cassette or None
+    """
+    with _transport_lock:
+        return _transport
@@ -0,0 +1,271 @@
+"""
+Buffer merging consecutive commands for the same issue into one /execute request and executor running
+commands for many issues in parallel.
+
+Example:
+    commands = yt.commandBuffer()
+    for tag in tags:
+        commands.execute('SB-1', 'tag ' + braced(tag))
+    commands.execute('SB-2', 'Priority Major')   # sends the tags of SB-1 in one request
+    commands.flush()
+"""
+
+from __future__ import with_statement
+import httplib
+import socket
+import sys
+import threading
+import time
+from youtrack import YouTrackException
+from youtrack.pool import WorkerPool, Future, CancelledError
+
+
+def braced(value):
+    """ Returns value in braces, so that a command with it can be joined with other commands.
+        Raises ValueError if value contains a closing brace, which can not be escaped in commands
+    """
+    value = u'%s' % value
+    if u'}' in value:
+        raise ValueError('Value with a closing brace can not be braced: %r' % value)
+    return u'{%s}' % value
+
+
+def _utf8(command):
+    if isinstance(command, unicode):
+        return command.encode('utf-8')
+    return command
+
+
+class _PendingCommand(object):
+    def __init__(self, issue_id, command, comment, group, run_as, disable_notifications):
+        self.issue_id = issue_id
+        self.commands = [command]
+        self.comment = comment
+        self.group = group
+        self.run_as = run_as
+        self.disable_notifications = disable_notifications
+        self.length = len(command)
+
+    def accepts(self, issue_id, comment, group, run_as, disable_notifications):
+        # a request carries one comment, so only commands without comment join a commented one
+        return issue_id == self.issue_id and run_as == self.run_as and group == self.group and \
+               disable_notifications == self.disable_notifications and (comment is None or self.comment is None)
+
+
+class CommandBuffer(object):
+    """ Collects commands and executes them with connection.executeCommand. Consecutive commands for the same
+        issue, run_as user, group and notification flag are joined with spaces into one command (at most
+        max_length characters), so each of them should be unambiguous on its own, e.g. values with spaces
+        in braces. At most one comment is sent with the joined command.
+
+        Pending commands are sent when a command for another issue or user arrives, on flush and when
+        the buffer is used as a context manager, on exit. If a joined command fails, its commands
+        are executed one by one and the first YouTrackException is raised after all of them were tried.
+        Commands the server rejected are collected in failures as (issue_id, command, exception) tuples.
+    """
+
+    def __init__(self, connection, max_length=1000):
+        self.connection = connection
+        self.max_length = max_length
+        self.requests = 0
+        self.commands = 0
+        self.failures = []
+        self._pending = None
+        self._lock = threading.RLock()
+
+    def execute(self, issueId, command, comment=None, group=None, run_as=None, disable_notifications=False):
+        with self._lock:
+            self.commands += 1
+            pending = self._pending
+            if pending is not None and pending.accepts(issueId, comment, group, run_as, disable_notifications) \
+                    and pending.length + 1 + len(command) <= self.max_length:
+                pending.commands.append(command)
+                pending.length += 1 + len(command)
+                if comment is not None:
+                    pending.comment = comment
+                return
+            self.flush()
+            self._pending = _PendingCommand(issueId, command, comment, group, run_as, disable_notifications)
+
+    def flush(self):
+        """ Executes pending commands
+        """
+        with self._lock:
+            pending, self._pending = self._pending, None
+            if pending is None:
+                return
+            try:
+                self._execute(pending, ' '.join([_utf8(c) for c in pending.commands]), pending.comment)
+            except YouTrackException, e:
+                if len(pending.commands) == 1:
+                    self.failures.append((pending.issue_id, pending.commands[0], e))
+                    raise
+                self._execute_separately(pending)
+
+    def _execute(self, pending, command, comment):
+        self.requests += 1
+        self.connection.executeCommand(pending.issue_id, _utf8(command), comment, pending.group, pending.run_as,
+                                       pending.disable_notifications)
+
+    def _execute_separately(self, pending):
+        error = None
+        comment = pending.comment
+        for command in pending.commands:
+            try:
+                self._execute(pending, command, comment)
+                comment = None
+            except YouTrackException, e:
+                self.failures.append((pending.issue_id, command, e))
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.flush()
+        else:
+            # commands issued before the failure are still sent, but the original error is raised
+            try:
+                self.flush()
+            except Exception:
+                pass
+        return False
+
+
+class CommandExecutor(object):
+    """ Executes commands on a pool of worker threads. Commands for different issues run in parallel,
+        commands for the same issue are executed one after another in the order they were submitted.
+        With workers=0 commands are executed right away in the calling thread.
+
+        A command failing with a 5xx or 409 response or a network error is tried again up to retries times,
+        after retry_delay seconds doubled for every attempt. Such a command may have been applied before it
+        failed, so commands with a comment, which would be added twice, are not tried again unless submitted
+        with retry=True; retry=False turns retrying off for any command. Failures are collected in failures as
+        (issue_id, command, exception) tuples; progress(executor, issue_id, command, error) is called
+        after every command.
+
+        Example:
+            executor = yt.commandExecutor(workers=8, retries=2)
+            for issue_id in issue_ids:
+                executor.submit(issue_id, 'tag migrated')
+            executor.join()
+            print executor.report()
+    """
+    retried_statuses = (409, 500, 502, 503, 504)
+
+    def __init__(self, connection, workers=4, retries=0, retry_delay=1.0, progress=None):
+        self.connection = connection
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.progress = progress
+        self.done = 0
+        self.failed = 0
+        self.retried = 0
+        self.failures = []
+        self._lock = threading.Lock()
+        self._issues = {}
+        self._futures = []
+        self._workers = None
+        if workers:
+            self._workers = WorkerPool(workers, name='youtrack-commands')
+
+    def submit(self, issueId, command, comment=None, group=None, run_as=None, disable_notifications=False,
+               retry=None):
+        """ Schedules command and returns youtrack.pool.Future of its result
+        """
+        if retry is None:
+            retry = comment is None
+        future = Future()
+        item = (future, issueId, (command, comment, group, run_as, disable_notifications), retry)
+        if self._workers is None:
+            self._run(item)
+            return future
+        with self._lock:
+            self._futures.append(future)
+            if issueId in self._issues:
+                # a worker is busy with this issue and takes the command after the previous ones
+                self._issues[issueId].append(item)
+                return future
+            self._issues[issueId] = [item]
+        self._workers.submit(self._drain, issueId)
+        return future
+
+    def join(self):
+        """ Waits until all submitted commands are executed. Returns list of failures
+        """
+        while True:
+            with self._lock:
+                futures, self._futures = self._futures, []
+            if not futures:
+                return self.failures
+            for f in futures:
+                try:
+                    f.exception()
+                except CancelledError:
+                    # cancelled commands were not executed
+                    pass
+
+    def close(self):
+        self.join()
+        if self._workers is not None:
+            self._workers.shutdown()
+
+    def report(self):
+        return 'Commands: %d executed, %d failed, %d retries' % (self.done, self.failed, self.retried)
+
+    def _drain(self, issue_id):
+        while True:
+            with self._lock:
+                items = self._issues[issue_id]
+                if not items:
+                    del self._issues[issue_id]
+                    return
+                item = items.pop(0)
+            self._run(item)
+
+    def _run(self, item):
+        future, issue_id, args, retry = item
+        if not future.set_running():
+            return
+        try:
+            result = self._execute(issue_id, args, retry)
+        except Exception, e:
+            with self._lock:
+                self.failed += 1
+                self.failures.append((issue_id, args[0], e))
+            future.set_exception(sys.exc_info())
+            self._notify(issue_id, args[0], e)
+        else:
+            with self._lock:
+                self.done += 1
+            future.set_result(result)
+            self._notify(issue_id, args[0], None)
+
+    def _execute(self, issue_id, args, retry):
+        attempt = 0
+        while True:
+            try:
+                return self.connection.executeCommand(issue_id, *args)
+            except Exception, e:
+                if not retry or attempt >= self.retries or not self._should_retry(e):
+                    raise
+            attempt += 1
+            with self._lock:
+                self.retried += 1
+            time.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    def _should_retry(self, e):
+        if isinstance(e, YouTrackException):
+            return getattr(e.response, 'status', None) in self.retried_statuses
+        return isinstance(e, (socket.error, httplib.HTTPException))
+
+    def _notify(self, issue_id, command, error):
+        if self.progress is not None:
+            try:
+                self.progress(self, issue_id, command, error)
+            except Exception:
+                pass
@@ -1,19 +1,37 @@
+from __future__ import with_statement
 import calendar
 import time
 from datetime import datetime
 import httplib2
-from xml.dom import minidom
+import httplib
+import socket
 import sys
 import youtrack
+from youtrack import xmlparser
+from youtrack import multipart
 from xml.dom import Node
 import urllib2
 import urllib
-from xml.sax.saxutils import escape, quoteattr
+from StringIO import StringIO
+from xml.sax.saxutils import escape
 import json
-import urllib2_file
-import tempfile
+import os
 import functools
 import re
+import threading
+import youtrack.pool
+import youtrack.cache
+import youtrack.attachment_cache
+from youtrack.pool import WorkerPool, ObjectPool
+from youtrack.paging import FixedPageSize
+from youtrack.retry import RetryPolicy, get_circuit_breaker, is_connect_error
+from youtrack.ratelimit import get_rate_limiter
+from youtrack.xmlwriter import XmlWriter
+from youtrack.commands import CommandBuffer, CommandExecutor
+from youtrack.stats import RequestStats, endpoint_template
+from youtrack.cassette import get_transport
+from youtrack.importing import ImportResult, ImportFailure, BatchFailed, ImportBatchSize, import_bisecting, \
+    import_batched
 
 def urlquote(s):
     return urllib.quote(utf8encode(s), safe="")
@@ -23,29 +41,121 @@ def utf8encode(source):
         source = source.encode('utf-8')
     return source
 
+def _json_items(data):
+    # lists come either as JSON arrays or as objects wrapping a single array, e.g. {"issue": [...]}
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                return value
+    return []
+
+def _attribute(element, name):
+    if isinstance(element, dict):
+        return element.get(name)
+    return element.getAttribute(name)
+
 def relogin_on_401(f):
+    """ Repeats failed requests as Connection.retry_policy allows and logs in again after auth failures
+    """
     @functools.wraps(f)
-    def wrapped(self, *args, **kwargs):
-        attempts = 10
-        while attempts:
+    def wrapped(self, method, *args, **kwargs):
+        # callers that handle 5xx responses themselves (e.g. by requesting less data) pass retry_server_errors=False,
+        # 429 responses and connection errors are still retried
+        retry_server_errors = kwargs.pop('retry_server_errors', True)
+        url = args and args[0] or None
+        policy = self.retry_policy
+        breaker = self.circuit_breaker
+        attempt = 0
+        auth_attempt = 0
+        while True:
+            breaker.before_request()
+            headers = self.headers
             try:
-                return f(self, *args, **kwargs)
+                result = f(self, method, *args, **kwargs)
             except youtrack.YouTrackException, e:
-                if e.response.status not in (401, 403, 500, 504):
-                    raise e
-                if e.response.status == 504:
-                    time.sleep(30)
+                status = e.response.status
+                if policy.is_auth_error(status):
+                    breaker.record_success()
+                    if self._credentials is None or auth_attempt >= policy.max_auth_attempts:
+                        raise
+                    auth_attempt += 1
+                    self._relogin(headers)
+                    continue
+                if not policy.is_server_error(status):
+                    breaker.record_success()
+                    raise
+                if policy.is_throttled(status):
+                    # the server is up, it only asks to slow down
+                    breaker.record_success()
                 else:
-                    self._login(*self._credentials)
-                attempts -= 1
-        return f(self, *args, **kwargs)
+                    breaker.record_failure()
+                attempt += 1
+                if not retry_server_errors and status >= 500:
+                    raise
+                if not policy.should_retry(method, attempt, url):
+                    raise
+                time.sleep(policy.delay(attempt, e.response))
+            except (socket.error, httplib.HTTPException), e:
+                breaker.record_failure()
+                attempt += 1
+                if not policy.should_retry(method, attempt, url, is_connect_error(e)):
+                    raise
+                time.sleep(policy.delay(attempt))
+            else:
+                breaker.record_success()
+                return result
     return wrapped
 
 
 class Connection(object):
-    def __init__(self, url, login=None, password=None, proxy_info=None, api_key=None):
-        self.http = httplib2.Http(disable_ssl_certificate_validation=True) if proxy_info is None else httplib2.Http(
-            proxy_info=proxy_info, disable_ssl_certificate_validation=True)
+    def __init__(self, url, login=None, password=None, proxy_info=None, api_key=None, pool_size=1, use_json=False,
+                 cache=None, retry_policy=None, rate_limiter=None, attachment_cache=None, transport=None,
+                 user_directory=None, chunked_uploads=True):
+        """ pool_size is the number of keep-alive HTTP sessions (and worker threads used by submit and map)
+            the connection may use at once. All sessions share the login cookie or api key.
+            use_json makes getters of issues, comments, links, users, custom fields and bundles request
+            application/json instead of XML.
+            cache is youtrack.cache.ResponseCache for admin and metadata GETs, None disables caching.
+            retry_policy is youtrack.retry.RetryPolicy deciding which failed requests are repeated. Unless it
+            has a breaker, the circuit breaker shared by all connections to the server is used.
+            rate_limiter is youtrack.ratelimit.RateLimiter shared with other connections, by default the limiter
+            registered for the server with youtrack.ratelimit.set_rate_limit is used.
+            attachment_cache is youtrack.attachment_cache.AttachmentCache used by createAttachmentFromAttachment
+            instead of downloading the same attachment again.
+            transport creates objects sending requests like httplib2.Http.request, e.g. a recorder or player of
+            youtrack.cassette.Cassette; by default the transport installed with youtrack.cassette.use_cassette
+            or httplib2.Http is used.
+            user_directory is youtrack.directory.UserDirectory answering getUser, usually shared by all
+            connections to the server during a run.
+            chunked_uploads makes attachments of unknown length stream with chunked transfer encoding, otherwise
+            they are spooled to a temporary file to learn their length. It is turned off when the server
+            rejects a chunked upload with 411.
+        """
+        self.attachment_cache = attachment_cache
+        self.user_directory = user_directory
+        self.rate_limiter = rate_limiter
+        self.chunked_uploads = chunked_uploads
+        self.use_json = use_json
+        self.cache = cache
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy
+        # batch limits of bulk imports, adjusted to server response times
+        self.import_batch_sizes = {'issues': ImportBatchSize(), 'users': ImportBatchSize(), 'links': ImportBatchSize()}
+        self.request_stats = RequestStats()
+        self._request_hooks = []
+        self._hooks_lock = threading.Lock()
+        self._proxy_info = proxy_info
+        self._transport = transport or get_transport()
+        self._http_pool = ObjectPool(pool_size, self._create_http)
+        self._workers = None
+        self._workers_lock = threading.Lock()
+        self._login_lock = threading.Lock()
+        self.pool_size = pool_size
+        self.http = self._http_pool.acquire()
+        self._http_pool.release(self.http)
 
         # Remove the last character of the url ends with "/"
         if url:
@@ -53,14 +163,82 @@ class Connection(object):
 
         self.url = url
         self.baseUrl = url + "/rest"
+        self.circuit_breaker = self.retry_policy.breaker or get_circuit_breaker(url)
         if api_key is None:
             self._credentials = (login, password)
             self._login(*self._credentials)
         else:
+            self._credentials = None
             self.headers = {'X-YouTrack-ApiKey': api_key}
 
+    def _create_http(self):
+        if self._transport is not None:
+            return self._transport()
+        if self._proxy_info is None:
+            return httplib2.Http(disable_ssl_certificate_validation=True)
+        return httplib2.Http(proxy_info=self._proxy_info, disable_ssl_certificate_validation=True)
+
+    def _rate_limit(self, url, method):
+        limiter = self.rate_limiter or get_rate_limiter(url)
+        if limiter is not None:
+            limiter.acquire(method)
+
+    def _http_request(self, url, method, headers=None, body=None):
+        self._rate_limit(url, method)
+        self._before_request(method, url, headers, body)
+        started = time.time()
+        status = None
+        content = None
+        http = self._http_pool.acquire()
+        try:
+            response, content = http.request(url, method, headers=headers, body=body)
+            status = response.status
+            return response, content
+        finally:
+            self._http_pool.release(http)
+            self._after_request(method, url, status, len(body or ''), len(content or ''), time.time() - started)
+
+    def addRequestHook(self, before=None, after=None):
+        """ Registers callbacks of every HTTP request: before(method, url, headers, body) and
+            after(method, url, status, bytes_in, elapsed). status is None if no response was received.
+            Returns the hook for removeRequestHook
+        """
+        hook = (before, after)
+        with self._hooks_lock:
+            self._request_hooks = self._request_hooks + [hook]
+        return hook
+
+    def removeRequestHook(self, hook):
+        with self._hooks_lock:
+            self._request_hooks = [h for h in self._request_hooks if h is not hook]
+
+    def stats(self, reset=False):
+        """ Returns snapshot of request statistics by (method, endpoint template), see youtrack.stats.RequestStats
+        """
+        snapshot = self.request_stats.snapshot()
+        if reset:
+            self.request_stats.reset()
+        return snapshot
+
+    def _before_request(self, method, url, headers, body):
+        for before, after in self._request_hooks:
+            if before is not None:
+                try:
+                    before(method, url, headers, body)
+                except Exception:
+                    pass
+
+    def _after_request(self, method, url, status, bytes_out, bytes_in, elapsed):
+        self.request_stats.record(method, endpoint_template(url, self.baseUrl), status, bytes_out, bytes_in, elapsed)
+        for before, after in self._request_hooks:
+            if after is not None:
+                try:
+                    after(method, url, status, bytes_in, elapsed)
+                except Exception:
+                    pass
+
     def _login(self, login, password):
-        response, content = self.http.request(
+        response, content = self._http_request(
             self.baseUrl + "/user/login?login=" + urllib.quote_plus(login) + "&password=" + urllib.quote_plus(password),
             'POST',
             headers={'Content-Length': '0', 'Connection': 'keep-alive'})
@@ -69,9 +247,65 @@ class Connection(object):
         self.headers = {'Cookie': response['set-cookie'],
                         'Cache-Control': 'no-cache'}
 
+    def _relogin(self, stale_headers):
+        # several pooled requests may fail with the same expired session, log in only once for all of them
+        with self._login_lock:
+            if self.headers is stale_headers:
+                self._login(*self._credentials)
+
+    def submit(self, fn, *args, **kwargs):
+        """ Schedules fn(*args, **kwargs) on the connection worker pool and returns youtrack.pool.Future.
+            Example: futures = [yt.submit(yt.getIssue, id) for id in ids]
+        """
+        return self._get_workers().submit(fn, *args, **kwargs)
+
+    def map(self, fn, *iterables):
+        """ Concurrent version of itertools.imap. Results are yielded in the order of arguments.
+            Example: comments = list(yt.map(yt.getComments, ids))
+        """
+        return self._get_workers().map(fn, *iterables)
+
+    def close(self):
+        """ Stops worker threads started by submit and map
+        """
+        with self._workers_lock:
+            workers, self._workers = self._workers, None
+        if workers is not None:
+            workers.shutdown()
+
+    def _get_workers(self):
+        with self._workers_lock:
+            if self._workers is None:
+                self._workers = WorkerPool(self.pool_size)
+            return self._workers
+
+    def _req(self, method, url, body=None, ignoreStatus=None, content_type=None, accept=None,
+             retry_server_errors=True):
+        send = functools.partial(self._send, method, url, body, ignoreStatus, content_type, accept,
+                                 retry_server_errors=retry_server_errors)
+        if self.cache is None:
+            return send()
+        if method != 'GET':
+            try:
+                return send()
+            finally:
+                self.cache.invalidate(self.baseUrl, youtrack.cache.invalidated_prefixes(url))
+        if not youtrack.cache.is_cacheable(url):
+            return send()
+        key = (self.baseUrl + url, accept)
+        result = self.cache.get(key)
+        if result is None:
+            result = send()
+            if result[0].status == 200:
+                self.cache.put(key, result)
+        return result
+
     @relogin_on_401
-    def _req(self, method, url, body=None, ignoreStatus=None, content_type=None):
+    def _send(self, method, url, body, ignoreStatus, content_type, accept):
         headers = self.headers
+        if accept is not None:
+            headers = headers.copy()
+            headers['Accept'] = accept
         if method == 'PUT' or method == 'POST':
             headers = headers.copy()
             if content_type is None:
@@ -79,7 +313,7 @@ class Connection(object):
             headers['Content-Type'] = content_type
             headers['Content-Length'] = str(len(body)) if body else '0'
 
-        response, content = self.http.request((self.baseUrl + url).encode('utf-8'), method, headers=headers, body=body)
+        response, content = self._http_request((self.baseUrl + url).encode('utf-8'), method, headers=headers, body=body)
         content = content.translate(None, '\0')
         content = re.sub('system_user[%@][a-zA-Z0-9]+', 'guest', content)
         _illegal_unichrs = [(0x00, 0x08), (0x0B, 0x0C), (0x0E, 0x1F),
@@ -100,7 +334,7 @@ class Connection(object):
             if (response["content-type"].find('application/xml') != -1 or response["content-type"].find(
                 'text/xml') != -1) and content is not None and content != '':
                 try:
-                    return minidom.parseString(content)
+                    return xmlparser.parseString(content)
                 except Exception:
                     return ""
             elif response['content-type'].find('application/json') != -1 and content is not None and content != '':
@@ -117,11 +351,48 @@ class Connection(object):
     def _get(self, url):
         return self._reqXml('GET', url)
 
+    def _getJson(self, url):
+        response, content = self._req('GET', url, accept='application/json')
+        return json.loads(content)
+
+    def _getDetails(self, url):
+        """ Returns XML document or decoded JSON object, depending on use_json
+        """
+        if self.use_json:
+            return self._getJson(url)
+        return self._get(url)
+
+    def _getList(self, url):
+        """ Returns child elements of the XML root element or items of the decoded JSON list, depending on use_json
+        """
+        return self._parseList(self._getListContent(url))
+
+    def _getListContent(self, url, retry_server_errors=True):
+        accept = None
+        if self.use_json:
+            accept = 'application/json'
+        response, content = self._req('GET', url, accept=accept, retry_server_errors=retry_server_errors)
+        return content
+
+    def _parseList(self, content):
+        if self.use_json:
+            return _json_items(json.loads(content))
+        xml = xmlparser.parseString(content)
+        return [e for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
+
+    def _streamList(self, url):
+        """ Same as _getList, but XML elements are parsed one by one
+        """
+        if self.use_json:
+            return iter(self._getList(url))
+        response, content = self._req('GET', url)
+        return xmlparser.iterChildElements(content)
+
     def _put(self, url):
         return self._reqXml('PUT', url, '<empty/>\n\n')
 
     def getIssue(self, id):
-        return youtrack.Issue(self._get("/issue/" + id), self)
+        return youtrack.Issue(self._getDetails("/issue/" + id), self)
 
     def createIssue(self, project, assignee, summary, description, priority=None, type=None, subsystem=None, state=None,
                     affectsVersion=None,
@@ -159,13 +430,11 @@ class Connection(object):
                 self._get("/issue/%s/changes" % issue).getElementsByTagName('change')]
 
     def getComments(self, id):
-        response, content = self._req('GET', '/issue/' + id + '/comment')
-        xml = minidom.parseString(content)
-        return [youtrack.Comment(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
+        return [youtrack.Comment(e, self) for e in self._getList('/issue/' + id + '/comment')]
 
     def getAttachments(self, id):
         response, content = self._req('GET', '/issue/' + id + '/attachment')
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.Attachment(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def getAttachmentContent(self, url):
@@ -177,10 +446,7 @@ class Connection(object):
 
     def createAttachmentFromAttachment(self, issueId, a):
         try:
-            content = a.getContent()
-            contentLength = None
-            if 'content-length' in content.headers.dict:
-                contentLength = int(content.headers.dict['content-length'])
+            content, contentLength, contentType = self._openAttachment(a)
             print 'Importing attachment for issue ', issueId
             try:
                 print 'Name: ', utf8encode(a.name)
@@ -190,11 +456,11 @@ class Connection(object):
                 print 'Author: ', a.authorLogin
             except Exception, e:
                 print e
-            return self.importAttachment(issueId, a.name, content, a.authorLogin,
-                contentLength=contentLength,
-                contentType=content.info().type,
-                created=a.created if hasattr(a, 'created') else None,
-                group=utf8encode(a.group) if hasattr(a, 'group') else '')
+            # a stream rejected by a server not accepting chunked bodies is requested again
+            return self._process_attachmnets(a.authorLogin, content, contentLength, contentType,
+                a.created if hasattr(a, 'created') else None,
+                utf8encode(a.group) if hasattr(a, 'group') else '', issueId, a.name, '/import/',
+                reopen=a.getContent)
         except urllib2.HTTPError, e:
             print "Can't create attachment"
             try:
@@ -227,23 +493,28 @@ class Connection(object):
             raise e
             
 
+    def _openAttachment(self, a):
+        """ Returns content of attachment a, its length and type, reading it from attachment_cache if possible
+        """
+        if self.attachment_cache is not None:
+            key = youtrack.attachment_cache.cache_key(a)
+            cached = self.attachment_cache.get(key)
+            if cached is not None:
+                return cached
+        content = a.getContent()
+        contentLength = None
+        if 'content-length' in content.headers.dict:
+            contentLength = int(content.headers.dict['content-length'])
+        contentType = content.info().type
+        if self.attachment_cache is not None:
+            return self.attachment_cache.put(key, content, contentType, contentLength)
+        return content, contentLength, contentType
+
     def _process_attachmnets(self, authorLogin, content, contentLength, contentType, created, group, issueId, name,
-                             url_prefix='/issue/'):
-        if contentType is not None:
-            content.contentType = contentType
-        if contentLength is not None:
-            content.contentLength = contentLength
-        elif not isinstance(content, file):
-            tmp = tempfile.NamedTemporaryFile(mode='w+b')
-            tmp.write(content.read())
-            tmp.flush()
-            tmp.seek(0)
-            content = tmp
-
-        #post_data = {'attachment': content}
-        post_data = {name: content}
-        headers = self.headers.copy()
-        #headers['Content-Type'] = contentType
+                             url_prefix='/issue/', reopen=None):
+        if contentLength is None and isinstance(content, file):
+            contentLength = os.fstat(content.fileno()).st_size - content.tell()
+
         # name without extension to workaround: http://youtrack.jetbrains.net/issue/JT-6110
         params = {#'name': os.path.splitext(name)[0],
                   'authorLogin': authorLogin.encode('utf-8'),
@@ -259,16 +530,44 @@ class Connection(object):
                 params['created'] = str(calendar.timegm(datetime.now().timetuple()) * 1000)
 
         url = self.baseUrl + url_prefix + issueId + "/attachment?" + urllib.urlencode(params)
-        r = urllib2.Request(url,
-            headers=headers, data=post_data)
-        #r.set_proxy('localhost:8888', 'http')
+        return self._upload(url, name, content, contentType, contentLength, reopen)
+
+    def _upload(self, url, name, content, contentType, contentLength, reopen=None):
+        """ reopen returns the content again, it is used when the server rejected a chunked body
+            of a stream which can not be rewound
+        """
+        if contentLength is None and not self.chunked_uploads:
+            content, contentLength = multipart.spool(content)
+        start = None
+        if contentLength is None and hasattr(content, 'seek'):
+            start = content.tell()
+        self._rate_limit(url, 'POST')
+        body = multipart.MultipartBody(name, content, contentType, contentLength)
+        self._before_request('POST', url, self.headers, None)
+        started = time.time()
+        status = None
         try:
-            res = urllib2.urlopen(r)
-        except urllib2.HTTPError, e:
-            if e.code == 201:
-                return e.msg + ' ' + name
-            raise e
-        return res
+            response = multipart.post(url, self.headers, body, timeout=getattr(self.http, 'timeout', None),
+                                      proxy_info=self._proxy_info)
+            status = response.status
+        finally:
+            self._after_request('POST', url, status, body.length or 0, 0, time.time() - started)
+        if response.status == 411 and contentLength is None:
+            # the server does not accept chunked bodies, spool this and all following attachments
+            response.read()
+            self.chunked_uploads = False
+            if start is not None:
+                content.seek(start)
+                return self._upload(url, name, content, contentType, contentLength)
+            if reopen is not None:
+                return self._upload(url, name, reopen(), contentType, contentLength)
+        if response.status == 201:
+            response.read()
+            return response.reason + ' ' + name
+        if response.status == 200:
+            return response
+        # HTTPError reads the error body with readline, which HTTPResponse lacks
+        raise urllib2.HTTPError(url, response.status, response.reason, response.msg, StringIO(response.read()))
 
     def createAttachment(self, issueId, name, content, authorLogin='', contentType=None, contentLength=None,
                          created=None, group=''):
@@ -282,10 +581,8 @@ class Connection(object):
 
 
     def getLinks(self, id, outwardOnly=False):
-        response, content = self._req('GET', '/issue/' + urlquote(id) + '/link')
-        xml = minidom.parseString(content)
         res = []
-        for c in [e for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]:
+        for c in self._getList('/issue/' + urlquote(id) + '/link'):
             link = youtrack.Link(c, self)
             if link.source == id or not outwardOnly:
                 res.append(link)
@@ -296,7 +593,14 @@ class Connection(object):
         """
         if login.startswith('system_user'):
             login = 'guest'
-        return youtrack.User(self._get("/admin/user/" + urlquote(login.encode('utf8'))), self)
+        if self.user_directory is not None:
+            user = self.user_directory.get(login)
+            if user is not None:
+                return user
+        user = youtrack.User(self._getDetails("/admin/user/" + urlquote(login.encode('utf8'))), self)
+        if self.user_directory is not None:
+            self.user_directory.put(user)
+        return user
 
     def createUser(self, user):
         """ user from getUser
@@ -322,15 +626,30 @@ class Connection(object):
         if len(users) <= 0: return
 
         known_attrs = ('login', 'fullName', 'email', 'jabber')
+        if self.user_directory is not None:
+            for u in users:
+                self.user_directory.discard(u['login'])
 
-        xml = '<list>\n'
+        writer = XmlWriter()
+        records = []
         for u in users:
-            xml += '  <user ' + "".join(k + '=' + quoteattr(u[k]) + ' ' for k in u if k in known_attrs) + '/>\n'
-        xml += '</list>'
+            start = writer.tell()
+            writer.write('  <user')
+            for k in u:
+                if k in known_attrs:
+                    writer.attribute(k, u[k])
+            writer.write(' />\n')
+            records.append((start, writer.tell()))
+
         #TODO: convert response xml into python objects
-        if isinstance(xml, unicode):
-            xml = xml.encode('utf-8')
-        return self._reqXml('PUT', '/import/users', xml, 400).toxml()
+        responses = []
+
+        def send(batch):
+            xml = '<list>\n' + self._importRecords(writer, batch) + '</list>'
+            responses.append(self._reqXml('PUT', '/import/users', xml, 400).toxml())
+
+        self._importBatched('users', writer, records, send)
+        return '\n'.join(responses)
 
     def importIssuesXml(self, projectId, assigneeGroup, xml):
         return self._reqXml('PUT', '/import/' + urlquote(projectId) + '/issues?' +
@@ -343,17 +662,28 @@ class Connection(object):
             Example: importLinks([{'login':'vadim', 'fullName':'vadim', 'email':'eee@ss.com', 'jabber':'fff@fff.com'},
                                   {'login':'maxim', 'fullName':'maxim', 'email':'aaa@ss.com', 'jabber':'www@fff.com'}])
         """
-        xml = '<list>\n'
+        writer = XmlWriter()
+        records = []
         for l in links:
-            # ignore typeOutward and typeInward returned by getLinks()
-            xml += '  <link ' + "".join(attr + '=' + quoteattr(l[attr]) +
-                                        ' ' for attr in l if attr not in ['typeInward', 'typeOutward']) + '/>\n'
-        xml += '</list>'
+            start = writer.tell()
+            writer.write('  <link')
+            for attr in l:
+                # ignore typeOutward and typeInward returned by getLinks()
+                if attr not in ['typeInward', 'typeOutward']:
+                    writer.attribute(attr, l[attr])
+            writer.write(' />\n')
+            records.append((start, writer.tell()))
+
         #TODO: convert response xml into python objects
-        if isinstance(xml, unicode):
-            xml = xml.encode('utf-8')
-        res = self._reqXml('PUT', '/import/links', xml, 400)
-        return res.toxml() if hasattr(res, "toxml") else res
+        responses = []
+
+        def send(batch):
+            xml = '<list>\n' + self._importRecords(writer, batch) + '</list>'
+            res = self._reqXml('PUT', '/import/links', xml, 400)
+            responses.append(res.toxml() if hasattr(res, "toxml") else res)
+
+        self._importBatched('links', writer, records, send)
+        return '\n'.join(responses)
 
     def importIssues(self, projectId, assigneeGroup, issues):
         """ Import issues, returns import result (http://confluence.jetbrains.net/display/YTD2/Import+Issues)
@@ -366,6 +696,87 @@ class Connection(object):
         if len(issues) <= 0:
             return
 
+        result = self.importIssuesResult(projectId, assigneeGroup, issues)
+        for id in result.imported:
+            print "Issue [ %s-%s ] imported successfully" % (projectId, id)
+            print ""
+        for failure in result.failed:
+            sys.stderr.write("")
+            sys.stderr.write("Failed to import issue [ %s-%s ]." % (projectId, failure.id))
+            sys.stderr.write("Reason : ")
+            sys.stderr.write(failure.reason)
+            sys.stderr.write("Request was :")
+            sys.stderr.write(failure.request)
+            print ""
+        return str(result)
+
+    def importIssuesResult(self, projectId, assigneeGroup, issues, bisect=True):
+        """ Import issues like importIssues, but returns youtrack.importing.ImportResult instead of printing.
+            Issues are sent in batches sized by import_batch_sizes['issues']. If the response for a batch is empty
+            or has no import items, the batch is split in halves until the failing issues are isolated
+            (unless bisect is False).
+        """
+        result = ImportResult()
+        if len(issues) <= 0:
+            return result
+
+        writer, records = self._issueRecords(projectId, issues)
+
+        if isinstance(assigneeGroup, unicode):
+            assigneeGroup = assigneeGroup.encode('utf-8')
+
+        url = '/import/' + urlquote(projectId) + '/issues?' + urllib.urlencode({'assigneeGroup': assigneeGroup})
+        if isinstance(url, unicode):
+            url = url.encode('utf-8')
+
+        def send(batch):
+            xml = '<issues>\n' + self._importRecords(writer, batch) + '</issues>'
+            result.requests += 1
+            response = self._reqXml('PUT', url, xml, 400)
+            if not hasattr(response, 'toxml'):
+                raise BatchFailed("Can't parse response: %s" % response)
+            items = {}
+            for item in response.getElementsByTagName('item'):
+                items[item.getAttribute('id')] = item
+            if not items:
+                raise BatchFailed(response.toxml().encode('utf-8'))
+            result.responses.append(response.toxml().encode('utf-8'))
+            for record in batch:
+                item = items.get(unicode(record[0]))
+                if item is None:
+                    fail(record, 'Missing in server response')
+                elif item.getAttribute('imported').lower() == 'true':
+                    result.imported.append(record[0])
+                else:
+                    fail(record, item.toxml().encode('utf-8'))
+
+        def fail(record, reason):
+            id, start, end = record
+            result.failed.append(ImportFailure(id, reason, writer.getvalue(start, end)))
+
+        def send_batch(batch):
+            if bisect:
+                import_bisecting(batch, send, fail)
+            else:
+                try:
+                    send(batch)
+                except BatchFailed, e:
+                    for record in batch:
+                        fail(record, str(e))
+
+        self._importBatched('issues', writer, records, send_batch)
+        return result
+
+    def _importRecords(self, writer, records):
+        # records end with start and end positions of the record in writer
+        return ''.join([writer.getvalue(record[-2], record[-1]) for record in records])
+
+    def _importBatched(self, endpoint, writer, records, send):
+        import_batched(records, lambda record: writer.size(record[-2], record[-1]), send,
+                       self.import_batch_sizes[endpoint])
+
+    def _issueRecords(self, projectId, issues):
+        # serializes issues once; import batches are assembled from parts of the writer
         bad_fields = ['id', 'projectShortName', 'votes', 'commentsCount',
                       'historyUpdated', 'updatedByFullName', 'updaterFullName',
                       'reporterFullName', 'links', 'attachments', 'jiraId',
@@ -375,12 +786,13 @@ class Connection(object):
         if tt_settings and tt_settings.Enabled and tt_settings.TimeSpentField:
             bad_fields.append(tt_settings.TimeSpentField)
 
-        xml = '<issues>\n'
-        issue_records = dict([])
+        writer = XmlWriter()
+        # issue numbers and positions of their records in writer
+        records = []
 
         for issue in issues:
-            record = ""
-            record += '  <issue>\n'
+            start = writer.tell()
+            writer.write('  <issue>\n')
 
             comments = None
             if getattr(issue, "getComments", None):
@@ -399,79 +811,29 @@ class Connection(object):
                 else:
                     # ignore bad fields from getIssue()
                     if issueAttr not in bad_fields:
-                        record += '    <field name="' + issueAttr + '">\n'
+                        writer.write('    <field name="' + issueAttr + '">\n')
                         if isinstance(attrValue, list) or getattr(attrValue, '__iter__', False):
                             for v in attrValue:
-                                if isinstance(v, unicode):
-                                    v = v.encode('utf-8')
-                                record += '      <value>' + escape(v.strip()) + '</value>\n'
+                                writer.write('      ')
+                                writer.element('value', v.strip())
+                                writer.write('\n')
                         else:
-                            record += '      <value>' + escape(attrValue.strip()) + '</value>\n'
-                        record += '    </field>\n'
+                            writer.write('      ')
+                            writer.element('value', attrValue.strip())
+                            writer.write('\n')
+                        writer.write('    </field>\n')
 
             if comments:
                 for comment in comments:
-                    record += '    <comment'
+                    writer.write('    <comment')
                     for ca in comment:
-                        val = comment[ca]
-                        if isinstance(ca, unicode):
-                            ca = ca.encode('utf-8')
-                        if isinstance(val, unicode):
-                            val = val.encode('utf-8')
-                        record += ' ' + ca + '=' + quoteattr(val)
-                    record += '/>\n'
-
-            record += '  </issue>\n'
-            xml += record
-            issue_records[issue.numberInProject] = record
-
-        xml += '</issues>'
-
-        #print xml
-        #TODO: convert response xml into python objects
+                        writer.attribute(ca, comment[ca])
+                    writer.write('/>\n')
 
-        if isinstance(xml, unicode):
-            xml = xml.encode('utf-8')
+            writer.write('  </issue>\n')
+            records.append((issue.numberInProject, start, writer.tell()))
 
-        if isinstance(assigneeGroup, unicode):
-            assigneeGroup = assigneeGroup.encode('utf-8')
-
-        url = '/import/' + urlquote(projectId) + '/issues?' + urllib.urlencode({'assigneeGroup': assigneeGroup})
-        if isinstance(url, unicode):
-            url = url.encode('utf-8')
-        result = self._reqXml('PUT', url, xml, 400)
-        if (result == "") and (len(issues) > 1):
-            for issue in issues:
-                self.importIssues(projectId, assigneeGroup, [issue])
-        response = ""
-        try:
-            response = result.toxml().encode('utf-8')
-        except:
-            sys.stderr.write("can't parse response")
-            sys.stderr.write("request was")
-            sys.stderr.write(xml)
-            return response
-        item_elements = minidom.parseString(response).getElementsByTagName("item")
-        if len(item_elements) != len(issues):
-            sys.stderr.write(response)
-        else:
-            for item in item_elements:
-                id = item.attributes["id"].value
-                imported = item.attributes["imported"].value.lower()
-                if imported == "true":
-                    print "Issue [ %s-%s ] imported successfully" % (projectId, id)
-                else:
-                    sys.stderr.write("")
-                    sys.stderr.write("Failed to import issue [ %s-%s ]." % (projectId, id))
-                    sys.stderr.write("Reason : ")
-                    sys.stderr.write(item.toxml())
-                    sys.stderr.write("Request was :")
-                    if isinstance(issue_records[id], unicode):
-                        sys.stderr.write(issue_records[id].encode('utf-8'))
-                    else:
-                        sys.stderr.write(issue_records[id])
-                print ""
-        return response
+        return writer, records
 
     def getProjects(self):
         projects = {}
@@ -486,12 +848,12 @@ class Connection(object):
 
     def getProjectIds(self):
         response, content = self._req('GET', '/admin/project/')
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [e.getAttribute('id') for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def getProjectAssigneeGroups(self, projectId):
         response, content = self._req('GET', '/admin/project/' + urlquote(projectId) + '/assignee/group')
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.Group(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def getGroup(self, name):
@@ -499,7 +861,7 @@ class Connection(object):
 
     def getGroups(self):
         response, content = self._req('GET', '/admin/group')
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.Group(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def deleteGroup(self, name):
@@ -507,7 +869,7 @@ class Connection(object):
 
     def getUserGroups(self, userName):
         response, content = self._req('GET', '/admin/user/%s/group' % urlquote(userName.encode('utf-8')))
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.Group(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def setUserGroup(self, user_name, group_name):
@@ -537,12 +899,12 @@ class Connection(object):
 
     def getRoles(self):
         response, content = self._req('GET', '/admin/role')
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.Role(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def getGroupRoles(self, group_name):
         response, content = self._req('GET', '/admin/group/%s/role' % urlquote(group_name))
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.UserRole(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def createRole(self, role):
@@ -569,27 +931,27 @@ class Connection(object):
 
     def getRolePermissions(self, role):
         response, content = self._req('GET', '/admin/role/%s/permission' % urlquote(role.name))
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.Permission(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def getPermissions(self):
         response, content = self._req('GET', '/admin/permission')
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.Permission(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def getSubsystem(self, projectId, name):
         response, content = self._req('GET', '/admin/project/' + projectId + '/subsystem/' + urlquote(name))
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return youtrack.Subsystem(xml, self)
 
     def getSubsystems(self, projectId):
         response, content = self._req('GET', '/admin/project/' + projectId + '/subsystem')
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.Subsystem(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def getVersions(self, projectId):
         response, content = self._req('GET', '/admin/project/' + urlquote(projectId) + '/version?showReleased=true')
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [self.getVersion(projectId, v.getAttribute('name')) for v in
                 xml.documentElement.getElementsByTagName('version')]
 
@@ -599,7 +961,7 @@ class Connection(object):
 
     def getBuilds(self, projectId):
         response, content = self._req('GET', '/admin/project/' + urlquote(projectId) + '/build')
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.Build(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
 
@@ -609,23 +971,19 @@ class Connection(object):
         position = 0
         user_search_params = urllib.urlencode(params)
         while True:
-            response, content = self._req('GET', "/admin/user/?start=%s&%s" % (str(position), user_search_params))
+            newUsers = [youtrack.User(e, self) for e in
+                        self._getList("/admin/user/?start=%s&%s" % (str(position), user_search_params))]
             position += 10
-            xml = minidom.parseString(content)
-            newUsers = [youtrack.User(e, self) for e in xml.documentElement.childNodes if
-                        e.nodeType == Node.ELEMENT_NODE]
             if not len(newUsers): return users
             users += newUsers
 
 
     def getUsersTen(self, start):
-        response, content = self._req('GET', "/admin/user/?start=%s" % str(start))
-        xml = minidom.parseString(content)
-        users = [youtrack.User(e, self) for e in xml.documentElement.childNodes if
-                 e.nodeType == Node.ELEMENT_NODE]
-        return users
+        return [youtrack.User(e, self) for e in self._getList("/admin/user/?start=%s" % str(start))]
 
     def deleteUser(self, login):
+        if self.user_directory is not None:
+            self.user_directory.discard(login)
         return self._req('DELETE', "/admin/user/" + urlquote(login.encode('utf-8')))
 
     # TODO this function is deprecated
@@ -708,12 +1066,66 @@ class Connection(object):
 
     def getIssues(self, projectId, filter, after, max):
         #response, content = self._req('GET', '/project/issues/' + urlquote(projectId) + "?" +
-        response, content = self._req('GET', '/issue/byproject/' + urlquote(projectId) + "?" +
-                                             urllib.urlencode({'after': str(after),
-                                                               'max': str(max),
-                                                               'filter': filter}))
-        xml = minidom.parseString(content)
-        return [youtrack.Issue(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
+        return [youtrack.Issue(e, self) for e in self._getList(self._issues_by_project_url(projectId, filter, after, max))]
+
+    def streamIssues(self, projectId, filter, after, max):
+        """ Generator variant of getIssues. Issues are parsed one by one, so the whole response DOM
+            is never held in memory together with the Issue objects.
+        """
+        for e in self._streamList(self._issues_by_project_url(projectId, filter, after, max)):
+            yield youtrack.Issue(e, self)
+
+    def iterIssuePages(self, projectId, filter='', page_size=100, prefetch=1, start=0):
+        """ Yields lists of issues of the project page by page, skipping the first start issues.
+            Up to prefetch next pages are fetched on a background thread while the current page is processed,
+            prefetch=0 fetches in the caller thread. Use pool_size > 1 if the same connection is used
+            while processing pages.
+            page_size is either a number or youtrack.paging.AdaptivePageSize, which tunes the size of
+            every next page and retries pages failed with 5xx in smaller pieces.
+        """
+        pages = self._issue_pages(projectId, filter, page_size, start)
+        if prefetch:
+            pages = youtrack.pool.prefetch(pages, prefetch)
+        return pages
+
+    def iterIssues(self, projectId, filter='', page_size=100, prefetch=1):
+        """ Lazily yields all issues of the project matching filter, see iterIssuePages
+        """
+        for page in self.iterIssuePages(projectId, filter, page_size, prefetch):
+            for issue in page:
+                yield issue
+
+    def _issue_pages(self, projectId, filter, page_size, start=0):
+        if isinstance(page_size, (int, long)):
+            page_size = FixedPageSize(page_size)
+        after = start
+        retry_server_errors = not page_size.adaptive
+        while True:
+            max = page_size.size
+            started = time.time()
+            try:
+                content = self._getListContent(self._issues_by_project_url(projectId, filter, after, max),
+                                               retry_server_errors=retry_server_errors)
+            except youtrack.YouTrackException, e:
+                if retry_server_errors or e.response.status < 500:
+                    raise
+                if not page_size.failed(max, e.response.status):
+                    # the page can not get any smaller, leave it to the retry policy
+                    retry_server_errors = True
+                continue
+            retry_server_errors = not page_size.adaptive
+            elapsed = time.time() - started
+            issues = [youtrack.Issue(e, self) for e in self._parseList(content)]
+            if not len(issues):
+                return
+            page_size.succeeded(max, len(issues), elapsed, len(content))
+            yield issues
+            after += len(issues)
+
+    def _issues_by_project_url(self, projectId, filter, after, max):
+        return '/issue/byproject/' + urlquote(projectId) + "?" + urllib.urlencode({'after': str(after),
+                                                                                  'max': str(max),
+                                                                                  'filter': filter})
 
     def getNumberOfIssues(self, filter = '', waitForServer=True):
         while True:
@@ -733,23 +1145,33 @@ class Connection(object):
 
     def getAllSprints(self,agileID):
         response, content = self._req('GET', '/agile/' + agileID + "/sprints?")
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [(e.getAttribute('name'),e.getAttribute('start'),e.getAttribute('finish')) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
 
     def getAllIssues(self, filter = '', after = 0, max = 999999, withFields = ()):
+        return [youtrack.Issue(e, self) for e in self._getList(self._all_issues_url(filter, after, max, withFields))]
+
+    def streamAllIssues(self, filter = '', after = 0, max = 999999, withFields = ()):
+        """ Generator variant of getAllIssues, see streamIssues
+        """
+        for e in self._streamList(self._all_issues_url(filter, after, max, withFields)):
+            yield youtrack.Issue(e, self)
+
+    def _all_issues_url(self, filter, after, max, withFields):
         urlJobby = [('with',field) for field in withFields] + \
                     [('after',str(after)),
                     ('max',str(max)),
                     ('filter',filter)]
-        response, content = self._req('GET', '/issue' + "?" +
-                                             urllib.urlencode(urlJobby))
-        xml = minidom.parseString(content)
-        return [youtrack.Issue(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
+        return '/issue' + "?" + urllib.urlencode(urlJobby)
 
     def exportIssueLinks(self):
-        response, content = self._req('GET', '/export/links')
-        xml = minidom.parseString(content)
-        return [youtrack.Link(e, self) for e in xml.documentElement.childNodes if e.nodeType == Node.ELEMENT_NODE]
+        return [youtrack.Link(e, self) for e in self._getList('/export/links')]
+
+    def streamIssueLinks(self):
+        """ Generator variant of exportIssueLinks, see streamIssues
+        """
+        for e in self._streamList('/export/links'):
+            yield youtrack.Link(e, self)
 
     def executeCommand(self, issueId, command, comment=None, group=None, run_as=None, disable_notifications=False):
         if isinstance(command, unicode):
@@ -777,14 +1199,25 @@ class Connection(object):
 
         return "Command executed"
 
+    def commandBuffer(self, max_length=1000):
+        """ Returns youtrack.commands.CommandBuffer merging consecutive commands for the same issue
+            into one request
+        """
+        return CommandBuffer(self, max_length)
+
+    def commandExecutor(self, workers=None, retries=0, retry_delay=1.0, progress=None):
+        """ Returns youtrack.commands.CommandExecutor running commands for different issues in parallel,
+            by default on pool_size workers
+        """
+        if workers is None:
+            workers = self.pool_size
+        return CommandExecutor(self, workers, retries, retry_delay, progress)
+
     def getCustomField(self, name):
-        return youtrack.CustomField(self._get("/admin/customfield/field/" + urlquote(name.encode('utf-8'))), self)
+        return youtrack.CustomField(self._getDetails("/admin/customfield/field/" + urlquote(name.encode('utf-8'))), self)
 
     def getCustomFields(self):
-        response, content = self._req('GET', '/admin/customfield/field')
-        xml = minidom.parseString(content)
-        return [self.getCustomField(e.getAttribute('name')) for e in xml.documentElement.childNodes if
-                e.nodeType == Node.ELEMENT_NODE]
+        return [self.getCustomField(_attribute(e, 'name')) for e in self._getList('/admin/customfield/field')]
 
     def createCustomField(self, cf):
         params = dict([])
@@ -820,14 +1253,12 @@ class Connection(object):
         if isinstance(name, unicode):
             name = name.encode('utf8')
         return youtrack.ProjectCustomField(
-            self._get("/admin/project/" + urlquote(projectId) + "/customfield/" + urlquote(name))
+            self._getDetails("/admin/project/" + urlquote(projectId) + "/customfield/" + urlquote(name))
             , self)
 
     def getProjectCustomFields(self, projectId):
-        response, content = self._req('GET', '/admin/project/' + urlquote(projectId) + '/customfield')
-        xml = minidom.parseString(content)
-        return [self.getProjectCustomField(projectId, e.getAttribute('name')) for e in
-                xml.getElementsByTagName('projectCustomField')]
+        return [self.getProjectCustomField(projectId, _attribute(e, 'name')) for e in
+                self._getList('/admin/project/' + urlquote(projectId) + '/customfield')]
 
     def createProjectCustomField(self, projectId, pcf):
         return self.createProjectCustomFieldDetailed(projectId, pcf.name, pcf.emptyText, pcf.params)
@@ -852,7 +1283,7 @@ class Connection(object):
 
     def getIssueLinkTypes(self):
         response, content = self._req('GET', '/admin/issueLinkType')
-        xml = minidom.parseString(content)
+        xml = xmlparser.parseString(content)
         return [youtrack.IssueLinkType(e, self) for e in xml.getElementsByTagName('issueLinkType')]
 
     def createIssueLinkTypes(self, issueLinkTypes):
@@ -881,7 +1312,7 @@ class Connection(object):
         try:
             response, content = self._req('GET',
                 '/issue/%s/timetracking/workitem' % urlquote(issue_id))
-            xml = minidom.parseString(content)
+            xml = xmlparser.parseString(content)
             return [youtrack.WorkItem(e, self) for e in xml.documentElement.childNodes if
                     e.nodeType == Node.ELEMENT_NODE]
         except youtrack.YouTrackException, e:
@@ -904,21 +1335,23 @@ class Connection(object):
             '/issue/%s/timetracking/workitem' % urlquote(issue_id), xml)
 
     def importWorkItems(self, issue_id, work_items):
-        xml = ''
+        writer = XmlWriter()
         for work_item in work_items:
-            xml +=  '<workItem>'
-            xml += '<date>%s</date>' % work_item.date
-            xml += '<duration>%s</duration>' % work_item.duration
+            writer.write('<workItem>')
+            writer.element('date', work_item.date)
+            writer.element('duration', work_item.duration)
             if hasattr(work_item, 'description') and work_item.description is not None:
-                xml += '<description>%s</description>' % escape(work_item.description)
+                writer.element('description', work_item.description)
             if hasattr(work_item, 'worktype') and work_item.worktype is not None:
-                xml += '<worktype><name>%s</name></worktype>' % work_item.worktype
-            xml += '<author login=%s></author>' % quoteattr(work_item.authorLogin)
-            xml += '</workItem>'
-        if isinstance(xml, unicode):
-            xml = xml.encode('utf-8')
-        if xml:
-            xml = '<workItems>' + xml + '</workItems>'
+                writer.write('<worktype>')
+                writer.element('name', work_item.worktype)
+                writer.write('</worktype>')
+            writer.write('<author')
+            writer.attribute('login', work_item.authorLogin)
+            writer.write('></author>')
+            writer.write('</workItem>')
+        if len(writer):
+            xml = '<workItems>' + writer.getvalue() + '</workItems>'
             self._reqXml('PUT',
                 '/import/issue/%s/workitems' % urlquote(issue_id), xml)
 
@@ -998,9 +1431,12 @@ class Connection(object):
             tag_name = "userFieldBundle"
         else:
             tag_name = self.bundle_paths[field_type]
-        names = [e.getAttribute("name") for e in self._get('/admin/customfield/' +
-                                                           self.bundle_paths[field_type]).getElementsByTagName(
-            tag_name)]
+        if self.use_json:
+            names = [_attribute(e, "name") for e in self._getList('/admin/customfield/' + self.bundle_paths[field_type])]
+        else:
+            names = [e.getAttribute("name") for e in self._get('/admin/customfield/' +
+                                                               self.bundle_paths[field_type]).getElementsByTagName(
+                tag_name)]
         return [self.getBundle(field_type, name) for name in names]
 
 
@@ -1011,8 +1447,8 @@ class Connection(object):
 
     def getBundle(self, field_type, name):
         field_type = self.get_field_type(field_type)
-        response = self._get('/admin/customfield/%s/%s' % (self.bundle_paths[field_type],
-                                                           urlquote(name.encode('utf-8'))))
+        response = self._getDetails('/admin/customfield/%s/%s' % (self.bundle_paths[field_type],
+                                                                  urlquote(name.encode('utf-8'))))
         return self.bundle_types[field_type](response, self)
 
     def renameBundle(self, bundle, new_name):
@@ -1073,7 +1509,7 @@ class Connection(object):
 
 
     def getEnumBundle(self, name):
-        return youtrack.EnumBundle(self._get("/admin/customfield/bundle/" + urlquote(name)), self)
+        return youtrack.EnumBundle(self._getDetails("/admin/customfield/bundle/" + urlquote(name)), self)
 
 
     def createEnumBundle(self, eb):
@@ -0,0 +1,89 @@
+"""
+Run-wide directory of users of one YouTrack, so that every user is requested at most once.
+
+Connections given the same UserDirectory answer getUser, and so Issue.getReporter, getAssignee, getUpdater,
+getVoters and getAuthor of comments and attachments, from the directory. The same youtrack.User object is
+returned for every call with its login. Users changed through a connection are dropped from its directory.
+
+Example:
+    users = UserDirectory()
+    yt = Connection('http://localhost:8081', 'root', 'root', pool_size=8, user_directory=users)
+    users.prefetch(yt, ['root', 'guest'])   # details of both users are requested in parallel
+    print yt.getUser('root').fullName       # no request
+    users.prefetch(yt)                      # all users listed by paged getUsers
+"""
+
+from __future__ import with_statement
+import threading
+from youtrack import YouTrackException
+
+
+class UserDirectory(object):
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def get(self, login):
+        """ Returns youtrack.User with the login or None
+        """
+        with self._lock:
+            user = self._users.get(login)
+            if user is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return user
+
+    def put(self, user):
+        with self._lock:
+            self._users[user.login] = user
+
+    def discard(self, login):
+        with self._lock:
+            self._users.pop(login, None)
+
+    def __contains__(self, login):
+        with self._lock:
+            return login in self._users
+
+    def __len__(self):
+        with self._lock:
+            return len(self._users)
+
+    def prefetch(self, connection, logins=None):
+        """ Loads users with the given logins, or all users listed by connection.getUsers, which are not in
+            the directory yet. Details of users are requested in parallel on the connection workers
+            if its pool_size is greater than 1. Returns the number of loaded users
+        """
+        if logins is None:
+            logins = [user.login for user in connection.getUsers()]
+        with self._lock:
+            missing = []
+            for login in logins:
+                if login and login not in self._users and login not in missing:
+                    missing.append(login)
+        if not missing:
+            return 0
+        if connection.pool_size > 1:
+            users = connection.map(_get_user, [connection] * len(missing), missing)
+        else:
+            users = [_get_user(connection, login) for login in missing]
+        loaded = 0
+        for user in users:
+            if user is not None:
+                self.put(user)
+                loaded += 1
+        return loaded
+
+    def report(self):
+        return 'Users: %d known, %d hits, %d misses' % (len(self), self.hits, self.misses)
+
+
+def _get_user(connection, login):
+    # a missing user does not stop prefetching, getUser raises for it when it is needed
+    try:
+        return connection.getUser(login)
+    except YouTrackException:
+        return None
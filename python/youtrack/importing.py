@@ -0,0 +1,157 @@
+"""
+Batching of bulk imports, results of imports and bisecting retry of failed import batches.
+
+Example:
+    yt.import_batch_sizes['issues'] = ImportBatchSize(max_count=50, max_bytes=512 * 1024)
+    result = yt.importIssuesResult('SB', 'SB assignees', issues)
+    for failure in result.failed:
+        print failure.id, failure.reason
+    print yt.import_batch_sizes['issues'].report()
+"""
+
+import time
+from youtrack import YouTrackException
+
+
+class ImportFailure(object):
+    def __init__(self, id, reason, request=None):
+        self.id = id
+        self.reason = reason
+        self.request = request
+
+    def __repr__(self):
+        return '<ImportFailure %s: %s>' % (self.id, self.reason)
+
+
+class ImportResult(object):
+    """ Ids of imported records, ImportFailure for each failed record and raw server responses
+    """
+
+    def __init__(self):
+        self.imported = []
+        self.failed = []
+        self.responses = []
+        self.requests = 0
+
+    @property
+    def ok(self):
+        return not self.failed
+
+    def __str__(self):
+        return '\n'.join(self.responses)
+
+    def report(self):
+        return 'Imported %d, failed %d in %d requests' % (len(self.imported), len(self.failed), self.requests)
+
+
+class BatchFailed(Exception):
+    """ Raised by a send function when the server response does not tell the fate of single records
+    """
+
+
+def import_bisecting(batch, send, fail):
+    """ Calls send(batch). If it raises BatchFailed, the batch is split in halves that are imported separately,
+        until the failing records are isolated; fail(record, reason) is called for each of them.
+        A single bad record in a batch of n costs about 2 * log2(n) extra requests.
+    """
+    pending = [batch]
+    while pending:
+        batch = pending.pop()
+        try:
+            send(batch)
+        except BatchFailed, e:
+            if len(batch) == 1:
+                fail(batch[0], str(e))
+            else:
+                middle = len(batch) // 2
+                # the first half is imported first, keeping the order of records
+                pending.append(batch[middle:])
+                pending.append(batch[:middle])
+
+
+class FixedBatchSize(object):
+    """ Always sends at most max_count records and max_bytes bytes, failed batches are not retried
+    """
+
+    def __init__(self, max_count=100, max_bytes=1024 * 1024):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+
+    def succeeded(self, count, nbytes, elapsed, full=True):
+        pass
+
+    def failed(self, count, nbytes, status):
+        return False
+
+
+class ImportBatchSize(object):
+    """ Limits the number of records and the body size of an import request.
+        Both limits are scaled so that a full batch takes about target_time seconds, changing at most by factor 2
+        per batch. After a 413 or 5xx response they are halved and the batch is sent again in smaller parts.
+    """
+
+    def __init__(self, max_count=100, max_bytes=1024 * 1024, target_time=5.0, count_limit=1000,
+                 bytes_limit=16 * 1024 * 1024):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.target_time = target_time
+        self.count_limit = count_limit
+        self.bytes_limit = bytes_limit
+        self.history = []
+
+    def succeeded(self, count, nbytes, elapsed, full=True):
+        """ Records imported batch. Limits only grow after full batches
+        """
+        self.history.append((count, nbytes, elapsed, None))
+        if elapsed <= 0:
+            return
+        factor = max(0.5, min(2.0, self.target_time / elapsed))
+        if factor > 1 and not full:
+            return
+        self.max_count = max(1, min(self.count_limit, int(self.max_count * factor)))
+        self.max_bytes = max(1, min(self.bytes_limit, int(self.max_bytes * factor)))
+
+    def failed(self, count, nbytes, status):
+        """ Records batch rejected with 413 or 5xx. Returns True if the batch should be sent again in smaller parts
+        """
+        self.history.append((count, nbytes, None, status))
+        if count <= 1:
+            return False
+        self.max_count = max(1, min(self.max_count, count // 2))
+        self.max_bytes = max(1, min(self.max_bytes, nbytes // 2))
+        return True
+
+    def report(self):
+        counts = [h[0] for h in self.history if h[3] is None]
+        failures = len([h for h in self.history if h[3] is not None])
+        if not counts:
+            return 'No batches imported, %d failed' % failures
+        return 'Imported %d batches: batch size min %d, max %d records; next %d records or %d bytes; ' \
+               '%d batches failed' % (len(counts), min(counts), max(counts), self.max_count, self.max_bytes, failures)
+
+
+def import_batched(records, size_of, send, batch_size):
+    """ Packs records into batches of at most batch_size.max_count records and batch_size.max_bytes bytes
+        (a record larger than max_bytes is sent alone) and calls send(batch) for each of them.
+        Batches rejected with 413 or 5xx are packed again with the reduced limits.
+    """
+    sizes = [size_of(record) for record in records]
+    position = 0
+    while position < len(records):
+        end = position
+        nbytes = 0
+        while end < len(records) and end - position < batch_size.max_count and \
+                (end == position or nbytes + sizes[end] <= batch_size.max_bytes):
+            nbytes += sizes[end]
+            end += 1
+        batch = records[position:end]
+        started = time.time()
+        try:
+            send(batch)
+        except YouTrackException, e:
+            status = getattr(e.response, 'status', 0)
+            if (status == 413 or status >= 500) and batch_size.failed(len(batch), nbytes, status):
+                continue
+            raise
+        batch_size.succeeded(len(batch), nbytes, time.time() - started, end < len(records))
+        position = end
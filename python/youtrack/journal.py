@@ -0,0 +1,164 @@
+"""
+Durable journal of completed migration steps, so that an interrupted migration can be resumed.
+
+The journal is an append-only file with one JSON line per step. Steps are identified by project, phase
+(e.g. 'issues', 'tags', 'comments', 'fields', 'workitems', 'attachments', 'links') and key (an issue id). Besides steps, the journal keeps named values per project, the last one written wins.
+
+Example:
+    journal = Journal('migration.journal')
+    for issue in issues:
+        if not journal.done('SB', 'tags', issue.id):
+            sync_tags(issue)
+            journal.mark('SB', 'tags', issue.id)
+    journal.set('SB', 'offset', 100)
+
+Several processes may share a journal, e.g. when projects are migrated in parallel. Where fcntl is available
+the file is locked while it is read or appended to, so records of the processes are not interleaved.
+"""
+
+from __future__ import with_statement
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class Journal(object):
+    def __init__(self, path):
+        self.path = path
+        self._done = set([])
+        self._values = {}
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(path, 'a')
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        f = open(self.path, 'r+')
+        _lock_file(f)
+        try:
+            complete = 0
+            for line in f:
+                if not line.endswith('\n'):
+                    # last line of a journal that was being written when the process was killed,
+                    # it is cut off so that new records start on a line of their own
+                    f.truncate(complete)
+                    break
+                complete += len(line)
+                record = json.loads(line)
+                project = record['p']
+                if 's' in record:
+                    self._done.add((project, record['s'], record['k']))
+                elif record.get('a'):
+                    self._values.setdefault((project, record['n']), []).extend(record['v'])
+                else:
+                    self._values[(project, record['n'])] = record['v']
+        finally:
+            _unlock_file(f)
+            f.close()
+
+    def _write(self, record, sync=False):
+        self._write_all([record], sync)
+
+    def _write_all(self, records, sync=False):
+        lines = ''.join([json.dumps(record, separators=(',', ':')) + '\n' for record in records])
+        _lock_file(self._file)
+        try:
+            self._file.write(lines)
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+        finally:
+            _unlock_file(self._file)
+
+    def done(self, project, phase, key=''):
+        """ Returns True if the step was marked as completed
+        """
+        return (project, phase, unicode(key)) in self._done
+
+    def mark(self, project, phase, key=''):
+        """ Records completed step
+        """
+        key = unicode(key)
+        with self._lock:
+            if (project, phase, key) not in self._done:
+                self._done.add((project, phase, key))
+                self._write({'p': project, 's': phase, 'k': key})
+
+    def mark_all(self, project, phase, keys):
+        """ Records completed steps of phase with a single write, e.g. issues imported in one batch
+        """
+        keys = [unicode(key) for key in keys]
+        with self._lock:
+            records = []
+            for key in keys:
+                if (project, phase, key) not in self._done:
+                    self._done.add((project, phase, key))
+                    records.append({'p': project, 's': phase, 'k': key})
+            if records:
+                self._write_all(records)
+
+    def get(self, project, name, default=None):
+        return self._values.get((project, name), default)
+
+    def set(self, project, name, value):
+        """ Stores value and syncs the journal to disk, so values are suitable for checkpoints
+        """
+        with self._lock:
+            self._values[(project, name)] = value
+            self._write({'p': project, 'n': name, 'v': value}, sync=True)
+
+    def add(self, project, name, values):
+        """ Appends values to the list stored under name
+        """
+        values = list(values)
+        if not values:
+            return
+        with self._lock:
+            self._values.setdefault((project, name), []).extend(values)
+            self._write({'p': project, 'n': name, 'v': values, 'a': True})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class NullJournal(object):
+    """ Journal that remembers nothing, used when a migration is not journaled
+    """
+
+    def done(self, project, phase, key=''):
+        return False
+
+    def mark(self, project, phase, key=''):
+        pass
+
+    def mark_all(self, project, phase, keys):
+        pass
+
+    def get(self, project, name, default=None):
+        return default
+
+    def set(self, project, name, value):
+        pass
+
+    def add(self, project, name, values):
+        pass
+
+    def close(self):
+        pass
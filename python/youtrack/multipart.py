@@ -0,0 +1,133 @@
+"""
+Streaming multipart/form-data upload used for attachments.
+
+The file is read in CHUNK_SIZE pieces and written to the socket as it is read. When its length is not known
+in advance the body is sent with chunked transfer encoding; spool is used for servers that require a length.
+"""
+
+import httplib2
+import mimetools
+import mimetypes
+import socket
+import sys
+import tempfile
+import urlparse
+
+CHUNK_SIZE = 65536
+# spooled attachments larger than this are kept on disk instead of memory
+SPOOL_MEMORY_SIZE = 16 * 1024 * 1024
+
+
+class MultipartBody(object):
+    def __init__(self, name, fd, content_type=None, length=None):
+        self.fd = fd
+        self.boundary = mimetools.choose_boundary()
+        if isinstance(name, unicode):
+            name = name.encode('utf-8')
+        if content_type is None:
+            content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if isinstance(content_type, unicode):
+            content_type = content_type.encode('utf-8')
+        self.file_length = length
+        self.head = '--%s\r\n' % self.boundary
+        self.head += 'Content-Disposition: form-data; name="%s"; filename="%s";\r\n' % (name, name)
+        self.head += 'Content-Type: %s\r\n' % content_type
+        if length is not None:
+            self.head += 'Content-Length: %d\r\n' % length
+        self.head += '\r\n'
+        self.tail = '\r\n--%s--\r\n\r\n' % self.boundary
+
+    @property
+    def content_type(self):
+        return 'multipart/form-data; boundary=%s' % self.boundary
+
+    @property
+    def length(self):
+        """ Length of the whole body or None if the length of the file is unknown
+        """
+        if self.file_length is None:
+            return None
+        return len(self.head) + self.file_length + len(self.tail)
+
+    def chunks(self):
+        yield self.head
+        while True:
+            chunk = self.fd.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+        yield self.tail
+
+
+def spool(fd):
+    """ Copies fd to a temporary file, in memory while it is smaller than SPOOL_MEMORY_SIZE.
+        Returns the file positioned at start and its length
+    """
+    if hasattr(tempfile, 'SpooledTemporaryFile'):
+        tmp = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_SIZE, mode='w+b')
+    else:
+        tmp = tempfile.TemporaryFile(mode='w+b')
+    length = 0
+    while True:
+        chunk = fd.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        tmp.write(chunk)
+        length += len(chunk)
+    tmp.seek(0)
+    return tmp, length
+
+
+def post(url, headers, body, timeout=None, proxy_info=None):
+    """ Sends body to url and returns httplib.HTTPResponse.
+        proxy_info is httplib2.ProxyInfo or a function of the scheme returning it, by default the proxy
+        is read from the http_proxy and https_proxy environment variables like httplib2.Http does
+    """
+    scheme, netloc, path, params, query, fragment = urlparse.urlparse(url)
+    if proxy_info is None:
+        proxy_info = _proxy_info_from_environment
+    if callable(proxy_info):
+        proxy_info = proxy_info(scheme)
+    host = netloc.rpartition('@')[2].partition(':')[0]
+    if proxy_info is not None and hasattr(proxy_info, 'applies_to') and not proxy_info.applies_to(host):
+        proxy_info = None
+    if scheme == 'https':
+        connection = httplib2.HTTPSConnectionWithTimeout(netloc, timeout=timeout, proxy_info=proxy_info,
+                                                         disable_ssl_certificate_validation=True)
+    else:
+        connection = httplib2.HTTPConnectionWithTimeout(netloc, timeout=timeout, proxy_info=proxy_info)
+    selector = path
+    if query:
+        selector += '?' + query
+    connection.putrequest('POST', selector)
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.putheader('Content-Type', body.content_type)
+    length = body.length
+    try:
+        if length is not None:
+            connection.putheader('Content-Length', str(length))
+            connection.endheaders()
+            for chunk in body.chunks():
+                connection.send(chunk)
+        else:
+            connection.putheader('Transfer-Encoding', 'chunked')
+            connection.endheaders()
+            for chunk in body.chunks():
+                if chunk:
+                    connection.send('%x\r\n%s\r\n' % (len(chunk), chunk))
+            connection.send('0\r\n\r\n')
+    except socket.error:
+        # the server may answer before reading the whole body, e.g. with 411 to a chunked body
+        exc_info = sys.exc_info()
+        try:
+            return connection.getresponse()
+        except Exception:
+            raise exc_info[0], exc_info[1], exc_info[2]
+    return connection.getresponse()
+
+
+def _proxy_info_from_environment(scheme):
+    if hasattr(httplib2, 'proxy_info_from_environment'):
+        return httplib2.proxy_info_from_environment(scheme)
+    return httplib2.ProxyInfo.from_environment(scheme)
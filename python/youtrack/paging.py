@@ -0,0 +1,81 @@
+"""
+Page size controllers used by Connection.iterIssuePages.
+
+Example:
+    pages = AdaptivePageSize(initial=50, target_time=2.0)
+    for issues in yt.iterIssuePages('SB', '', pages):
+        ...
+    print pages.report()
+"""
+
+
+class FixedPageSize(object):
+    """ Always requests the same number of issues, failures are not retried
+    """
+    adaptive = False
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError('Page size should be positive')
+        self.size = size
+
+    def succeeded(self, requested, count, elapsed, nbytes):
+        pass
+
+    def failed(self, requested, status):
+        return False
+
+
+class AdaptivePageSize(object):
+    """ Grows or shrinks the page size so that a page takes about target_time seconds to fetch
+        and is about target_bytes long. The size changes at most by factor 2 per page.
+        After a 5xx response the size is halved and the page is requested again. Pages of minimum size
+        are retried as the retry policy of the connection allows.
+    """
+    adaptive = True
+
+    def __init__(self, initial=50, minimum=1, maximum=1000, target_time=2.0, target_bytes=2 * 1024 * 1024):
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError('Page sizes should satisfy 1 <= minimum <= initial <= maximum')
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_time = target_time
+        self.target_bytes = target_bytes
+        self.history = []
+
+    def succeeded(self, requested, count, elapsed, nbytes):
+        """ Records fetched page. Size is only tuned by full pages, the last page of a query is usually shorter
+        """
+        self.history.append((requested, count, elapsed, nbytes, None))
+        if count < requested:
+            return
+        ideal = self.maximum
+        if elapsed > 0:
+            ideal = min(ideal, self.target_time * count / elapsed)
+        if nbytes > 0:
+            ideal = min(ideal, self.target_bytes * count / float(nbytes))
+        self._resize(int(ideal))
+
+    def failed(self, requested, status):
+        """ Records failed page. Returns True if the page should be requested again with the new size
+        """
+        self.history.append((requested, 0, None, None, status))
+        if requested <= self.minimum:
+            return False
+        self._resize(requested // 2)
+        return True
+
+    def _resize(self, size):
+        size = max(self.size // 2, min(self.size * 2, size))
+        self.size = max(self.minimum, min(self.maximum, size))
+
+    def report(self):
+        """ Returns one line summary of the chosen page sizes
+        """
+        sizes = [h[0] for h in self.history if h[4] is None]
+        failures = len([h for h in self.history if h[4] is not None])
+        if not sizes:
+            return 'No pages fetched, %d failed' % failures
+        return 'Fetched %d pages: page size min %d, max %d, last %d, next %d; %d pages failed' % (
+            len(sizes), min(sizes), max(sizes), sizes[-1], self.size, failures)
@@ -0,0 +1,145 @@
+"""
+Stages processing items concurrently, connected by bounded queues.
+
+Every stage runs on its own worker threads, takes items from its queue and passes the items it returns
+to the queue of the next stage. A full queue blocks the stage before it, so a slow stage holds back
+the faster ones instead of letting work pile up in memory.
+
+Example:
+    pipeline = Pipeline([Stage('users', import_users),
+                         Stage('import', import_issues),
+                         Stage('issues', sync_issue, workers=4)])
+    try:
+        for page in source.iterIssuePages('SB'):
+            pipeline.put(page)
+        pipeline.join()
+    finally:
+        pipeline.close()
+    print pipeline.report()
+"""
+
+from __future__ import with_statement
+import sys
+import threading
+import time
+import Queue
+
+_STOP = object()
+
+
+class Stage(object):
+    """ fn(item) processes an item and returns list of items for the next stage or None.
+        queue_size limits items waiting for the stage, by default 2 per worker
+    """
+
+    def __init__(self, name, fn, workers=1, queue_size=None):
+        if workers < 1:
+            raise ValueError('Stage needs at least one worker')
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size or 2 * workers
+        self.processed = 0
+        self.busy_time = 0.0
+
+
+class Pipeline(object):
+    """ Runs items through stages. The first exception raised by a stage stops the pipeline: items still
+        queued are dropped and the exception is re-raised by the next put or join
+    """
+
+    def __init__(self, stages, name='youtrack-pipeline'):
+        if not stages:
+            raise ValueError('Pipeline needs at least one stage')
+        self.stages = stages
+        self._queues = [Queue.Queue(stage.queue_size) for stage in stages]
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._exc_info = None
+        self._closed = False
+        self._threads = []
+        for index, stage in enumerate(stages):
+            threads = []
+            for number in range(stage.workers):
+                t = threading.Thread(target=self._work, args=(index,),
+                                     name='%s-%s-%d' % (name, stage.name, number))
+                t.setDaemon(True)
+                t.start()
+                threads.append(t)
+            self._threads.append(threads)
+
+    def put(self, item):
+        """ Passes item to the first stage, blocks while its queue is full
+        """
+        self._raise_failure()
+        self._enqueue(0, item)
+
+    def join(self):
+        """ Waits until all items passed all stages
+        """
+        with self._condition:
+            while self._pending:
+                # wait with timeout keeps the main thread responsive to KeyboardInterrupt
+                self._condition.wait(0.5)
+        self._raise_failure()
+
+    def close(self):
+        """ Stops worker threads after the items already queued
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+        # a stage is stopped after the stage before it, which may still pass items to it
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                self._put(index, _STOP)
+            for t in self._threads[index]:
+                t.join()
+
+    def report(self):
+        return 'Pipeline: ' + ', '.join(['%s %d items in %.1fs' % (stage.name, stage.processed, stage.busy_time)
+                                         for stage in self.stages])
+
+    def _raise_failure(self):
+        exc_info = self._exc_info
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
+
+    def _enqueue(self, index, item):
+        with self._condition:
+            self._pending += 1
+        self._put(index, item)
+
+    def _put(self, index, item):
+        while True:
+            try:
+                self._queues[index].put(item, True, 0.5)
+                return
+            except Queue.Full:
+                pass
+
+    def _work(self, index):
+        stage = self.stages[index]
+        queue = self._queues[index]
+        while True:
+            item = queue.get()
+            if item is _STOP:
+                return
+            started = time.time()
+            try:
+                if self._exc_info is None:
+                    outputs = stage.fn(item)
+                    if outputs and index + 1 < len(self.stages):
+                        for output in outputs:
+                            self._enqueue(index + 1, output)
+            except BaseException:
+                with self._condition:
+                    if self._exc_info is None:
+                        self._exc_info = sys.exc_info()
+            with self._condition:
+                stage.processed += 1
+                stage.busy_time += time.time() - started
+                self._pending -= 1
+                if not self._pending:
+                    self._condition.notifyAll()
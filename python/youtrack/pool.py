@@ -0,0 +1,257 @@
+"""
+Thread pools used by Connection to keep several REST requests in flight
+"""
+
+from __future__ import with_statement
+import sys
+import threading
+import Queue
+import itertools
+
+
+class CancelledError(Exception):
+    pass
+
+
+class Future(object):
+    """ Result of a call scheduled on a WorkerPool
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._state = 'pending'
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def cancel(self):
+        """ Cancels the call if it has not started yet. Returns True on success
+        """
+        with self._condition:
+            if self._state == 'cancelled':
+                return True
+            if self._state != 'pending':
+                return False
+            self._state = 'cancelled'
+            self._condition.notifyAll()
+        self._invoke_callbacks()
+        return True
+
+    def cancelled(self):
+        return self._state == 'cancelled'
+
+    def running(self):
+        return self._state == 'running'
+
+    def done(self):
+        return self._state in ('cancelled', 'finished')
+
+    def result(self, timeout=None):
+        self._wait(timeout)
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        self._wait(timeout)
+        if self._exc_info is not None:
+            return self._exc_info[1]
+        return None
+
+    def add_done_callback(self, fn):
+        with self._condition:
+            if not self.done():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def set_running(self):
+        """ Marks the future as running. Returns False if it was cancelled before
+        """
+        with self._condition:
+            if self._state != 'pending':
+                return False
+            self._state = 'running'
+            return True
+
+    def set_result(self, result):
+        with self._condition:
+            self._result = result
+            self._state = 'finished'
+            self._condition.notifyAll()
+        self._invoke_callbacks()
+
+    def set_exception(self, exc_info):
+        with self._condition:
+            self._exc_info = exc_info
+            self._state = 'finished'
+            self._condition.notifyAll()
+        self._invoke_callbacks()
+
+    def _wait(self, timeout):
+        with self._condition:
+            if timeout is None:
+                while not self.done():
+                    self._condition.wait()
+            elif not self.done():
+                self._condition.wait(timeout)
+            if self._state == 'cancelled':
+                raise CancelledError()
+            if self._state != 'finished':
+                raise RuntimeError('Timed out waiting for result')
+
+    def _invoke_callbacks(self):
+        for fn in self._callbacks:
+            try:
+                fn(self)
+            except Exception:
+                pass
+        self._callbacks = []
+
+
+class WorkerPool(object):
+    """ Fixed set of daemon threads executing submitted calls in FIFO order
+    """
+
+    def __init__(self, workers, name='youtrack-worker'):
+        if workers < 1:
+            raise ValueError('Pool needs at least one worker')
+        self.workers = workers
+        self._name = name
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('Cannot submit to a pool after shutdown')
+            self._start_workers()
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def map(self, fn, *iterables):
+        """ Same as itertools.imap(fn, *iterables) but calls are executed on the pool.
+            Results are yielded in order; at most 2 * workers calls are queued at a time.
+        """
+        window = []
+        for args in itertools.izip(*iterables):
+            window.append(self.submit(fn, *args))
+            if len(window) >= 2 * self.workers:
+                yield window.pop(0).result()
+        while window:
+            yield window.pop(0).result()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for t in threads:
+                t.join()
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._work, name='%s-%d' % (self._name, len(self._threads)))
+            t.setDaemon(True)
+            t.start()
+            self._threads.append(t)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                future.set_exception(sys.exc_info())
+            else:
+                future.set_result(result)
+
+
+class ObjectPool(object):
+    """ Bounded pool of reusable objects (e.g. httplib2.Http instances).
+        Objects are created lazily by factory, at most size of them exist at once.
+    """
+
+    def __init__(self, size, factory):
+        if size < 1:
+            raise ValueError('Pool size should be positive')
+        self.size = size
+        self._factory = factory
+        self._idle = []
+        self._created = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while not self._idle and self._created >= self.size:
+                self._condition.wait()
+            if self._idle:
+                # LIFO keeps recently used keep-alive connections warm
+                return self._idle.pop()
+            self._created += 1
+        try:
+            return self._factory()
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, obj):
+        with self._condition:
+            self._idle.append(obj)
+            self._condition.notify()
+
+
+def prefetch(iterable, depth=1, name='youtrack-prefetch'):
+    """ Iterates over iterable on a background thread, so that up to depth next items are produced
+        while the consumer processes the current one. Exceptions are re-raised in the consumer.
+    """
+    queue = Queue.Queue(depth)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.isSet():
+            try:
+                queue.put(item, True, 0.1)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(('item', item)):
+                    return
+        except BaseException:
+            put(('error', sys.exc_info()))
+        else:
+            put(('end', None))
+
+    t = threading.Thread(target=produce, name=name)
+    t.setDaemon(True)
+    t.start()
+    try:
+        while True:
+            kind, value = queue.get()
+            if kind == 'end':
+                return
+            if kind == 'error':
+                raise value[0], value[1], value[2]
+            yield value
+    finally:
+        # consumer stopped early, let the producer thread exit
+        stopped.set()
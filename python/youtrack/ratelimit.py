@@ -0,0 +1,88 @@
+"""
+Client side rate limiting of requests to YouTrack.
+
+Limits are registered per server, see youtrack.servers, and shared by all Connections of the process that
+talk to it, including connections created after the limit was set.
+
+Example:
+    set_rate_limit('http://localhost:8081', reads_per_second=20, writes_per_second=5)
+    yt = Connection('http://localhost:8081', 'root', 'root')
+"""
+
+from __future__ import with_statement
+import threading
+import time
+from youtrack.servers import ServerRegistry
+
+_limiters = ServerRegistry()
+
+
+class TokenBucket(object):
+    """ Allows rate requests per second on average and bursts of up to burst requests
+    """
+
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError('Rate should be positive')
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, rate))
+        self._tokens = self.burst
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """ Takes one token, sleeping until it is available. Returns time spent waiting
+        """
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # the token is reserved right away, so that waiting threads are served in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimiter(object):
+    """ Separate token buckets for reads (GET, HEAD) and writes (all other methods).
+        None rate means the kind of requests is not limited.
+    """
+    read_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, reads_per_second=None, writes_per_second=None, read_burst=None, write_burst=None):
+        self.reads = None
+        self.writes = None
+        if reads_per_second:
+            self.reads = TokenBucket(reads_per_second, read_burst)
+        if writes_per_second:
+            self.writes = TokenBucket(writes_per_second, write_burst)
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, method):
+        if method.upper() in self.read_methods:
+            bucket = self.reads
+        else:
+            bucket = self.writes
+        if bucket is not None:
+            waited = bucket.acquire()
+            with self._lock:
+                self.waited += waited
+
+
+def set_rate_limit(url, reads_per_second=None, writes_per_second=None, read_burst=None, write_burst=None):
+    """ Limits requests of all Connections of this process to the server at url. Returns the new RateLimiter
+    """
+    return _limiters.set(url, RateLimiter(reads_per_second, writes_per_second, read_burst, write_burst))
+
+
+def remove_rate_limit(url):
+    _limiters.remove(url)
+
+
+def get_rate_limiter(url):
+    """ Returns RateLimiter registered for the server request url goes to or None
+    """
+    return _limiters.get(url)
@@ -0,0 +1,191 @@
+"""
+Retry policy used by Connection for failed requests.
+
+Circuit breakers are registered per server like rate limits, see youtrack.servers, so all Connections of
+the process that talk to a server pause together when it fails.
+
+Example:
+    set_circuit_breaker('http://localhost:8081', CircuitBreaker(failure_threshold=10))
+    policy = RetryPolicy(max_attempts=5, backoff=2.0)
+    yt = Connection('http://localhost:8081', 'root', 'root', retry_policy=policy)
+"""
+
+from __future__ import with_statement
+import calendar
+import errno
+import random
+import re
+import socket
+import threading
+import time
+from email.utils import parsedate_tz
+from youtrack.servers import ServerRegistry
+
+_breakers = ServerRegistry()
+
+
+class CircuitBreaker(object):
+    """ Pauses all requests after failure_threshold server errors in a row. After reset_timeout seconds
+        one request is let through as a probe: if it succeeds requests continue, otherwise they are paused again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._open_until = 0
+        self._probe_started = 0
+        self._condition = threading.Condition()
+
+    def before_request(self):
+        """ Blocks while the circuit is open
+        """
+        with self._condition:
+            while True:
+                now = time.time()
+                if self.state == 'closed':
+                    return
+                if self.state == 'open':
+                    if now >= self._open_until:
+                        self._start_probe(now)
+                        return
+                    self._condition.wait(self._open_until - now)
+                elif now - self._probe_started >= self.reset_timeout:
+                    # the probe did not report back, let another one through
+                    self._start_probe(now)
+                    return
+                else:
+                    self._condition.wait(self.reset_timeout)
+
+    def record_success(self):
+        with self._condition:
+            self._failures = 0
+            if self.state != 'closed':
+                self.state = 'closed'
+                self._condition.notifyAll()
+
+    def record_failure(self):
+        with self._condition:
+            self._failures += 1
+            if self.state == 'half-open' or self._failures >= self.failure_threshold:
+                if self.state == 'closed':
+                    print 'Server seems to be down, pausing requests for %d seconds' % self.reset_timeout
+                self.state = 'open'
+                self._open_until = time.time() + self.reset_timeout
+                self._condition.notifyAll()
+
+    def _start_probe(self, now):
+        self.state = 'half-open'
+        self._probe_started = now
+
+
+def set_circuit_breaker(url, breaker):
+    """ Makes all Connections of this process to the server at url share breaker. Returns breaker
+    """
+    return _breakers.set(url, breaker)
+
+
+def remove_circuit_breaker(url):
+    _breakers.remove(url)
+
+
+def get_circuit_breaker(url):
+    """ Returns CircuitBreaker of the server at url, registering a default one if there is none
+    """
+    breaker = _breakers.get(url)
+    if breaker is None:
+        breaker = _breakers.setdefault(url, CircuitBreaker)
+    return breaker
+
+
+def is_connect_error(e):
+    """ Returns True if socket error e happened before the request was sent
+    """
+    if isinstance(e, socket.gaierror):
+        return True
+    return isinstance(e, socket.error) and getattr(e, 'errno', None) in (errno.ECONNREFUSED, errno.EHOSTUNREACH,
+                                                                          errno.ENETUNREACH)
+
+
+class RetryPolicy(object):
+    """ Decides which failed requests are repeated and how long to wait before the next attempt.
+
+        Requests failed with server errors (retry_statuses and connection errors) are attempted up to max_attempts
+        times with exponential backoff and random jitter, or after the delay the server asked for in Retry-After. Only idempotent
+        methods are retried unless retry_non_idempotent is set. Requests matching non_idempotent_requests, e.g.
+        PUT /issue creating an issue, are not idempotent either. Requests which could not connect at all are
+        retried whatever their method. Auth failures are retried max_auth_attempts times after logging in again.
+        Throttled requests (throttle_statuses) are retried but do not count as failures for the circuit breaker.
+        breaker is CircuitBreaker of the connections using the policy, by default they use the breaker of
+        their server, see get_circuit_breaker.
+    """
+    idempotent_methods = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+    # (method, url pattern) of requests which repeated would do the work twice
+    non_idempotent_requests = (('PUT', r'/issue/?(\?|$)'),)
+
+    def __init__(self, max_attempts=5, backoff=1.0, max_backoff=60.0, jitter=0.5,
+                 retry_statuses=(429, 500, 502, 503, 504), auth_statuses=(401, 403), max_auth_attempts=2,
+                 retry_non_idempotent=False, max_retry_after=300.0, breaker=None, throttle_statuses=(429,)):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = retry_statuses
+        self.throttle_statuses = throttle_statuses
+        self.auth_statuses = auth_statuses
+        self.max_auth_attempts = max_auth_attempts
+        self.retry_non_idempotent = retry_non_idempotent
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker
+
+    def is_server_error(self, status):
+        return status in self.retry_statuses
+
+    def is_auth_error(self, status):
+        return status in self.auth_statuses
+
+    def is_throttled(self, status):
+        return status in self.throttle_statuses
+
+    def is_idempotent(self, method, url=None):
+        method = method.upper()
+        if self.retry_non_idempotent:
+            return True
+        if method not in self.idempotent_methods:
+            return False
+        path = (url or '').split('/rest', 1)[-1]
+        for m, pattern in self.non_idempotent_requests:
+            if m == method and re.match(pattern, path):
+                return False
+        return True
+
+    def should_retry(self, method, attempt, url=None, connect_error=False):
+        """ attempt is the number of already failed attempts, connect_error tells that the request
+            did not reach the server
+        """
+        if attempt >= self.max_attempts:
+            return False
+        return connect_error or self.is_idempotent(method, url)
+
+    def delay(self, attempt, response=None):
+        """ Seconds to wait after attempt failed attempts, response is None for connection errors
+        """
+        retry_after = self._retry_after(response)
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return delay + random.uniform(0, delay * self.jitter)
+
+    def _retry_after(self, response):
+        if response is None or not response.has_key('retry-after'):
+            return None
+        value = response['retry-after'].strip()
+        if value.isdigit():
+            seconds = int(value)
+        else:
+            date = parsedate_tz(value)
+            if date is None:
+                return None
+            seconds = calendar.timegm(date[:9]) - (date[9] or 0) - time.time()
+        return max(0, min(self.max_retry_after, seconds))
@@ -0,0 +1,72 @@
+"""
+Registry of objects shared by all Connections of the process that talk to the same YouTrack server.
+
+A server is identified by scheme, host, port and base path of its URL, so YouTracks deployed under different
+paths of one host are told apart. Request URLs are matched to the server with the longest base path
+they start with.
+
+Example:
+    limiters = ServerRegistry()
+    limiters.set('http://localhost:8081/youtrack', RateLimiter(20, 5))
+    limiters.get('http://localhost:8081/youtrack/rest/issue/SB-1')   # the limiter above
+"""
+
+from __future__ import with_statement
+import threading
+import urlparse
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def server_key(url):
+    """ Returns (scheme, host, port, base path) of url, with the default port of scheme filled in
+    """
+    parts = urlparse.urlparse(url)
+    scheme = parts[0].lower()
+    netloc = parts[1].rpartition('@')[2].lower()
+    port = DEFAULT_PORTS.get(scheme)
+    # the port follows the last colon that is not part of an IPv6 address
+    if netloc.rfind(':') > netloc.rfind(']'):
+        netloc, _, port_string = netloc.rpartition(':')
+        if port_string.isdigit():
+            port = int(port_string)
+    return scheme, netloc, port, parts[2].rstrip('/')
+
+
+class ServerRegistry(object):
+    def __init__(self):
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def set(self, url, obj):
+        with self._lock:
+            self._objects[server_key(url)] = obj
+        return obj
+
+    def remove(self, url):
+        with self._lock:
+            self._objects.pop(server_key(url), None)
+
+    def get(self, url):
+        """ Returns object registered for the server url belongs to or None
+        """
+        scheme, host, port, path = server_key(url)
+        with self._lock:
+            found = None
+            for (s, h, p, base), obj in self._objects.items():
+                if (s, h, p) != (scheme, host, port) or not (path == base or path.startswith(base + '/')):
+                    continue
+                if found is None or len(base) > len(found[0]):
+                    found = (base, obj)
+        if found is None:
+            return None
+        return found[1]
+
+    def setdefault(self, url, factory):
+        """ Returns object registered for url exactly, registering factory() if there is none
+        """
+        key = server_key(url)
+        with self._lock:
+            if key not in self._objects:
+                self._objects[key] = factory()
+            return self._objects[key]
@@ -0,0 +1,173 @@
+"""
+Per-endpoint statistics of requests sent by a Connection.
+
+Requests are grouped by method and endpoint template, the URL path with issue ids, project ids, logins
+and other names replaced by placeholders, e.g. GET /issue/{id}/comment.
+
+Example:
+    yt = Connection('http://localhost:8081', 'root', 'root')
+    ...
+    print yt.request_stats.report()
+    for (method, endpoint), s in yt.stats().items():
+        print method, endpoint, s['calls'], s['time']
+"""
+
+from __future__ import with_statement
+import re
+import threading
+
+# upper bounds of latency histogram buckets in seconds, the last bucket takes everything slower
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# path segment following one of these is a name or an id
+_NAMED_SEGMENTS = {
+    'issue': '{id}',
+    'project': '{project}',
+    'byproject': '{project}',
+    'issues': '{project}',
+    'user': '{login}',
+    'group': '{group}',
+    'role': '{role}',
+    'permission': '{permission}',
+    'field': '{field}',
+    'customfield': '{field}',
+    'comment': '{comment}',
+    'attachment': '{attachment}',
+    'file': '{attachment}',
+    'workitem': '{workitem}',
+    'import': '{project}',
+    'tag': '{tag}',
+    'linktype': '{linktype}',
+    'issuelinktype': '{linktype}',
+    'bundle': '{bundle}',
+    'enumbundle': '{bundle}',
+    'ownedfieldbundle': '{bundle}',
+    'versionbundle': '{bundle}',
+    'buildbundle': '{bundle}',
+    'statebundle': '{bundle}',
+    'userbundle': '{bundle}',
+    'version': '{version}',
+    'build': '{build}',
+    'subsystem': '{subsystem}',
+}
+
+# segments that are parts of the REST API, never names
+_LITERAL_SEGMENTS = set([
+    'all', 'login', 'execute', 'intellisense', 'counts', 'current', 'issue', 'issues', 'users', 'links',
+    'link', 'project', 'user', 'group', 'role', 'field', 'customfield', 'customfieldsettings', 'bundle',
+    'enumbundle', 'ownedfieldbundle', 'versionbundle', 'buildbundle', 'statebundle', 'userbundle',
+    'timetracking', 'workitem', 'workitems', 'permission', 'attachment', 'comment', 'history', 'changes',
+    'assignee', 'byproject', 'search', 'tag', 'linktype', 'issuelinktype', 'version', 'build', 'subsystem',
+])
+
+_ID = re.compile(r'^([A-Za-z][\w]*-\d+|\d+|[0-9a-f]{8,}|\d+-\d+)$')
+
+
+def endpoint_template(url, base_url=None):
+    """ Returns URL path without query and with names and ids replaced by placeholders
+    """
+    if base_url and url.startswith(base_url):
+        url = url[len(base_url):]
+    path = url.split('?', 1)[0]
+    result = []
+    previous = None
+    for segment in path.split('/'):
+        lower = segment.lower()
+        if segment and previous in _NAMED_SEGMENTS and lower not in _LITERAL_SEGMENTS:
+            result.append(_NAMED_SEGMENTS[previous])
+        elif _ID.match(segment):
+            result.append('{id}')
+        else:
+            result.append(segment)
+        previous = lower
+    return '/'.join(result)
+
+
+class EndpointStats(object):
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.time = 0.0
+        self.max_time = 0.0
+        self.statuses = {}
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, status, bytes_out, bytes_in, elapsed):
+        self.calls += 1
+        if status is None or status >= 400:
+            self.errors += 1
+        self.bytes_out += bytes_out
+        self.bytes_in += bytes_in
+        self.time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS) and elapsed > LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    def percentile(self, fraction):
+        """ Returns upper bound of the histogram bucket containing the given fraction of calls, None for the last
+        """
+        if not self.calls:
+            return 0.0
+        needed = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= needed:
+                if bucket < len(LATENCY_BUCKETS):
+                    return LATENCY_BUCKETS[bucket]
+                return None
+        return None
+
+    def snapshot(self):
+        return {'calls': self.calls, 'errors': self.errors, 'bytes_out': self.bytes_out, 'bytes_in': self.bytes_in,
+                'time': self.time, 'max_time': self.max_time, 'statuses': dict(self.statuses),
+                'histogram': list(self.histogram)}
+
+
+class RequestStats(object):
+    """ Thread safe collection of EndpointStats by (method, endpoint template)
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, template, status, bytes_out, bytes_in, elapsed):
+        with self._lock:
+            key = (method, template)
+            if key not in self._endpoints:
+                self._endpoints[key] = EndpointStats()
+            self._endpoints[key].record(status, bytes_out, bytes_in, elapsed)
+
+    def snapshot(self):
+        """ Returns {(method, template): dict of calls, errors, bytes_out, bytes_in, time, max_time,
+            statuses and histogram counts of LATENCY_BUCKETS}
+        """
+        with self._lock:
+            return dict([(key, s.snapshot()) for key, s in self._endpoints.items()])
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def report(self):
+        """ Returns table of endpoints sorted by total time
+        """
+        with self._lock:
+            items = sorted(self._endpoints.items(), key=lambda item: -item[1].time)
+            lines = ['%-7s %-50s %7s %6s %10s %10s %9s %7s %7s' % (
+                'method', 'endpoint', 'calls', 'errors', 'sent', 'received', 'time', 'avg', 'p95')]
+            for (method, template), s in items:
+                p95 = s.percentile(0.95)
+                if p95 is None:
+                    p95 = '>%g' % LATENCY_BUCKETS[-1]
+                else:
+                    p95 = '%g' % p95
+                lines.append('%-7s %-50s %7d %6d %10d %10d %9.2f %7.3f %7s' % (
+                    method, template, s.calls, s.errors, s.bytes_out, s.bytes_in, s.time, s.time / s.calls, p95))
+            return '\n'.join(lines)
@@ -0,0 +1,355 @@
+"""
+XML parser backends used to build YouTrackObjects from REST responses.
+
+YouTrackObject and its subclasses are written against the xml.dom.minidom API. The 'minidom' backend
+returns real minidom documents, the ElementTree based backends ('cElementTree', 'lxml', 'ElementTree')
+parse with the C accelerated parsers and wrap elements into light read-only objects that provide
+the same subset of the minidom API (documentElement, childNodes, attributes, getAttribute,
+getElementsByTagName, tagName, nodeType, data, toxml).
+
+Example:
+    import youtrack.xmlparser
+    youtrack.xmlparser.set_backend('lxml')
+"""
+
+from StringIO import StringIO
+from xml.dom import Node
+from xml.dom import minidom
+from xml.dom import pulldom
+from xml.dom.minicompat import NodeList
+from xml.sax.saxutils import escape
+
+_backends = {}
+_backend = None
+
+
+def _u(s):
+    # ElementTree returns str for pure ASCII text in python 2, minidom always returns unicode
+    if s.__class__ is str:
+        return unicode(s)
+    return s
+
+
+class MinidomBackend(object):
+    name = 'minidom'
+
+    def parseString(self, content):
+        return minidom.parseString(content)
+
+    def iterChildElements(self, content):
+        # children of the root element are expanded one at a time and never attached to the root,
+        # so each of them can be freed as soon as it was processed
+        events = pulldom.parseString(content)
+        depth = 0
+        for event, node in events:
+            if event == pulldom.START_ELEMENT:
+                if depth == 1:
+                    events.expandNode(node)
+                    yield node
+                else:
+                    depth += 1
+            elif event == pulldom.END_ELEMENT:
+                depth -= 1
+
+
+class ElementTreeBackend(object):
+    def __init__(self, name, etree):
+        self.name = name
+        self.etree = etree
+
+    def parseString(self, content):
+        namespaces = {}
+        root = None
+        for event, item in self.etree.iterparse(StringIO(content), events=('start', 'start-ns')):
+            if event == 'start-ns':
+                namespaces[_u(item[1])] = _u(item[0])
+            elif root is None:
+                root = item
+        # iterparse has consumed the whole input by now
+        return Document(self, root, namespaces)
+
+    def iterChildElements(self, content):
+        namespaces = {}
+        root = None
+        depth = 0
+        for event, item in self.etree.iterparse(StringIO(content), events=('start', 'end', 'start-ns')):
+            if event == 'start-ns':
+                namespaces[_u(item[1])] = _u(item[0])
+            elif event == 'start':
+                if root is None:
+                    root = item
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 1:
+                    yield Element(self, item, namespaces)
+                    root.clear()
+
+    def tostring(self, el):
+        # the tail belongs to the parent element in minidom terms
+        tail = el.tail
+        el.tail = None
+        try:
+            xml = _u(self.etree.tostring(el, encoding='utf-8'))
+        finally:
+            el.tail = tail
+        if xml.startswith(u'<?xml'):
+            xml = xml.split(u'?>', 1)[1].lstrip()
+        return xml
+
+    def index_descendants(self, el):
+        """ Returns dict mapping tag to list of all descendant elements with that tag in document order
+        """
+        index = {}
+        if self.name == 'lxml':
+            walk = [e for e in el.iter() if e is not el and isinstance(e.tag, basestring)]
+        else:
+            # iter of python 2 ElementTree is a recursive python generator, a flat walk is several times faster
+            walk = []
+            pending = list(el)
+            pending.reverse()
+            while pending:
+                e = pending.pop()
+                walk.append(e)
+                if len(e):
+                    children = list(e)
+                    children.reverse()
+                    pending.extend(children)
+        for e in walk:
+            index.setdefault(e.tag, []).append(e)
+        index[None] = walk
+        return index
+
+
+class Document(object):
+    nodeType = Node.DOCUMENT_NODE
+    nodeName = '#document'
+
+    def __init__(self, backend, root, namespaces):
+        self.documentElement = Element(backend, root, namespaces)
+
+    @property
+    def childNodes(self):
+        return NodeList([self.documentElement])
+
+    @property
+    def firstChild(self):
+        return self.documentElement
+
+    def getElementsByTagName(self, name):
+        result = NodeList()
+        if name in ('*', self.documentElement.tagName):
+            result.append(self.documentElement)
+        result.extend(self.documentElement.getElementsByTagName(name))
+        return result
+
+    def toxml(self, encoding=None):
+        xml = u'<?xml version="1.0" ?>' + self.documentElement.toxml()
+        if encoding is not None:
+            return xml.encode(encoding)
+        return xml
+
+
+class Element(object):
+    __slots__ = ('_backend', '_el', '_namespaces', '_childNodes', '_attributes', '_descendants', 'tagName', 'nodeName')
+    nodeType = Node.ELEMENT_NODE
+
+    def __init__(self, backend, el, namespaces):
+        self._backend = backend
+        self._el = el
+        self._namespaces = namespaces
+        self._childNodes = None
+        self._attributes = None
+        self._descendants = None
+        self.tagName = self.nodeName = self._qname(el.tag)
+
+    def _qname(self, name):
+        # ElementTree stores '{uri}local' names, minidom keeps the prefix used in the document
+        name = _u(name)
+        if name[0] == u'{':
+            uri, local = name[1:].split(u'}', 1)
+            prefix = self._namespaces.get(uri)
+            if prefix:
+                return prefix + u':' + local
+            return local
+        return name
+
+    def _clark(self, qname):
+        if ':' in qname:
+            prefix, local = qname.split(u':', 1)
+            for uri, p in self._namespaces.items():
+                if p == prefix:
+                    return u'{%s}%s' % (uri, local)
+        return qname
+
+    @property
+    def attributes(self):
+        if self._attributes is None:
+            self._attributes = Attributes(self)
+        return self._attributes
+
+    @property
+    def childNodes(self):
+        if self._childNodes is None:
+            nodes = NodeList()
+            if self._el.text:
+                nodes.append(Text(self._el.text))
+            for child in self._el:
+                if not isinstance(child.tag, basestring):
+                    # comments and processing instructions of lxml
+                    continue
+                nodes.append(Element(self._backend, child, self._namespaces))
+                if child.tail:
+                    nodes.append(Text(child.tail))
+            self._childNodes = nodes
+        return self._childNodes
+
+    @property
+    def firstChild(self):
+        nodes = self.childNodes
+        if len(nodes):
+            return nodes[0]
+        return None
+
+    def hasChildNodes(self):
+        return bool(len(self.childNodes))
+
+    def getAttribute(self, name):
+        return _u(self._el.get(self._clark(name), u''))
+
+    def hasAttribute(self, name):
+        return self._clark(name) in self._el.attrib
+
+    def getElementsByTagName(self, name):
+        # models look up several tags in the same element, so all descendants are indexed at once
+        if self._descendants is None:
+            self._descendants = self._backend.index_descendants(self._el)
+        tag = None if name == '*' else self._clark(name)
+        return NodeList([Element(self._backend, e, self._namespaces) for e in self._descendants.get(tag, ())])
+
+    def toxml(self, encoding=None):
+        xml = self._backend.tostring(self._el)
+        if encoding is not None:
+            return xml.encode(encoding)
+        return xml
+
+
+class Attr(object):
+    __slots__ = ('name', 'nodeName', 'value', 'nodeValue')
+    nodeType = Node.ATTRIBUTE_NODE
+
+    def __init__(self, name, value):
+        self.name = self.nodeName = name
+        self.value = self.nodeValue = value
+
+
+class Attributes(object):
+    def __init__(self, element):
+        self._items = [Attr(element._qname(k), _u(v)) for k, v in element._el.attrib.items()]
+
+    @property
+    def length(self):
+        return len(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def item(self, index):
+        if 0 <= index < len(self._items):
+            return self._items[index]
+        return None
+
+    def __getitem__(self, name):
+        for a in self._items:
+            if a.name == name:
+                return a
+        raise KeyError(name)
+
+    def has_key(self, name):
+        return name in self.keys()
+
+    __contains__ = has_key
+
+    def keys(self):
+        return [a.name for a in self._items]
+
+    def items(self):
+        return [(a.name, a.value) for a in self._items]
+
+
+class Text(object):
+    __slots__ = ('data', 'nodeValue')
+    nodeType = Node.TEXT_NODE
+    nodeName = '#text'
+
+    def __init__(self, data):
+        self.data = self.nodeValue = _u(data)
+
+    def toxml(self, encoding=None):
+        xml = escape(self.data)
+        if encoding is not None:
+            return xml.encode(encoding)
+        return xml
+
+
+def _register(name, loader):
+    try:
+        _backends[name] = loader()
+    except ImportError:
+        pass
+
+
+def _load_lxml():
+    from lxml import etree
+    return ElementTreeBackend('lxml', etree)
+
+
+def _load_c_element_tree():
+    import xml.etree.cElementTree as etree
+    return ElementTreeBackend('cElementTree', etree)
+
+
+def _load_element_tree():
+    import xml.etree.ElementTree as etree
+    return ElementTreeBackend('ElementTree', etree)
+
+
+_register('minidom', MinidomBackend)
+_register('lxml', _load_lxml)
+_register('cElementTree', _load_c_element_tree)
+_register('ElementTree', _load_element_tree)
+
+
+def available_backends():
+    return sorted(_backends.keys())
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(name):
+    """ Selects backend used by parseString and iterChildElements: 'cElementTree', 'lxml', 'ElementTree'
+        or 'minidom'. Raises ValueError if the backend is not available.
+    """
+    global _backend
+    if name not in _backends:
+        raise ValueError('XML parser backend [ %s ] is not available, use one of %s' %
+                         (name, ', '.join(available_backends())))
+    _backend = _backends[name]
+
+
+def parseString(content):
+    return _backend.parseString(content)
+
+
+def iterChildElements(content):
+    """ Yields children of the root element one by one, see MinidomBackend.iterChildElements
+    """
+    return _backend.iterChildElements(content)
+
+
+for _name in ('cElementTree', 'lxml', 'ElementTree', 'minidom'):
+    if _name in _backends:
+        set_backend(_name)
+        break
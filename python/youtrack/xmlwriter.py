@@ -0,0 +1,57 @@
+"""
+Incremental writer of XML request bodies (import of issues, users, links and work items).
+
+Parts are collected in a list and joined once, so the cost is linear in the size of the document.
+Positions returned by tell() let callers get back the text of a single record, e.g. for error reports.
+"""
+
+from xml.sax.saxutils import escape, quoteattr
+
+
+def _str(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if not isinstance(value, str):
+        return str(value)
+    return value
+
+
+class XmlWriter(object):
+    def __init__(self):
+        self._parts = []
+
+    def write(self, markup):
+        """ Appends markup as is
+        """
+        self._parts.append(_str(markup))
+
+    def text(self, value):
+        """ Appends escaped character data
+        """
+        self._parts.append(escape(_str(value)))
+
+    def attribute(self, name, value):
+        """ Appends ' name="value"'
+        """
+        self._parts.append(' %s=%s' % (_str(name), quoteattr(_str(value))))
+
+    def element(self, tag, value):
+        """ Appends <tag>value</tag>
+        """
+        self._parts.append('<%s>%s</%s>' % (tag, escape(_str(value)), tag))
+
+    def tell(self):
+        return len(self._parts)
+
+    def getvalue(self, start=0, end=None):
+        """ Returns utf-8 encoded document, or its part written between positions start and end
+        """
+        return ''.join(self._parts[start:end])
+
+    def size(self, start=0, end=None):
+        """ Returns length in bytes of the document part written between positions start and end
+        """
+        return sum([len(part) for part in self._parts[start:end]])
+
+    def __len__(self):
+        return self.size()
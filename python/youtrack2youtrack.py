@@ -4,6 +4,18 @@
 import os
 import sys
 from youtrack.connection import Connection, youtrack, utf8encode
+from youtrack.paging import AdaptivePageSize
+from youtrack.cache import ResponseCache
+from youtrack.ratelimit import set_rate_limit
+from youtrack.attachments import AttachmentPipeline
+from youtrack.attachment_cache import AttachmentCache
+from youtrack.cassette import use_cassette
+from youtrack.commands import braced
+from youtrack.journal import Journal, NullJournal
+from youtrack.pipeline import Pipeline, Stage
+from youtrack.pool import Future
+from youtrack.directory import UserDirectory
+import threading
 import traceback
 
 from sync.users import UserImporter
@@ -12,11 +24,15 @@ from sync.links import LinkImporter
 import re
 import getopt
 import datetime
+import multiprocessing
 
 convert_period_values = False
 days_in_a_week = 5
 hours_in_a_day = 8
 
+STAGES = ('fetch', 'users', 'import', 'issues')
+DEFAULT_STAGE_WORKERS = {'fetch': 2, 'users': 1, 'import': 1, 'issues': 4}
+
 
 def usage():
     print """
@@ -43,6 +59,32 @@ Options:
     -p,  Covert period values (used as workaroud for JT-19362)
     -t TIME_SETTINGS,
          Time Tracking settings in format "days_in_a_week:hours_in_a_day"
+    -j ATTACHMENT_WORKERS,
+         Number of attachments transferred in parallel (default 4)
+    -P FETCH:USERS:IMPORT:ISSUES,
+         Concurrency of migration stages: pages fetched ahead from the source, workers
+         importing users, workers importing issues and workers syncing tags, comments,
+         fields, work items and attachments of single issues (default 2:1:1:4)
+    -C CACHE_DIR[:SIZE_MB],
+         Keep downloaded attachments in CACHE_DIR (at most SIZE_MB, default 10240),
+         so that re-runs do not download them again
+    -l RATE_LIMIT,
+         Requests per second allowed to each YouTrack in format "reads:writes",
+         empty value means no limit
+    -J JOURNAL,
+         Record progress to JOURNAL file; a run with the same JOURNAL continues
+         where an interrupted one stopped. Can not be combined with -D
+    -D DELTA_STATE,
+         Delta mode: sync only issues updated since the previous run with the same
+         DELTA_STATE file, which keeps the last update time seen in every project.
+         Can not be combined with -J: an interrupted delta run is repeated by the
+         next one, which starts from the update time of the last complete run
+    --jobs N,
+         Migrate up to N projects at the same time in separate processes, after
+         custom fields and project leads of all projects are created
+    -R record:CASSETTE | replay:CASSETTE[:LATENCY_MS],
+         Record all requests to both YouTrack instances to CASSETTE file,
+         or replay them from it without network access (for benchmarks)
 """ % os.path.basename(sys.argv[0])
 
 
@@ -53,7 +95,7 @@ def main():
     attachments_only = False
     try:
         params = {}
-        opts, args = getopt.getopt(sys.argv[1:], 'hanrcdfpt:T')
+        opts, args = getopt.getopt(sys.argv[1:], 'hanrcdfpt:Tl:j:C:R:J:D:P:', ['jobs='])
         for opt, val in opts:
             if opt == '-h':
                 usage()
@@ -83,6 +125,30 @@ def main():
                         hours_in_a_day = int(h)
                 else:
                     days_in_a_week = int(val)
+            elif opt == '-C':
+                if ':' in val and val.rpartition(':')[2].isdigit():
+                    val, _, size = val.rpartition(':')
+                    params['attachment_cache_size'] = int(size)
+                params['attachment_cache_dir'] = val
+            elif opt == '-j':
+                params['attachment_workers'] = int(val)
+            elif opt == '-P':
+                params['stage_workers'] = val
+            elif opt == '-l':
+                reads, _, writes = val.partition(':')
+                params['rate_limit'] = (float(reads or 0) or None, float(writes or 0) or None)
+            elif opt == '-J':
+                params['journal'] = val
+            elif opt == '--jobs':
+                params['jobs'] = int(val)
+            elif opt == '-D':
+                params['delta_state'] = val
+            elif opt == '-R':
+                mode, _, path = val.partition(':')
+                latency = 0
+                if mode == 'replay' and ':' in path and path.rpartition(':')[2].isdigit():
+                    path, _, latency = path.rpartition(':')
+                params['cassette'] = (path, mode, int(latency) / 1000.0)
         (source_url, source_login, source_password,
          target_url, target_login, target_password) = args[:6]
         project_ids = args[6:]
@@ -94,6 +160,19 @@ def main():
         print 'Not enough arguments'
         usage()
         sys.exit(1)
+    if params.get('journal') and params.get('delta_state'):
+        # a journal would mark projects done for later delta runs, which select other issues
+        print 'Journal (-J) can not be combined with delta mode (-D)'
+        usage()
+        sys.exit(1)
+    if 'rate_limit' in params:
+        for url in (source_url, target_url):
+            set_rate_limit(url, *params['rate_limit'])
+    if 'cassette' in params:
+        if params['cassette'][1] == 'record' and params.get('jobs', 1) > 1:
+            print 'Requests of several processes can not be recorded to one cassette, use --jobs 1'
+            sys.exit(1)
+        use_cassette(*params['cassette'])
     if attachments_only:
         import_attachments_only(source_url, source_login, source_password,
                                 target_url, target_login, target_password,
@@ -239,6 +318,317 @@ def create_issues(target, issues, last_issue_number):
     return last_issue_number
 
 
+def open_attachment_cache(params):
+    if not params.get('attachment_cache_dir'):
+        return None
+    return AttachmentCache(params['attachment_cache_dir'],
+                           params.get('attachment_cache_size', 10 * 1024) * 1024 * 1024)
+
+
+def attachment_uploader(target, old_attachment=None):
+    def upload(issue_id, a):
+        print "Transfer attachment of " + utf8encode(issue_id) + ": " + utf8encode(a.name)
+        result = target.createAttachmentFromAttachment(issue_id, a)
+        if old_attachment:
+            try:
+                print 'Deleting old attachment'
+                target.deleteAttachment(issue_id, old_attachment.id)
+            except BaseException, e:
+                print "Cannot delete attachment '%s' from issue %s" % (utf8encode(a.name), utf8encode(issue_id))
+                print e
+        return result
+    return upload
+
+
+def get_stage_workers(params):
+    workers = dict(DEFAULT_STAGE_WORKERS)
+    for name, n in zip(STAGES, params.get('stage_workers', '').split(':')):
+        if not n:
+            continue
+        n = int(n)
+        if name == 'fetch':
+            # 0 fetches pages in the main thread
+            workers[name] = max(n, 0)
+        else:
+            workers[name] = max(n, 1)
+    if params.get('create_new_issues'):
+        # issues are numbered in the order they are created
+        workers['import'] = 1
+    return workers
+
+
+def open_journal(params):
+    if not params.get('journal'):
+        return NullJournal()
+    return Journal(params['journal'])
+
+
+def open_delta_state(params):
+    if not params.get('delta_state'):
+        return NullJournal()
+    return Journal(params['delta_state'])
+
+
+def delta_query(query, since):
+    """ Adds to query range of issues updated since the given time in ms. Server time zone is not known,
+        so the range starts a day earlier and issues updated before since have to be filtered out
+    """
+    if not since:
+        return query
+    day = datetime.datetime.utcfromtimestamp(since / 1000 - 24 * 60 * 60).strftime('%Y-%m-%d')
+    return ('%s updated: %s .. Today' % (query or '', day)).strip()
+
+
+def issue_updated(issue):
+    try:
+        return int(getattr(issue, 'updated', 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def issue_user_logins(issue):
+    """ Returns logins of reporter, assignees, updater, voters and comment authors of issue.
+        UserImporter requests only users it has not imported yet
+    """
+    logins = [issue.reporterName]
+    if issue.hasAssignee():
+        if isinstance(issue.Assignee, (list, tuple)):
+            logins.extend(issue.Assignee)
+        else:
+            logins.append(issue.Assignee)
+    #TODO: http://youtrack.jetbrains.net/issue/JT-6100
+    logins.append(issue.updaterName)
+    if issue.hasVoters():
+        if isinstance(issue.voterName, list):
+            logins.extend(issue.voterName)
+        else:
+            logins.append(issue.voterName)
+    logins.extend([comment.author for comment in issue.getComments()])
+    return [login.startswith('system_user') and 'guest' or login for login in logins if login]
+
+
+def mark_when_done(journal, project_id, phase, key, futures):
+    """ Marks the step in journal once all futures succeeded
+    """
+    if not futures:
+        journal.mark(project_id, phase, key)
+        return
+    remaining = [len(futures)]
+
+    def done(future):
+        if future.exception() is not None:
+            return
+        remaining[0] -= 1
+        if not remaining[0]:
+            journal.mark(project_id, phase, key)
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def checkpoint(journal, project_id, pending_pages, lock):
+    """ Stores offset of the first page with unfinished or failed attachment transfers.
+        pending_pages is a list of (offset after page, futures of page attachments), the futures are
+        added by issue workers while holding lock
+    """
+    offset = None
+    while pending_pages:
+        with lock:
+            futures = list(pending_pages[0][1])
+        if [f for f in futures if not f.done() or f.exception() is not None]:
+            break
+        offset = pending_pages.pop(0)[0]
+    if offset is not None:
+        journal.set(project_id, 'offset', offset)
+
+
+def change_field_values(target, commands, issue_id, action, field_name, value):
+    """ Adds value to or removes it from multi-value field with commands. A field name or value that can not
+        be braced is sent in a command of its own after the pending commands
+    """
+    try:
+        command = '%s %s %s' % (action, braced(field_name), braced(value))
+    except ValueError:
+        commands.flush()
+        target.executeCommand(issue_id, '%s %s %s' % (action, field_name, value), disable_notifications=True)
+        return
+    commands.execute(issue_id, command, disable_notifications=True)
+
+
+def link_record(link):
+    return {'typeName': link.typeName, 'source': link.source, 'target': link.target}
+
+
+def print_attachment_failure(pipeline, issue_id, a, error):
+    if error is not None:
+        print "Cant import attachment [ %s ] of issue %s" % (utf8encode(a.name), utf8encode(issue_id))
+        print repr(error)
+
+
+class Migration(object):
+    """ Connections, importers and progress records shared by the projects migrated in one process
+    """
+
+    def __init__(self, source_url, source_login, source_password, target_url, target_login, target_password,
+                 query, params):
+        self.source_url, self.source_login, self.source_password = source_url, source_login, source_password
+        self.target_url, self.target_login, self.target_password = target_url, target_login, target_password
+        self.query = query
+        self.params = params
+        # metadata responses are shared by connections recreated for every project
+        self.source_cache = ResponseCache(max_entries=5000, ttl=3600)
+        self.target_cache = ResponseCache(max_entries=5000, ttl=3600)
+        self.attachment_cache = open_attachment_cache(params)
+        # users of the source are requested once per run
+        self.source_users = UserDirectory()
+        self.source = Connection(source_url, source_login, source_password, cache=self.source_cache,
+                                 user_directory=self.source_users)
+        self.target = Connection(target_url, target_login, target_password, cache=self.target_cache,
+                                 attachment_cache=self.attachment_cache)
+        #, proxy_info = httplib2.ProxyInfo(socks.PROXY_TYPE_HTTP, 'localhost', 8888)
+        self.user_importer = UserImporter(self.source, self.target,
+                                          caching_users=params.get('enable_user_caching', True))
+        self.link_importer = LinkImporter(self.target)
+        self.attachment_pipeline = AttachmentPipeline(self.target, workers=params.get('attachment_workers', 4),
+                                                      progress=print_attachment_failure)
+        self.journal = open_journal(params)
+        self.delta_state = open_delta_state(params)
+        self.stage_workers = get_stage_workers(params)
+        self.failed_commands = []
+        self.period_cf_names = []
+
+    def reconnect(self):
+        """ Opens new connections to avoid disconnections, stages of the pipeline use them at the same time
+        """
+        workers = self.stage_workers
+        # stops worker threads of the connections replaced
+        self.close()
+        self.source = Connection(self.source_url, self.source_login, self.source_password, cache=self.source_cache,
+                                 pool_size=workers['users'] + workers['issues'] + 1, user_directory=self.source_users)
+        self.target = Connection(self.target_url, self.target_login, self.target_password, cache=self.target_cache,
+                                 attachment_cache=self.attachment_cache,
+                                 pool_size=workers['users'] + workers['import'] + workers['issues'])
+        self.user_importer.resetConnections(self.source, self.target)
+        self.link_importer.resetConnections(self.target)
+        return self.source, self.target
+
+    def close(self):
+        self.source.close()
+        self.target.close()
+
+
+class SharedSet(object):
+    """ Set of names kept in a multiprocessing.Manager dict, so that worker processes see names added by others
+    """
+
+    def __init__(self, names):
+        self._names = names
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __ior__(self, names):
+        self._names.update(dict.fromkeys(names, True))
+        return self
+
+    def add(self, name):
+        self._names[name] = True
+
+    def discard(self, name):
+        self._names.pop(name, None)
+
+
+def share_names(manager, names):
+    shared = manager.dict()
+    shared.update(dict.fromkeys(names, True))
+    return shared
+
+
+def migrate_project_job(source_url, source_login, source_password, target_url, target_login, target_password,
+                        project_id, project_ids, query, params, period_cf_names, shared_users, users_lock):
+    """ Migrates a project in a worker process. Returns collected links, which are imported after all
+        projects, and commands blocked by workflows
+    """
+    migration = Migration(source_url, source_login, source_password, target_url, target_login, target_password,
+                          query, params)
+    # users and groups created by any process are not imported again, users another process is
+    # importing are waited for under the shared lock
+    user_importer = migration.user_importer
+    user_logins, pending_logins, group_names, role_names = shared_users
+    user_importer.created_user_logins = SharedSet(user_logins)
+    user_importer.pending_user_logins = SharedSet(pending_logins)
+    user_importer.created_group_names = SharedSet(group_names)
+    user_importer.created_role_names = SharedSet(role_names)
+    user_importer.addCreatedProjects(project_ids)
+    user_importer.lock = users_lock
+    migration.period_cf_names.extend(period_cf_names)
+    try:
+        migrate_project(migration, project_id)
+        migration.attachment_pipeline.close()
+    except Exception, e:
+        traceback.print_exc()
+        # exceptions holding server responses can not always be passed to the parent process
+        raise RuntimeError('%s: %s' % (e.__class__.__name__, e))
+    finally:
+        migration.journal.close()
+        migration.delta_state.close()
+        migration.close()
+    print_request_stats(migration.source, migration.target)
+    return [link_record(l) for l in migration.link_importer.links], migration.failed_commands
+
+
+def init_job_process(params, jobs, urls):
+    # every process gets its share of the request rate limits
+    if 'rate_limit' in params:
+        reads, writes = params['rate_limit']
+        for url in urls:
+            set_rate_limit(url, reads and reads / jobs, writes and writes / jobs)
+
+
+def migrate_projects_in_processes(migration, project_ids, jobs):
+    """ Migrates projects in up to jobs worker processes. Links and failed commands collected
+        by the processes are added to migration
+    """
+    manager = multiprocessing.Manager()
+    user_importer = migration.user_importer
+    shared_users = (share_names(manager, user_importer.created_user_logins),
+                    share_names(manager, []),
+                    share_names(manager, user_importer.created_group_names),
+                    share_names(manager, user_importer.created_role_names))
+    users_lock = manager.Condition()
+    # output buffered before fork would be printed by every process
+    sys.stdout.flush()
+    pool = multiprocessing.Pool(min(jobs, len(project_ids)), init_job_process,
+                                (migration.params, jobs, (migration.source_url, migration.target_url)))
+    failures = []
+    try:
+        results = []
+        for project_id in project_ids:
+            results.append((project_id, pool.apply_async(migrate_project_job, (
+                migration.source_url, migration.source_login, migration.source_password,
+                migration.target_url, migration.target_login, migration.target_password,
+                project_id, project_ids, migration.query, migration.params, migration.period_cf_names,
+                shared_users, users_lock))))
+        pool.close()
+        for project_id, result in results:
+            try:
+                # waiting with timeout keeps the main process responsive to KeyboardInterrupt
+                links, failed_commands = result.get(365 * 24 * 60 * 60)
+            except Exception, e:
+                print "Cant migrate project %s: %s" % (project_id, e)
+                failures.append((project_id, e))
+                continue
+            print "Project %s is migrated" % project_id
+            migration.link_importer.collectLinks([youtrack.Link(l) for l in links])
+            migration.failed_commands.extend(failed_commands)
+            migration.link_importer.addAvailableIssuesFrom(project_id)
+        pool.join()
+    finally:
+        pool.terminate()
+        manager.shutdown()
+    if failures:
+        raise failures[0][1]
+
+
 def youtrack2youtrack(source_url, source_login, source_password, target_url, target_login, target_password,
                       project_ids, query='', params=None):
     if not len(project_ids):
@@ -247,9 +637,9 @@ def youtrack2youtrack(source_url, source_login, source_password, target_url, tar
     if params is None:
         params = {}
 
-    source = Connection(source_url, source_login, source_password)
-    target = Connection(target_url, target_login, target_password)
-    #, proxy_info = httplib2.ProxyInfo(socks.PROXY_TYPE_HTTP, 'localhost', 8888)
+    migration = Migration(source_url, source_login, source_password, target_url, target_login, target_password,
+                          query, params)
+    source, target = migration.source, migration.target
 
     print "Import issue link types"
     for ilt in source.getIssueLinkTypes():
@@ -258,8 +648,7 @@ def youtrack2youtrack(source_url, source_login, source_password, target_url, tar
         except youtrack.YouTrackException, e:
             print e.message
 
-    user_importer = UserImporter(source, target, caching_users=params.get('enable_user_caching', True))
-    link_importer = LinkImporter(target)
+    user_importer = migration.user_importer
 
     #create all projects with minimum info and project lead set
     created_projects = []
@@ -279,7 +668,7 @@ def youtrack2youtrack(source_url, source_login, source_password, target_url, tar
 
     target_cf_names = [pcf.name.capitalize() for pcf in target.getCustomFields()]
 
-    period_cf_names = []
+    period_cf_names = migration.period_cf_names
 
     for cf_name in cf_names_to_import:
         source_cf = source.getCustomField(cf_name)
@@ -300,288 +689,427 @@ def youtrack2youtrack(source_url, source_login, source_password, target_url, tar
                 create_bundle_from_bundle(source, target, source_cf.defaultBundle, source_cf.type, user_importer)
             target.createCustomField(source_cf)
 
-    failed_commands = []
-
-    for projectId in project_ids:
-        source = Connection(source_url, source_login, source_password)
-        target = Connection(target_url, target_login,
-            target_password) #, proxy_info = httplib2.ProxyInfo(socks.PROXY_TYPE_HTTP, 'localhost', 8888)
-        #reset connections to avoid disconnections
-        user_importer.resetConnections(source, target)
-        link_importer.resetConnections(target)
-
-        # copy project, subsystems, versions
-        project = source.getProject(projectId)
-
-        link_importer.addAvailableIssuesFrom(projectId)
-        project_custom_fields = source.getProjectCustomFields(projectId)
-        # create bundles and additional values
-        for pcf_ref in project_custom_fields:
-            pcf = source.getProjectCustomField(projectId, pcf_ref.name)
-            if hasattr(pcf, "bundle"):
-                create_bundle_from_bundle(source, target, pcf.bundle, source.getCustomField(pcf.name).type, user_importer)
-
-        target_project_fields = [pcf.name.lower() for pcf in target.getProjectCustomFields(projectId)]
-        for field in project_custom_fields:
-            if field.name.lower() in target_project_fields:
-                if hasattr(field, 'bundle'):
-                    if field.bundle != target.getProjectCustomField(projectId, field.name).bundle:
-                        target.deleteProjectCustomField(projectId, field.name)
-                        create_project_custom_field(target, field, projectId)
-            else:
-                create_project_custom_field(target, field, projectId)
-
-        # copy issues
-        start = 0
-        max = 20
-
-        sync_workitems = enable_time_tracking(source, target, projectId)
-        tt_settings = target.getProjectTimeTrackingSettings(projectId)
+    jobs = params.get('jobs', 1)
+    if jobs > 1 and len(project_ids) > 1:
+        migrate_projects_in_processes(migration, project_ids, jobs)
+    else:
+        for projectId in project_ids:
+            migrate_project(migration, projectId)
 
-        print "Import issues"
-        last_created_issue_number = 0
+    migration.attachment_pipeline.close()
 
-        while True:
-            try:
-                print "Get issues from " + str(start) + " to " + str(start + max)
-                issues = source.getIssues(projectId, query, start, max)
+    journal = migration.journal
+    if journal.done('', 'links'):
+        print "Issue links were imported by a previous run"
+    else:
+        print "Import issue links"
+        migration.link_importer.importCollectedLinks()
+        journal.mark('', 'links')
 
-                if len(issues) <= 0:
-                    break
+    print "Trying to execute failed commands once again"
+    source, target = migration.source, migration.target
+    for issue_id, command in migration.failed_commands:
+        try:
+            print 'Executing command on issue %s: %s' % (issue_id, command)
+            target.executeCommand(issue_id, command, disable_notifications=True)
+        except youtrack.YouTrackException, e:
+            print 'Failed to execute command for issue #%s: %s' % (issue_id, command)
+            print e
 
-                if convert_period_values and period_cf_names:
-                    for issue in issues:
-                        for pname in period_cf_names:
-                            for fname in issue.__dict__:
-                                if fname.lower() != pname:
-                                    continue
-                                issue[fname] = period_to_minutes(issue[fname])
+    journal.close()
+    migration.delta_state.close()
+    print migration.source_users.report()
+    print_request_stats(source, target)
+    migration.close()
+
+
+def migrate_project(migration, projectId):
+    """ Imports issues of a project, which stub and custom field prototypes were created before
+    """
+    params = migration.params
+    query = migration.query
+    user_importer = migration.user_importer
+    link_importer = migration.link_importer
+    attachment_pipeline = migration.attachment_pipeline
+    journal = migration.journal
+    delta_state = migration.delta_state
+    stage_workers = migration.stage_workers
+    failed_commands = migration.failed_commands
+    period_cf_names = migration.period_cf_names
+
+    # links and failed commands of issues imported by an interrupted run
+    link_importer.collectLinks([youtrack.Link(l) for l in journal.get(projectId, 'links', [])])
+    failed_commands.extend([tuple(c) for c in journal.get(projectId, 'failed_commands', [])])
+    if journal.done(projectId, 'project'):
+        print "Skip project %s, it was imported by a previous run" % projectId
+        return
 
-                users = set([])
+    # stages use the connections at the same time
+    source, target = migration.reconnect()
 
-                for issue in issues:
-                    print "Collect users for issue [%s]" % issue.id
+    # copy project, subsystems, versions
+    project = source.getProject(projectId)
 
-                    users.add(issue.getReporter())
-                    if issue.hasAssignee():
-                        if isinstance(issue.Assignee, (list, tuple)):
-                            users.update(issue.getAssignee())
-                        else:
-                            users.add(issue.getAssignee())
-                    #TODO: http://youtrack.jetbrains.net/issue/JT-6100
-                    users.add(issue.getUpdater())
-                    if issue.hasVoters(): users.update(issue.getVoters())
-                    for comment in issue.getComments(): users.add(comment.getAuthor())
-
-                    print "Collect links for issue [%s]" % issue.id
-                    link_importer.collectLinks(issue.getLinks(True))
-                    #links.extend(issue.getLinks(True))
-
-                    # fix problem with comment.text
-                    for comment in issue.getComments():
-                        if not hasattr(comment, "text") or (len(comment.text.strip()) == 0):
-                            setattr(comment, 'text', 'no text')
-
-                user_importer.importUsersRecursively(users)
-
-                print "Create issues [" + str(len(issues)) + "]"
-                if params.get('create_new_issues'):
-                    last_created_issue_number = create_issues(target, issues, last_created_issue_number)
-                else:
-                    print target.importIssues(projectId, project.name + ' Assignees', issues)
-                link_importer.addAvailableIssues(issues)
+    link_importer.addAvailableIssuesFrom(projectId)
+    project_custom_fields = source.getProjectCustomFields(projectId)
+    # create bundles and additional values
+    for pcf_ref in project_custom_fields:
+        pcf = source.getProjectCustomField(projectId, pcf_ref.name)
+        if hasattr(pcf, "bundle"):
+            create_bundle_from_bundle(source, target, pcf.bundle, source.getCustomField(pcf.name).type, user_importer)
+
+    target_project_fields = [pcf.name.lower() for pcf in target.getProjectCustomFields(projectId)]
+    for field in project_custom_fields:
+        if field.name.lower() in target_project_fields:
+            if hasattr(field, 'bundle'):
+                if field.bundle != target.getProjectCustomField(projectId, field.name).bundle:
+                    target.deleteProjectCustomField(projectId, field.name)
+                    create_project_custom_field(target, field, projectId)
+        else:
+            create_project_custom_field(target, field, projectId)
+
+    # copy issues, continuing after the issues completed by a previous run; the offset counts issues, so it
+    # holds whatever page sizes the runs used, and issues imported after it are skipped by id
+    start = journal.get(projectId, 'offset', 0)
+    if start:
+        print "Continue import of project %s from issue %d" % (projectId, start)
+    page_size = AdaptivePageSize(initial=20, maximum=200)
+    # offsets after pages still synced or transferring attachments, with futures of their issues
+    pending_pages = []
+    page_futures_lock = threading.Lock()
+
+    sync_workitems = enable_time_tracking(source, target, projectId)
+    tt_settings = target.getProjectTimeTrackingSettings(projectId)
+
+    issue_phases = ['attachments']
+    if params.get('sync_tags'):
+        issue_phases.append('tags')
+    if params.get('add_new_comments'):
+        issue_phases.append('comments')
+    if params.get('sync_custom_fields'):
+        issue_phases.append('fields')
+    if sync_workitems:
+        issue_phases.append('workitems')
+
+    # in delta mode only issues updated after the last one seen by the previous run are synced
+    since = delta_state.get(projectId, 'updated', 0)
+    high_water = since
+    if since:
+        print "Sync issues of project %s updated since %s" % (
+            projectId, datetime.datetime.utcfromtimestamp(since / 1000).strftime('%Y-%m-%d %H:%M:%S UTC'))
+
+    print "Import issues"
+    state = {'sync_workitems': sync_workitems,
+             'last_created_issue_number': journal.get(projectId, 'last_created_issue_number', 0)}
+
+    # pages flow from the source through stages importing users, importing issues and syncing single issues
+    def collect_users(page):
+        start, end, issues, issue_futures = page
+        # imported issues are journaled by id, pages of a resumed run need not match the pages of the
+        # interrupted one
+        new_issues = [issue for issue in issues if not journal.done(projectId, 'issues', issue.id)]
+        if not new_issues:
+            return [(page, new_issues, None)]
+        try:
+            if convert_period_values and period_cf_names:
+                for issue in new_issues:
+                    for pname in period_cf_names:
+                        for fname in issue.__dict__:
+                            if fname.lower() != pname:
+                                continue
+                            issue[fname] = period_to_minutes(issue[fname])
+
+            users = set([])
+            page_links = []
+
+            for issue in new_issues:
+                print "Collect users for issue [%s]" % issue.id
+
+                users.update(issue_user_logins(issue))
+
+                print "Collect links for issue [%s]" % issue.id
+                issue_links = issue.getLinks(True)
+                link_importer.collectLinks(issue_links)
+                page_links.extend(issue_links)
+
+                # fix problem with comment.text
+                for comment in issue.getComments():
+                    if not hasattr(comment, "text") or (len(comment.text.strip()) == 0):
+                        setattr(comment, 'text', 'no text')
+
+            user_importer.importUsersRecursively(users)
+            return [(page, new_issues, page_links)]
+        except Exception:
+            print 'Cant collect users of issues from %d to %d' % (start, end)
+            traceback.print_exc()
+            raise
+
+    def import_issues(item):
+        page, new_issues, page_links = item
+        start, end, issues, issue_futures = page
+        if not new_issues:
+            print "Issues from %d to %d were imported by a previous run" % (start, end)
+            link_importer.addAvailableIssues(issues)
+            return zip(issues, issue_futures, [issue_futures] * len(issues))
+        try:
+            print "Create issues [" + str(len(new_issues)) + "]"
+            if params.get('create_new_issues'):
+                state['last_created_issue_number'] = create_issues(target, new_issues,
+                                                                   state['last_created_issue_number'])
+            else:
+                print target.importIssues(projectId, project.name + ' Assignees', new_issues)
+            link_importer.addAvailableIssues(issues)
+            journal.add(projectId, 'links', [link_record(l) for l in page_links])
+            journal.set(projectId, 'last_created_issue_number', state['last_created_issue_number'])
+            journal.mark_all(projectId, 'issues', [issue.id for issue in new_issues])
+        except Exception:
+            print 'Cant process issues from %d to %d' % (start, end)
+            traceback.print_exc()
+            raise
+        return zip(issues, issue_futures, [issue_futures] * len(issues))
+
+    def sync_issue(item):
+        issue, future, page_futures = item
+        try:
+            if [phase for phase in issue_phases if not journal.done(projectId, phase, issue.id)]:
+                sync_issue_phases(issue, page_futures)
+        except Exception:
+            print 'Cant process issue %s' % issue.id
+            traceback.print_exc()
+            future.set_exception(sys.exc_info())
+            raise
+        future.set_result(None)
+
+    def sync_issue_phases(issue, page_futures):
+        try:
+            target_issue = target.getIssue(issue.id)
+        except youtrack.YouTrackException, e:
+            print "Cannot get target issue"
+            print e
+            return
 
-                for issue in issues:
+        if params.get('sync_tags') and issue.tags and not journal.done(projectId, 'tags', issue.id):
+            try:
+                # all tags are added with one command, tag by tag only if it fails
+                tag_commands = {}
+                # tags with a closing brace can not be braced and are added one by one
+                unbraced_tags = []
+                commands = target.commandBuffer()
+                for tag in issue.tags:
+                    tag = re.sub(r'[,&<>]', '_', tag)
                     try:
-                        target_issue = target.getIssue(issue.id)
+                        command = 'tag ' + braced(tag)
+                    except ValueError:
+                        unbraced_tags.append(tag)
+                        continue
+                    tag_commands[command] = tag
+                    commands.execute(issue.id, command, disable_notifications=True)
+                try:
+                    commands.flush()
+                except youtrack.YouTrackException:
+                    # only the tags the server rejected are added again, with spaces and dashes replaced
+                    for issue_id, command, e in commands.failures:
+                        tag = re.sub(r'[\s-]', '_', tag_commands[command])
+                        target.executeCommand(issue.id, 'tag ' + braced(tag), disable_notifications=True)
+                for tag in unbraced_tags:
+                    target.executeCommand(issue.id, 'tag ' + tag, disable_notifications=True)
+                journal.mark(projectId, 'tags', issue.id)
+            except youtrack.YouTrackException, e:
+                print "Cannot sync tags for issue " + issue.id
+                print e
+
+        if params.get('add_new_comments') and not journal.done(projectId, 'comments', issue.id):
+            target_comments = dict()
+            max_id = 0
+            for c in target_issue.getComments():
+                target_comments[c.created] = c
+                if max_id < c.created:
+                    max_id = c.created
+            for c in issue.getComments():
+                if c.created > max_id or c.created not in target_comments:
+                    group = None
+                    if hasattr(c, 'permittedGroup'):
+                        group = c.permittedGroup
+                    try:
+                        target.executeCommand(issue.id, 'comment', c.text, group, c.author, disable_notifications=True)
                     except youtrack.YouTrackException, e:
-                        print "Cannot get target issue"
+                        print 'Cannot add comment to issue '
                         print e
-                        continue
-
-                    if params.get('sync_tags') and issue.tags:
-                        try:
-                            for tag in issue.tags:
-                                tag = re.sub(r'[,&<>]', '_', tag)
-                                try:
-                                    target.executeCommand(issue.id, 'tag ' + tag, disable_notifications=True)
-                                except youtrack.YouTrackException:
-                                    tag = re.sub(r'[\s-]', '_', tag)
-                                    target.executeCommand(issue.id, 'tag ' + tag, disable_notifications=True)
-                        except youtrack.YouTrackException, e:
-                            print "Cannot sync tags for issue " + issue.id
-                            print e
-
-                    if params.get('add_new_comments'):
-                        target_comments = dict()
-                        max_id = 0
-                        for c in target_issue.getComments():
-                            target_comments[c.created] = c
-                            if max_id < c.created:
-                                max_id = c.created
-                        for c in issue.getComments():
-                            if c.created > max_id or c.created not in target_comments:
-                                group = None
-                                if hasattr(c, 'permittedGroup'):
-                                    group = c.permittedGroup
-                                try:
-                                    target.executeCommand(issue.id, 'comment', c.text, group, c.author, disable_notifications=True)
-                                except youtrack.YouTrackException, e:
-                                    print 'Cannot add comment to issue '
-                                    print e
-
-                    if params.get('sync_custom_fields'):
-                        skip_fields = []
-                        if tt_settings and tt_settings.Enabled and tt_settings.TimeSpentField:
-                            skip_fields.append(tt_settings.TimeSpentField)
-                        skip_fields = [name.lower() for name in skip_fields]
-                        for pcf in [pcf for pcf in project_custom_fields if pcf.name.lower() not in skip_fields]:
-                            target_cf_value = None
-                            if pcf.name in target_issue:
-                                target_cf_value = target_issue[pcf.name]
-                                if isinstance(target_cf_value, (list, tuple)):
-                                    target_cf_value = set(target_cf_value)
-                                elif target_cf_value == target.getProjectCustomField(projectId, pcf.name).emptyText:
-                                    target_cf_value = None
-                            source_cf_value = None
-                            if pcf.name in issue:
-                                source_cf_value = issue[pcf.name]
-                                if isinstance(source_cf_value, (list, tuple)):
-                                    source_cf_value = set(source_cf_value)
-                                elif source_cf_value == source.getProjectCustomField(projectId, pcf.name).emptyText:
-                                    source_cf_value = None
-                            if source_cf_value == target_cf_value:
-                                continue
-                            if isinstance(source_cf_value, set) or isinstance(target_cf_value, set):
-                                if source_cf_value is None:
-                                    source_cf_value = set([])
-                                elif not isinstance(source_cf_value, set):
-                                    source_cf_value = set([source_cf_value])
-                                if target_cf_value is None:
-                                    target_cf_value = set([])
-                                elif not isinstance(target_cf_value, set):
-                                    target_cf_value = set([target_cf_value])
-                                for v in target_cf_value:
-                                    if v not in source_cf_value:
-                                        target.executeCommand(issue.id, 'remove %s %s' % (pcf.name, v), disable_notifications=True)
-                                for v in source_cf_value:
-                                    if v not in target_cf_value:
-                                        target.executeCommand(issue.id, 'add %s %s' % (pcf.name, v), disable_notifications=True)
-                            else:
-                                if source_cf_value is None:
-                                    source_cf_value = target.getProjectCustomField(projectId, pcf.name).emptyText
-                                if pcf.type.lower() == 'date':
-                                    m = re.match(r'(\d{10})(?:\d{3})?', str(source_cf_value))
-                                    if m:
-                                        source_cf_value = datetime.datetime.fromtimestamp(
-                                            int(m.group(1))).strftime('%Y-%m-%d')
-                                elif pcf.type.lower() == 'period':
-                                    source_cf_value = '%sm' % source_cf_value
-                                command = '%s %s' % (pcf.name, source_cf_value)
-                                try:
-                                    target.executeCommand(issue.id, command, disable_notifications=True)
-                                except youtrack.YouTrackException, e:
-                                    if e.response.status == 412 and e.response.reason.find('Precondition Failed') > -1:
-                                        print 'WARN: Some workflow blocks following command: %s' % command
-                                        failed_commands.append((issue.id, command))
-
-                    if sync_workitems:
-                        workitems = source.getWorkItems(issue.id)
-                        if workitems:
-                            existing_workitems = dict()
-                            target_workitems = target.getWorkItems(issue.id)
-                            if target_workitems:
-                                for w in target_workitems:
-                                    _id = '%s\n%s\n%s' % (w.date, w.authorLogin, w.duration)
-                                    if hasattr(w, 'description'):
-                                        _id += '\n%s' % w.description
-                                    existing_workitems[_id] = w
-                            new_workitems = []
-                            for w in workitems:
-                                _id = '%s\n%s\n%s' % (w.date, w.authorLogin, w.duration)
-                                if hasattr(w, 'description'):
-                                    _id += '\n%s' % w.description
-                                if _id not in existing_workitems:
-                                    new_workitems.append(w)
-                            if new_workitems:
-                                print "Process workitems for issue [ " + issue.id + "]"
-                                try:
-                                    target.importWorkItems(issue.id, new_workitems)
-                                except youtrack.YouTrackException, e:
-                                    if e.response.status == 404:
-                                        print "WARN: Target YouTrack doesn't support workitems importing."
-                                        print "WARN: Workitems won't be imported."
-                                        sync_workitems = False
-                                    else:
-                                        print "ERROR: Skipping workitems because of error:" + str(e)
-
-                    print "Process attachments for issue [%s]" % issue.id
-                    existing_attachments = dict()
+            journal.mark(projectId, 'comments', issue.id)
+
+        if params.get('sync_custom_fields') and not journal.done(projectId, 'fields', issue.id):
+            skip_fields = []
+            if tt_settings and tt_settings.Enabled and tt_settings.TimeSpentField:
+                skip_fields.append(tt_settings.TimeSpentField)
+            skip_fields = [name.lower() for name in skip_fields]
+            for pcf in [pcf for pcf in project_custom_fields if pcf.name.lower() not in skip_fields]:
+                target_cf_value = None
+                if pcf.name in target_issue:
+                    target_cf_value = target_issue[pcf.name]
+                    if isinstance(target_cf_value, (list, tuple)):
+                        target_cf_value = set(target_cf_value)
+                    elif target_cf_value == target.getProjectCustomField(projectId, pcf.name).emptyText:
+                        target_cf_value = None
+                source_cf_value = None
+                if pcf.name in issue:
+                    source_cf_value = issue[pcf.name]
+                    if isinstance(source_cf_value, (list, tuple)):
+                        source_cf_value = set(source_cf_value)
+                    elif source_cf_value == source.getProjectCustomField(projectId, pcf.name).emptyText:
+                        source_cf_value = None
+                if source_cf_value == target_cf_value:
+                    continue
+                if isinstance(source_cf_value, set) or isinstance(target_cf_value, set):
+                    if source_cf_value is None:
+                        source_cf_value = set([])
+                    elif not isinstance(source_cf_value, set):
+                        source_cf_value = set([source_cf_value])
+                    if target_cf_value is None:
+                        target_cf_value = set([])
+                    elif not isinstance(target_cf_value, set):
+                        target_cf_value = set([target_cf_value])
+                    commands = target.commandBuffer()
+                    for v in target_cf_value:
+                        if v not in source_cf_value:
+                            change_field_values(target, commands, issue.id, 'remove', pcf.name, v)
+                    for v in source_cf_value:
+                        if v not in target_cf_value:
+                            change_field_values(target, commands, issue.id, 'add', pcf.name, v)
+                    commands.flush()
+                else:
+                    if source_cf_value is None:
+                        source_cf_value = target.getProjectCustomField(projectId, pcf.name).emptyText
+                    if pcf.type.lower() == 'date':
+                        m = re.match(r'(\d{10})(?:\d{3})?', str(source_cf_value))
+                        if m:
+                            source_cf_value = datetime.datetime.fromtimestamp(
+                                int(m.group(1))).strftime('%Y-%m-%d')
+                    elif pcf.type.lower() == 'period':
+                        source_cf_value = '%sm' % source_cf_value
+                    command = '%s %s' % (pcf.name, source_cf_value)
                     try:
-                        for a in target.getAttachments(issue.id):
-                            existing_attachments[a.name + '\n' + a.created] = a
+                        target.executeCommand(issue.id, command, disable_notifications=True)
+                    except youtrack.YouTrackException, e:
+                        if e.response.status == 412 and e.response.reason.find('Precondition Failed') > -1:
+                            print 'WARN: Some workflow blocks following command: %s' % command
+                            failed_commands.append((issue.id, command))
+                            journal.add(projectId, 'failed_commands', [(issue.id, command)])
+            journal.mark(projectId, 'fields', issue.id)
+
+        if state['sync_workitems'] and not journal.done(projectId, 'workitems', issue.id):
+            workitems = source.getWorkItems(issue.id)
+            if workitems:
+                existing_workitems = dict()
+                target_workitems = target.getWorkItems(issue.id)
+                if target_workitems:
+                    for w in target_workitems:
+                        _id = '%s\n%s\n%s' % (w.date, w.authorLogin, w.duration)
+                        if hasattr(w, 'description'):
+                            _id += '\n%s' % w.description
+                        existing_workitems[_id] = w
+                new_workitems = []
+                for w in workitems:
+                    _id = '%s\n%s\n%s' % (w.date, w.authorLogin, w.duration)
+                    if hasattr(w, 'description'):
+                        _id += '\n%s' % w.description
+                    if _id not in existing_workitems:
+                        new_workitems.append(w)
+                if new_workitems:
+                    print "Process workitems for issue [ " + issue.id + "]"
+                    try:
+                        target.importWorkItems(issue.id, new_workitems)
                     except youtrack.YouTrackException, e:
                         if e.response.status == 404:
-                            print "Skip importing attachments because issue %s doesn't exist" % issue.id
-                            continue
-                        raise e
-
-                    attachments = []
-
-                    users = set([])
-                    for a in issue.getAttachments():
-                        if a.name + '\n' + a.created in existing_attachments and not params.get('replace_attachments'):
-                            a.name = utf8encode(a.name)
-                            try:
-                                print "Skip attachment '%s' (created: %s) because it's already exists" \
-                                      % (utf8encode(a.name), utf8encode(a.created))
-                            except Exception:
-                                pass
-                            continue
-                        attachments.append(a)
-                        author = a.getAuthor()
-                        if author is not None:
-                            users.add(author)
-                    user_importer.importUsersRecursively(users)
-
-                    for a in attachments:
-                        print "Transfer attachment of " + utf8encode(issue.id) + ": " + utf8encode(a.name)
-                        # TODO: add authorLogin to workaround http://youtrack.jetbrains.net/issue/JT-6082
-                        #a.authorLogin = target_login
-                        try:
-                            target.createAttachmentFromAttachment(issue.id, a)
-                        except BaseException, e:
-                            print "Cant import attachment [ %s ]" % utf8encode(a.name)
-                            print repr(e)
-                            continue
-                        if params.get('replace_attachments'):
-                            try:
-                                old_attachment = existing_attachments.get(a.name + '\n' + a.created)
-                                if old_attachment:
-                                    print 'Deleting old attachment'
-                                    target.deleteAttachment(issue.id, old_attachment.id)
-                            except BaseException, e:
-                                print "Cannot delete attachment '%s' from issue %s" % (utf8encode(a.name), utf8encode(issue.id))
-                                print e
+                            print "WARN: Target YouTrack doesn't support workitems importing."
+                            print "WARN: Workitems won't be imported."
+                            state['sync_workitems'] = False
+                        else:
+                            print "ERROR: Skipping workitems because of error:" + str(e)
+            journal.mark(projectId, 'workitems', issue.id)
 
-            except Exception, e:
-                print('Cant process issues from ' + str(start) + ' to ' + str(start + max))
-                traceback.print_exc()
-                raise e
+        if journal.done(projectId, 'attachments', issue.id):
+            return
+        print "Process attachments for issue [%s]" % issue.id
+        existing_attachments = dict()
+        try:
+            for a in target.getAttachments(issue.id):
+                existing_attachments[a.name + '\n' + a.created] = a
+        except youtrack.YouTrackException, e:
+            if e.response.status == 404:
+                print "Skip importing attachments because issue %s doesn't exist" % issue.id
+                return
+            raise e
 
-            start += max
+        attachments = []
 
-    print "Import issue links"
-    link_importer.importCollectedLinks()
+        users = set([])
+        for a in issue.getAttachments():
+            if a.name + '\n' + a.created in existing_attachments and not params.get('replace_attachments'):
+                a.name = utf8encode(a.name)
+                try:
+                    print "Skip attachment '%s' (created: %s) because it's already exists" \
+                          % (utf8encode(a.name), utf8encode(a.created))
+                except Exception:
+                    pass
+                continue
+            attachments.append(a)
+            author = a.getAuthor()
+            if author is not None:
+                users.add(author)
+        user_importer.importUsersRecursively(users)
 
-    print "Trying to execute failed commands once again"
-    for issue_id, command in failed_commands:
-        try:
-            print 'Executing command on issue %s: %s' % (issue_id, command)
-            target.executeCommand(issue_id, command, disable_notifications=True)
-        except youtrack.YouTrackException, e:
-            print 'Failed to execute command for issue #%s: %s' % (issue_id, command)
-            print e
+        futures = []
+        for a in attachments:
+            # TODO: add authorLogin to workaround http://youtrack.jetbrains.net/issue/JT-6082
+            #a.authorLogin = target_login
+            old_attachment = None
+            if params.get('replace_attachments'):
+                old_attachment = existing_attachments.get(a.name + '\n' + a.created)
+            futures.append(attachment_pipeline.put(issue.id, a, attachment_uploader(target, old_attachment)))
+        mark_when_done(journal, projectId, 'attachments', issue.id, futures)
+        # attachments are added to the page before the issue is reported as done, see checkpoint
+        with page_futures_lock:
+            page_futures.extend(futures)
+
+    pipeline = Pipeline([Stage('users', collect_users, workers=stage_workers['users']),
+                         Stage('import', import_issues, workers=stage_workers['import']),
+                         Stage('issues', sync_issue, workers=stage_workers['issues'])])
+    try:
+        for issues in source.iterIssuePages(projectId, delta_query(query, since), page_size, start=start,
+                                            prefetch=stage_workers['fetch']):
+            fetched = len(issues)
+            for issue in issues:
+                high_water = max(high_water, issue_updated(issue))
+            if since:
+                issues = [issue for issue in issues if issue_updated(issue) > since]
+            print "Process issues from " + str(start) + " to " + str(start + fetched)
+            # future of every issue, followed by futures of its attachments once they are scheduled
+            issue_futures = [Future() for issue in issues]
+            if issues:
+                pipeline.put((start, start + fetched, issues, issue_futures))
+            start += fetched
+            pending_pages.append((start, issue_futures))
+            checkpoint(journal, projectId, pending_pages, page_futures_lock)
+        pipeline.join()
+    finally:
+        pipeline.close()
+    print pipeline.report()
+    print page_size.report()
+    attachment_pipeline.join()
+    print attachment_pipeline.report()
+    checkpoint(journal, projectId, pending_pages, page_futures_lock)
+    if not pending_pages:
+        journal.mark(projectId, 'project')
+        # issues of failed pages are synced again by the next delta run
+        if high_water > since:
+            delta_state.set(projectId, 'updated', high_water)
+
+
+def print_request_stats(source, target):
+    print "Requests to source"
+    print source.request_stats.report()
+    print "Requests to target"
+    print target.request_stats.report()
 
 
 def import_attachments_only(source_url, source_login, source_password,
@@ -592,18 +1120,17 @@ def import_attachments_only(source_url, source_login, source_password,
         return
     if params is None:
         params = {}
-    start = 0
-    max = 20
     source = Connection(source_url, source_login, source_password)
-    target = Connection(target_url, target_login, target_password)
+    target = Connection(target_url, target_login, target_password, attachment_cache=open_attachment_cache(params))
     user_importer = UserImporter(source, target, caching_users=params.get('enable_user_caching', True))
+    attachment_pipeline = AttachmentPipeline(target, workers=params.get('attachment_workers', 4),
+                                             progress=print_attachment_failure)
     for projectId in project_ids:
-        while True:
+        start = 0
+        page_size = AdaptivePageSize(initial=20, maximum=200)
+        for issues in source.iterIssuePages(projectId, '', page_size):
             try:
-                print 'Get issues from %d to %d' % (start, start + max)
-                issues = source.getIssues(projectId, '', start, max)
-                if len(issues) <= 0:
-                    break
+                print 'Process issues from %d to %d' % (start, start + len(issues))
                 for issue in issues:
                     print 'Process attachments for issue %s' % issue.id
                     existing_attachments = dict()
@@ -631,27 +1158,19 @@ def import_attachments_only(source_url, source_login, source_password,
                     user_importer.importUsersRecursively(users)
 
                     for a in attachments:
-                        print 'Transfer attachment of %s: %s' % (utf8encode(issue.id), utf8encode(a.name))
-                        try:
-                            target.createAttachmentFromAttachment(issue.id, a)
-                        except BaseException, e:
-                            print 'Cannot import attachment [ %s ]' % utf8encode(a.name)
-                            print repr(e)
-                            continue
+                        old_attachment = None
                         if params.get('replace_attachments'):
-                            try:
-                                old_attachment = existing_attachments.get(a.name + '\n' + a.created)
-                                if old_attachment:
-                                    print 'Deleting old attachment'
-                                    target.deleteAttachment(issue.id, old_attachment.id)
-                            except BaseException, e:
-                                print "Cannot delete attachment '%s' from issue %s" % (utf8encode(a.name), utf8encode(issue.id))
-                                print e
+                            old_attachment = existing_attachments.get(a.name + '\n' + a.created)
+                        attachment_pipeline.put(issue.id, a, attachment_uploader(target, old_attachment))
             except Exception, e:
-                print 'Cannot process issues from %d to %d' % (start, start + max)
+                print 'Cannot process issues from %d to %d' % (start, start + len(issues))
                 traceback.print_exc()
                 raise e
-            start += max
+            start += len(issues)
+        print page_size.report()
+    attachment_pipeline.close()
+    print attachment_pipeline.report()
+    print_request_stats(source, target)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,8 @@ from youtrack import YouTrackException, Issue
 import youtrack
 from youtrack.connection import Connection
 from youtrack.importHelper import create_custom_field
+from youtrack.attachments import AttachmentPipeline
+from youtrack.commands import braced
 import itertools
 
 __author__ = 'user'
@@ -17,6 +19,7 @@ class YouTrackImporter(object):
         self._source = source
         self._target = target
         self._import_config = import_config
+        self._attachment_pipeline = AttachmentPipeline(target, progress=self._on_attachment_transferred)
 
     def do_import(self, projects, new_projects_owner_login=u'root'):
         project_ids = projects.keys()
@@ -27,6 +30,9 @@ class YouTrackImporter(object):
             self._attach_fields_to_project(project_id)
             self._add_value_to_fields_in_project(project_id)
             self._import_issues(project_id)
+            self._attachment_pipeline.join()
+            print(self._attachment_pipeline.report())
+        self._attachment_pipeline.close()
         self._import_tags(project_ids)
         self._import_issue_links(project_ids)
 
@@ -112,12 +118,19 @@ class YouTrackImporter(object):
         for project_id in project_ids:
             for (issue_id, tags) in self._get_issue_tags(project_id):
                 yt_issue_id = u'%s-%s' % (project_id, issue_id)
-                for tag in tags:
-                    if tag in tags_to_import_now:
-                        try:
-                            self._target.executeCommand(yt_issue_id, u'tag ' + tag)
-                        except YouTrackException:
-                            print(u'Failed to import tag for issue [%s]' % yt_issue_id)
+                # tags of an issue are added with one command
+                commands = self._target.commandBuffer()
+                try:
+                    for tag in tags:
+                        if tag in tags_to_import_now:
+                            try:
+                                commands.execute(yt_issue_id, u'tag ' + braced(tag))
+                            except ValueError:
+                                # a tag with a closing brace can not be braced, it is added on its own
+                                self._target.executeCommand(yt_issue_id, u'tag ' + tag)
+                    commands.flush()
+                except YouTrackException:
+                    print(u'Failed to import tag for issue [%s]' % yt_issue_id)
         if len(tags_to_import_after):
             self._do_import_tags(project_ids, tags_to_import_after)
 
@@ -263,7 +276,11 @@ class YouTrackImporter(object):
 
     def _import_attachments(self, issue_id, issue_attachments):
         for attach in issue_attachments:
-            self._target.createAttachmentFromAttachment(issue_id, attach)
+            self._attachment_pipeline.put(issue_id, attach)
+
+    def _on_attachment_transferred(self, pipeline, issue_id, attach, error):
+        if error is not None:
+            print(u'Failed to import attachment of issue [%s]: %s' % (issue_id, repr(error)))
 
     def _get_comments(self, issue):
         raise NotImplementedError